@@ -1,4 +1,10 @@
 from ftplib import FTP
+import os
+import sys
+
+# Make the repository root importable when run as a script, not only with python -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from networking.ftp_transfer import FTP_BUFFER_SIZE
 
 def connect_to_ftp(server, username, password):
     ftp = FTP(server)
@@ -12,12 +18,12 @@ def list_files(ftp):
 
 def upload_file(ftp, file_path, remote_path):
     with open(file_path, 'rb') as f:
-        ftp.storbinary(f"STOR {remote_path}", f)
+        ftp.storbinary(f"STOR {remote_path}", f, blocksize=FTP_BUFFER_SIZE)
         print(f"Uploaded {file_path} to {remote_path}")
 
 def download_file(ftp, remote_path, local_path):
     with open(local_path, 'wb') as f:
-        ftp.retrbinary(f"RETR {remote_path}", f.write)
+        ftp.retrbinary(f"RETR {remote_path}", f.write, blocksize=FTP_BUFFER_SIZE)
         print(f"Downloaded {remote_path} to {local_path}")
 
 def disconnect_ftp(ftp):
@@ -0,0 +1,334 @@
+import numpy as np
+import argparse
+import calendar
+import ftplib
+import getpass
+import hashlib
+import logging
+import os
+import posixpath
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Make the repository root importable when run as a script, not only with python -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from networking.ftp_transfer import FTP_POOL_SIZE, FTP_STATE_DIR, PARTIAL_SUFFIX, FTPConnectionPool, FTPTransferEngine
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MANIFEST_DIR = os.path.join(FTP_STATE_DIR, "manifests")
+HASH_BLOCK_SIZE = 1024 * 1024
+MLSD_FACTS = ["type", "size", "modify"]
+
+
+# Convert an MLSD modify fact (YYYYMMDDHHMMSS[.sss], UTC) to epoch seconds
+def _modify_to_epoch(modify):
+    return calendar.timegm(time.strptime(str(modify)[:14], "%Y%m%d%H%M%S"))
+
+
+# Hash a local file
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+class SyncManifest:
+    """
+    State of a synced tree at the last sync, per relative path: remote size and
+    modify time, local size and mtime (ns) and an optional SHA-256 of the content.
+
+    Stored as one compressed .npz of column arrays (paths as a single NUL-separated
+    blob), so a 100k-file manifest loads and saves in well under a second.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with np.load(path) as data:
+                paths = data["paths"].tobytes().decode("utf-8").split("\0") if data["paths"].size else []
+                digests = [bytes(digest) if digest.any() else b"" for digest in data["digests"]]
+                self.entries = dict(zip(paths, zip(data["remote_sizes"].tolist(), data["remote_mtimes"].tolist(),
+                                                   data["local_sizes"].tolist(), data["local_mtimes"].tolist(),
+                                                   digests)))
+
+    def save(self):
+        paths = sorted(self.entries)
+        rows = [self.entries[path] for path in paths]
+        digests = np.zeros((len(rows), 32), dtype=np.uint8)
+        for i, row in enumerate(rows):
+            if row[4]:
+                digests[i] = np.frombuffer(row[4], dtype=np.uint8)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                paths=np.frombuffer("\0".join(paths).encode("utf-8"), dtype=np.uint8),
+                remote_sizes=np.array([row[0] for row in rows], dtype=np.int64),
+                remote_mtimes=np.array([row[1] for row in rows], dtype=np.int64),
+                local_sizes=np.array([row[2] for row in rows], dtype=np.int64),
+                local_mtimes=np.array([row[3] for row in rows], dtype=np.int64),
+                digests=digests,
+            )
+        os.replace(tmp_path, self.path)
+
+
+# Default manifest location for a pair of trees
+def manifest_path_for(pool, remote_root, local_root, direction):
+    key = f"{direction}:{pool.host}:{pool.port}:{pool.user}:{remote_root}:{os.path.abspath(local_root)}"
+    return os.path.join(MANIFEST_DIR, hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + ".npz")
+
+
+# List a remote tree with MLSD, one directory per pooled connection
+def list_remote_tree(pool, remote_root):
+    """
+    Return ({relative path: (size, modify)} for files, set of relative directory paths)
+    for everything under remote_root. Directories are listed in parallel.
+    """
+    files = {}
+    directories = set()
+
+    def list_directory(relative):
+        with pool.connection() as ftp:
+            return relative, list(ftp.mlsd(posixpath.join(remote_root, relative), facts=MLSD_FACTS))
+
+    with ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="ftp-list") as executor:
+        pending = {executor.submit(list_directory, "")}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                relative, entries = future.result()
+                for name, facts in entries:
+                    path = posixpath.join(relative, name) if relative else name
+                    kind = facts.get("type", "").lower()
+                    if kind == "dir":
+                        directories.add(path)
+                        pending.add(executor.submit(list_directory, path))
+                    elif kind == "file":
+                        files[path] = (int(facts["size"]), _modify_to_epoch(facts["modify"]))
+    return files, directories
+
+
+# List a local tree
+def list_local_tree(local_root):
+    """
+    Return {relative path: (size, mtime in ns)} for the files under local_root,
+    ignoring partial downloads.
+    """
+    files = {}
+    stack = [""]
+    while stack:
+        relative = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(local_root, relative))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                path = f"{relative}/{entry.name}" if relative else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(path)
+                elif entry.is_file() and not entry.name.endswith((PARTIAL_SUFFIX, PARTIAL_SUFFIX + ".json")):
+                    stat = entry.stat()
+                    files[path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+# Directories left empty by deleting files
+def emptied_directories(deleted, remaining):
+    """
+    Return the ancestor directories of the deleted relative paths that hold none of
+    the remaining paths, deepest first, so they can be removed in order.
+    """
+    def ancestors(path):
+        parts = path.split("/")[:-1]
+        return {"/".join(parts[:depth]) for depth in range(1, len(parts) + 1)}
+
+    occupied = set().union(*(ancestors(path) for path in remaining)) if remaining else set()
+    candidates = set().union(*(ancestors(path) for path in deleted)) if deleted else set()
+    return sorted(candidates - occupied, key=lambda directory: (-directory.count("/"), directory))
+
+
+# Create a remote directory and its missing ancestors
+def make_remote_dirs(ftp, remote_dir):
+    parts = [part for part in remote_dir.split("/") if part]
+    prefix = "/" if remote_dir.startswith("/") else ""
+    for depth in range(1, len(parts) + 1):
+        directory = prefix + "/".join(parts[:depth])
+        try:
+            ftp.mkd(directory)
+        except ftplib.error_perm:
+            # Usually the directory exists already; a real failure shows on the last one
+            if depth == len(parts):
+                raise
+
+
+# Decide which files a sync has to transfer
+def plan_sync(remote_files, local_files, manifest, direction, local_root, delete=False, checksum=False):
+    """
+    Compare both trees with the manifest and return (relative paths to transfer,
+    relative paths to delete on the destination). A file is unchanged when the
+    source and destination both match the manifest; with checksum=True, a local
+    file whose stats changed but whose hash still matches counts as unchanged.
+    Manifest entries for files refreshed by hash are updated in place.
+    """
+    source, destination = (remote_files, local_files) if direction == "down" else (local_files, remote_files)
+    transfer = []
+    for path in source:
+        remote, local = remote_files.get(path), local_files.get(path)
+        entry = manifest.entries.get(path)
+        if entry is not None and remote is not None and local is not None and entry[:2] == remote:
+            if entry[2:4] == local:
+                continue
+            if checksum and entry[4] and local[0] == entry[2] \
+                    and file_digest(os.path.join(local_root, path)) == entry[4]:
+                manifest.entries[path] = (*remote, *local, entry[4])
+                continue
+        elif entry is None and direction == "down" and local is not None and remote is not None \
+                and local[0] == remote[0] and local[1] // 1_000_000_000 == remote[1]:
+            # Mirrored before without a manifest (same size and modify time)
+            manifest.entries[path] = (*remote, *local,
+                                      file_digest(os.path.join(local_root, path)) if checksum else b"")
+            continue
+        transfer.append(path)
+    to_delete = sorted(path for path in destination if path not in source) if delete else []
+    return sorted(transfer), to_delete
+
+
+# Mirror a directory tree in one direction
+def sync_directory(pool, remote_root, local_root, direction="down", delete=False, dry_run=False, checksum=False,
+                   manifest_path=None, **engine_options):
+    """
+    Incrementally mirror remote_root to local_root (direction="down") or local_root
+    to remote_root ("up"): both trees are listed (the remote one with MLSD),
+    compared with the manifest of the last sync and only new or changed files are
+    transferred, in parallel. delete=True removes destination files that no longer
+    exist at the source, and the directories that leaves empty; dry_run=True only
+    returns the plan. Returns a summary.
+    """
+    manifest = SyncManifest(manifest_path or manifest_path_for(pool, remote_root, local_root, direction))
+    started = time.perf_counter()
+    try:
+        remote_files, remote_directories = list_remote_tree(pool, remote_root)
+        create_root = False
+    except ftplib.error_perm:
+        if direction != "up":
+            raise
+        # Uploading into a remote directory that does not exist yet
+        remote_files, remote_directories, create_root = {}, set(), True
+    local_files = list_local_tree(local_root)
+    to_transfer, to_delete = plan_sync(remote_files, local_files, manifest, direction, local_root,
+                                       delete=delete, checksum=checksum)
+    summary = {"direction": direction, "remote_files": len(remote_files), "local_files": len(local_files),
+               "transfer": to_transfer, "delete": to_delete, "failed": {}, "dry_run": dry_run}
+    logging.info(f"Sync plan ({time.perf_counter() - started:.2f}s): {len(to_transfer)} files to transfer, "
+                 f"{len(to_delete)} to delete, {len(remote_files if direction == 'down' else local_files) - len(to_transfer)} "
+                 f"unchanged.")
+    if dry_run:
+        return summary
+
+    def remote_path(path):
+        return posixpath.join(remote_root, path)
+
+    def local_path(path):
+        return os.path.join(local_root, *path.split("/"))
+
+    engine = FTPTransferEngine(pool, **engine_options)
+    if direction == "down":
+        failed = engine.download([(remote_path(path), local_path(path), *remote_files[path])
+                                  for path in to_transfer])
+        for path in to_transfer:
+            if remote_path(path) in failed:
+                continue
+            # Give the mirror the remote modify time so later syncs can compare stats
+            os.utime(local_path(path), (remote_files[path][1], remote_files[path][1]))
+        for path in to_delete:
+            os.remove(local_path(path))
+        for directory in emptied_directories(to_delete, remote_files):
+            try:
+                os.rmdir(local_path(directory))
+            except OSError as e:
+                logging.warning(f"Not removing local directory {directory}: {e}")
+    else:
+        with pool.connection() as ftp:
+            if create_root:
+                make_remote_dirs(ftp, remote_root)
+            needed = {posixpath.dirname(path) for path in to_transfer}
+            for directory in sorted(needed):
+                parts = directory.split("/") if directory else []
+                for depth in range(1, len(parts) + 1):
+                    parent = "/".join(parts[:depth])
+                    if parent not in remote_directories:
+                        ftp.mkd(remote_path(parent))
+                        remote_directories.add(parent)
+        failed = engine.upload([(local_path(path), remote_path(path)) for path in to_transfer])
+        # Read back the modify times the server gave the uploaded files
+        uploaded_directories = {posixpath.dirname(path) for path in to_transfer if remote_path(path) not in failed}
+        for directory in uploaded_directories:
+            with pool.connection() as ftp:
+                for name, facts in ftp.mlsd(remote_path(directory), facts=MLSD_FACTS):
+                    if facts.get("type", "").lower() == "file":
+                        path = posixpath.join(directory, name) if directory else name
+                        remote_files[path] = (int(facts["size"]), _modify_to_epoch(facts["modify"]))
+        with pool.connection() as ftp:
+            for path in to_delete:
+                ftp.delete(remote_path(path))
+            for directory in emptied_directories(to_delete, local_files):
+                try:
+                    ftp.rmd(remote_path(directory))
+                except ftplib.error_perm as e:
+                    logging.warning(f"Not removing remote directory {directory}: {e}")
+
+    for path in to_transfer:
+        if remote_path(path) in failed:
+            continue
+        stat = os.stat(local_path(path))
+        manifest.entries[path] = (*remote_files[path], stat.st_size, stat.st_mtime_ns,
+                                  file_digest(local_path(path)) if checksum else b"")
+    source = remote_files if direction == "down" else local_files
+    for path in [path for path in manifest.entries if path not in source]:
+        del manifest.entries[path]
+    manifest.save()
+    summary["failed"] = failed
+    logging.info(f"Sync finished in {time.perf_counter() - started:.2f}s: {len(to_transfer) - len(failed)} files "
+                 f"transferred, {len(to_delete)} deleted, {len(failed)} failed.")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally mirror a directory tree over FTP.")
+    parser.add_argument("host")
+    parser.add_argument("remote_root")
+    parser.add_argument("local_root")
+    parser.add_argument("--user", default="anonymous")
+    parser.add_argument("--port", type=int, default=21)
+    parser.add_argument("--direction", choices=["down", "up"], default="down",
+                        help="down mirrors the remote tree locally, up mirrors the local tree remotely")
+    parser.add_argument("--delete", action="store_true", help="delete files missing from the source")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would be transferred")
+    parser.add_argument("--checksum", action="store_true", help="hash local files to detect unchanged content")
+    parser.add_argument("--connections", type=int, default=FTP_POOL_SIZE)
+    args = parser.parse_args()
+    password = os.environ.get("FTP_PASSWORD") or getpass.getpass("FTP password: ")
+    try:
+        with FTPConnectionPool(args.host, args.user, password, port=args.port, size=args.connections) as pool:
+            summary = sync_directory(pool, args.remote_root, args.local_root, direction=args.direction,
+                                     delete=args.delete, dry_run=args.dry_run, checksum=args.checksum)
+    except ftplib.all_errors as e:
+        logging.error(f"Sync failed: {e}")
+        return
+    if args.dry_run:
+        for path in summary["transfer"]:
+            print(f"transfer {path}")
+        for path in summary["delete"]:
+            print(f"delete {path}")
+
+
+if __name__ == "__main__":
+    main()
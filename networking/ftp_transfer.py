@@ -0,0 +1,380 @@
+import ftplib
+import hashlib
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from config.settings import CONNECTION_TIMEOUT, RETRY_ATTEMPTS, RETRY_DELAY
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+FTP_POOL_SIZE = 4  # authenticated connections, i.e. transfers in flight
+FTP_BUFFER_SIZE = 1024 * 1024  # bytes per read/write and data socket buffer size
+FTP_CHUNK_SIZE = 32 * 1024 * 1024  # files larger than this are transferred as parallel byte ranges
+FTP_STATE_DIR = "data/ftp_state"  # progress of interrupted uploads
+PARTIAL_SUFFIX = ".part"  # downloads are written here and renamed when complete
+
+
+class FTPConnectionPool:
+    """
+    Pool of up to size authenticated FTP connections in binary mode. Connections
+    are opened on demand and reused; a connection that failed is closed instead of
+    being returned to the pool.
+
+        with pool.connection() as ftp:
+            ftp.size("dumps/latest.csv")
+    """
+
+    def __init__(self, host, user, password, port=21, size=FTP_POOL_SIZE, timeout=CONNECTION_TIMEOUT):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect(self):
+        ftp = ftplib.FTP(timeout=self.timeout)
+        ftp.connect(self.host, self.port)
+        ftp.login(self.user, self.password)
+        ftp.voidcmd("TYPE I")
+        return ftp
+
+    @contextmanager
+    def connection(self):
+        self.slots.acquire()
+        ftp = None
+        try:
+            try:
+                ftp = self.idle.get_nowait()
+            except queue.Empty:
+                ftp = self._connect()
+            yield ftp
+            self.idle.put(ftp)
+        except BaseException:
+            if ftp is not None:
+                ftp.close()
+            raise
+        finally:
+            self.slots.release()
+
+    def close(self):
+        while True:
+            try:
+                ftp = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                ftp.quit()
+            except ftplib.all_errors:
+                ftp.close()
+
+
+# Open a data connection with the configured buffer sizes
+def _transfer_socket(ftp, command, offset, buffer_size):
+    connection = ftp.transfercmd(command, rest=offset or None)
+    connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_size)
+    connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_size)
+    return connection
+
+
+# Download bytes [start, end) of a remote file into the same range of a local file
+def download_range(ftp, remote_path, local_path, start, end, buffer_size=FTP_BUFFER_SIZE):
+    """
+    RETR a remote file from offset start (REST) and write it at the same offset of
+    local_path until end. A range ending before the end of the file closes the data
+    connection early; the server's 426/451 reply to that is expected.
+    """
+    remaining = end - start
+    connection = _transfer_socket(ftp, f"RETR {remote_path}", start, buffer_size)
+    with connection, open(local_path, "r+b") as f:
+        f.seek(start)
+        while remaining > 0:
+            data = connection.recv(min(buffer_size, remaining))
+            if not data:
+                break
+            f.write(data)
+            remaining -= len(data)
+    try:
+        ftp.voidresp()
+    except ftplib.error_temp:
+        if remaining:
+            raise
+    if remaining:
+        raise ftplib.error_temp(f"451 Short read of {remote_path}: {remaining} bytes missing")
+
+
+# Upload bytes [start, end) of a local file to the same range of a remote file
+def upload_range(ftp, local_path, remote_path, start, end, buffer_size=FTP_BUFFER_SIZE):
+    """
+    STOR a byte range of a local file at offset start (REST) of the remote file. A
+    STOR at offset 0 creates or truncates the remote file.
+    """
+    remaining = end - start
+    connection = _transfer_socket(ftp, f"STOR {remote_path}", start, buffer_size)
+    with connection, open(local_path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            data = f.read(min(buffer_size, remaining))
+            if not data:
+                break
+            connection.sendall(data)
+            remaining -= len(data)
+    ftp.voidresp()
+
+
+# Split a file size into chunk ranges
+def chunk_ranges(size, chunk_size=FTP_CHUNK_SIZE):
+    return [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)] or [(0, 0)]
+
+
+class _Transfer:
+    """
+    Progress of one file: its chunks and which of them are done, persisted in a
+    JSON state file so an interrupted transfer resumes with the missing chunks.
+    """
+
+    def __init__(self, direction, local_path, remote_path, size, state_path, fingerprint, chunk_size):
+        self.direction = direction
+        self.local_path = local_path
+        self.remote_path = remote_path
+        self.size = size
+        self.state_path = state_path
+        self.fingerprint = fingerprint
+        self.chunk_size = chunk_size
+        self.chunks = chunk_ranges(size, chunk_size)
+        self.done = set()
+        self.lock = threading.Lock()
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            if state.get("fingerprint") == fingerprint and state.get("chunk_size") == chunk_size:
+                self.done = set(state["done"])
+
+    def pending(self):
+        return [index for index in range(len(self.chunks)) if index not in self.done]
+
+    def mark_done(self, index):
+        with self.lock:
+            self.done.add(index)
+            if len(self.chunks) == 1:
+                return True
+            state = {"fingerprint": self.fingerprint, "chunk_size": self.chunk_size, "done": sorted(self.done)}
+            tmp_path = f"{self.state_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+            return len(self.done) == len(self.chunks)
+
+
+class FTPTransferEngine:
+    """
+    Parallel FTP transfers over an FTPConnectionPool:
+
+    - many files are transferred at once, one connection each;
+    - files larger than chunk_size are split into byte ranges transferred in
+      parallel with REST offsets, so one large dump also uses every connection
+      (uploads fall back to sending ranges in order when the server refuses a
+      REST offset past the end of the remote file);
+    - completed chunks are recorded, so a transfer interrupted by an error or a
+      crash resumes with the missing chunks only, and failed chunks are retried
+      on a fresh connection up to retries times.
+
+    Downloads are written to <local>.part (progress in <local>.part.json) and
+    renamed when complete. Upload progress is kept under FTP_STATE_DIR.
+    """
+
+    def __init__(self, pool, chunk_size=FTP_CHUNK_SIZE, buffer_size=FTP_BUFFER_SIZE, retries=RETRY_ATTEMPTS,
+                 state_dir=FTP_STATE_DIR):
+        self.pool = pool
+        self.chunk_size = chunk_size
+        self.buffer_size = buffer_size
+        self.retries = retries
+        self.state_dir = state_dir
+        self.stats = {"files": 0, "chunks": 0, "bytes": 0, "retries": 0, "resumed_chunks": 0}
+        self.stats_lock = threading.Lock()
+
+    def _count(self, **increments):
+        with self.stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def _with_retries(self, function, *args):
+        for attempt in range(1, self.retries + 1):
+            try:
+                with self.pool.connection() as ftp:
+                    return function(ftp, *args)
+            except ftplib.error_perm:
+                raise
+            except ftplib.all_errors as e:
+                if attempt == self.retries:
+                    raise
+                logging.warning(f"FTP transfer failed ({e}), retrying ({attempt}/{self.retries})...")
+                self._count(retries=1)
+                time.sleep(RETRY_DELAY * (attempt - 1))
+
+    def _remote_size(self, remote_path):
+        return self._with_retries(lambda ftp: ftp.size(remote_path))
+
+    def _remote_stat(self, remote_path):
+        # Size and MDTM modify time (None when the server has no MDTM)
+        def stat(ftp):
+            size = ftp.size(remote_path)
+            try:
+                modify = ftp.voidcmd(f"MDTM {remote_path}").split()[-1]
+            except ftplib.error_perm:
+                modify = None
+            return size, modify
+
+        return self._with_retries(stat)
+
+    def _prepare_download(self, remote_path, local_path, size=None, modify=None):
+        if size is None or modify is None:
+            size, modify = self._remote_stat(remote_path)
+        part_path = local_path + PARTIAL_SUFFIX
+        # A file replaced by another one of the same size must not resume with old chunks
+        transfer = _Transfer("download", local_path, remote_path, size, part_path + ".json",
+                             f"{remote_path}:{size}:{modify}", self.chunk_size)
+        if not transfer.done or not os.path.exists(part_path):
+            transfer.done = set()
+            os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+            with open(part_path, "wb") as f:
+                f.truncate(size)
+        return transfer
+
+    def _prepare_upload(self, local_path, remote_path):
+        stat = os.stat(local_path)
+        fingerprint = f"{self.pool.host}:{self.pool.port}:{remote_path}:{stat.st_size}:{stat.st_mtime_ns}"
+        os.makedirs(self.state_dir, exist_ok=True)
+        state_path = os.path.join(self.state_dir, hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32] + ".json")
+        return _Transfer("upload", local_path, remote_path, stat.st_size, state_path, fingerprint, self.chunk_size)
+
+    def _run_chunk(self, transfer, index):
+        start, end = transfer.chunks[index]
+        if transfer.direction == "download":
+            self._with_retries(download_range, transfer.remote_path, transfer.local_path + PARTIAL_SUFFIX,
+                               start, end, self.buffer_size)
+        else:
+            self._with_retries(upload_range, transfer.local_path, transfer.remote_path, start, end, self.buffer_size)
+        self._count(chunks=1, bytes=end - start)
+        if transfer.mark_done(index):
+            self._finish(transfer)
+
+    def _finish(self, transfer):
+        if transfer.direction == "download":
+            os.replace(transfer.local_path + PARTIAL_SUFFIX, transfer.local_path)
+        else:
+            remote_size = self._remote_size(transfer.remote_path)
+            if remote_size != transfer.size:
+                raise ftplib.error_temp(f"451 {transfer.remote_path} has {remote_size} bytes, "
+                                        f"expected {transfer.size}")
+        if os.path.exists(transfer.state_path):
+            os.remove(transfer.state_path)
+        self._count(files=1)
+        logging.info(f"{transfer.direction.capitalize()}ed {transfer.remote_path} ({transfer.size} bytes).")
+
+    def _run(self, transfers):
+        failed = {}
+        in_order = []  # uploads to servers that refuse REST past the end of the remote file
+        for transfer in transfers:
+            self._count(resumed_chunks=len(transfer.chunks) - len(transfer.pending()))
+
+        def run(transfer, index, sequential=False):
+            if transfer.remote_path in failed:
+                return
+            try:
+                self._run_chunk(transfer, index)
+            except ftplib.error_perm as e:
+                if transfer.direction == "upload" and index and not sequential:
+                    if transfer not in in_order:
+                        logging.info(f"Server refused a ranged upload of {transfer.remote_path} ({e}), "
+                                     f"uploading its remaining chunks in order.")
+                        in_order.append(transfer)
+                    return
+                failed[transfer.remote_path] = e
+                logging.error(f"Error transferring {transfer.remote_path}: {e}")
+            except ftplib.all_errors as e:
+                failed[transfer.remote_path] = e
+                logging.error(f"Error transferring {transfer.remote_path}: {e}")
+
+        def run_in_order(transfer):
+            for index in transfer.pending():
+                run(transfer, index, sequential=True)
+
+        with ThreadPoolExecutor(max_workers=self.pool.size, thread_name_prefix="ftp-transfer") as executor:
+            # A STOR at offset 0 truncates the remote file, so the first chunk of an
+            # upload is sent before its other chunks
+            list(executor.map(lambda transfer: run(transfer, 0),
+                              [transfer for transfer in transfers
+                               if transfer.direction == "upload" and 0 in transfer.pending()]))
+            list(executor.map(lambda item: run(*item),
+                              [(transfer, index) for transfer in transfers for index in transfer.pending()]))
+            list(executor.map(run_in_order, in_order))
+        return failed
+
+    def download(self, files):
+        """
+        Download (remote path, local path[, size, modify time]) tuples in parallel
+        and return a dict of remote path -> error for the files that failed (empty
+        when all succeeded). Sizes and modify times that are not given are queried
+        with SIZE and MDTM; both identify the remote file when resuming.
+        """
+        failed = {}
+
+        def prepare(file):
+            try:
+                return self._prepare_download(*file)
+            except ftplib.all_errors as e:
+                logging.error(f"Error preparing download of {file[0]}: {e}")
+                failed[file[0]] = e
+
+        with ThreadPoolExecutor(max_workers=self.pool.size, thread_name_prefix="ftp-prepare") as executor:
+            transfers = [transfer for transfer in executor.map(prepare, files) if transfer is not None]
+        failed.update(self._run(transfers))
+        return failed
+
+    def upload(self, files):
+        """
+        Upload (local path, remote path) pairs in parallel and return a dict of
+        remote path -> error for the files that failed (empty when all succeeded).
+        """
+        return self._run([self._prepare_upload(local_path, remote_path) for local_path, remote_path in files])
+
+
+# Download one or more files over parallel connections
+def parallel_download(host, user, password, files, port=21, pool_size=FTP_POOL_SIZE, **engine_options):
+    """
+    Download (remote path, local path) pairs over pool_size connections, resuming
+    interrupted downloads. Returns the engine stats and the failed files.
+    """
+    with FTPConnectionPool(host, user, password, port=port, size=pool_size) as pool:
+        engine = FTPTransferEngine(pool, **engine_options)
+        failed = engine.download(files)
+    return engine.stats, failed
+
+
+# Upload one or more files over parallel connections
+def parallel_upload(host, user, password, files, port=21, pool_size=FTP_POOL_SIZE, **engine_options):
+    """
+    Upload (local path, remote path) pairs over pool_size connections, resuming
+    interrupted uploads. Returns the engine stats and the failed files.
+    """
+    with FTPConnectionPool(host, user, password, port=port, size=pool_size) as pool:
+        engine = FTPTransferEngine(pool, **engine_options)
+        failed = engine.upload(files)
+    return engine.stats, failed
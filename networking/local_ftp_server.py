@@ -0,0 +1,274 @@
+import logging
+import os
+import posixpath
+import socket
+import socketserver
+import threading
+import time
+
+from config.settings import DEFAULT_HOST
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_FTP_USER = "user"
+DEFAULT_FTP_PASSWORD = "password"
+SERVER_BLOCK_SIZE = 64 * 1024
+
+
+# Format a file modification time as an FTP timestamp
+def _ftp_time(mtime):
+    return time.strftime("%Y%m%d%H%M%S", time.gmtime(mtime))
+
+
+class LocalFTPHandler(socketserver.StreamRequestHandler):
+    """
+    One FTP control connection. Supports passive mode and the commands the transfer
+    and sync modules use: RETR/STOR/APPE with REST offsets, SIZE, MDTM, MLSD, MKD,
+    RMD, DELE, RNFR/RNTO, CWD and PWD. Binary transfers only.
+    """
+
+    def setup(self):
+        super().setup()
+        # Replies are small writes; without this they wait on delayed ACKs (~40 ms each)
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.cwd = "/"
+        self.user = None
+        self.logged_in = False
+        self.rest = 0
+        self.passive = None
+        self.rename_from = None
+
+    def reply(self, code, text):
+        self.wfile.write(f"{code} {text}\r\n".encode("utf-8"))
+
+    def handle(self):
+        self.reply(220, "Local FTP server ready.")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            command, _, argument = line.decode("utf-8").rstrip("\r\n").partition(" ")
+            command = command.upper()
+            method = getattr(self, f"ftp_{command}", None)
+            if method is None:
+                self.reply(502, f"Command {command} not implemented.")
+            elif not self.logged_in and command not in ("USER", "PASS", "QUIT", "FEAT"):
+                self.reply(530, "Please log in with USER and PASS.")
+            else:
+                try:
+                    if method(argument) is False:
+                        break
+                except (FileNotFoundError, NotADirectoryError, IsADirectoryError, PermissionError) as e:
+                    self.reply(550, str(e.strerror or e))
+                except (BrokenPipeError, ConnectionResetError):
+                    self.reply(426, "Connection closed; transfer aborted.")
+        if self.passive is not None:
+            self.passive.close()
+
+    def _resolve(self, path):
+        virtual = posixpath.normpath(posixpath.join(self.cwd, path or "."))
+        if not virtual.startswith("/"):
+            virtual = "/" + virtual
+        return virtual, os.path.join(self.server.root, virtual.lstrip("/"))
+
+    def _data_connection(self):
+        if self.passive is None:
+            self.reply(425, "Use PASV first.")
+            return None
+        self.passive.settimeout(10)
+        connection, _ = self.passive.accept()
+        self.passive.close()
+        self.passive = None
+        return connection
+
+    def _send(self, connection, stream):
+        rate = self.server.rate_limit
+        started = time.monotonic()
+        sent = 0
+        while True:
+            data = stream.read(SERVER_BLOCK_SIZE)
+            if not data:
+                break
+            connection.sendall(data)
+            sent += len(data)
+            if rate:
+                delay = sent / rate - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+    def _receive(self, connection, stream):
+        rate = self.server.rate_limit
+        started = time.monotonic()
+        received = 0
+        while True:
+            data = connection.recv(SERVER_BLOCK_SIZE)
+            if not data:
+                break
+            stream.write(data)
+            received += len(data)
+            if rate:
+                delay = received / rate - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+    def ftp_USER(self, argument):
+        self.user = argument
+        self.reply(331, "Password required.")
+
+    def ftp_PASS(self, argument):
+        if self.user == self.server.user and argument == self.server.password:
+            self.logged_in = True
+            self.reply(230, "Login successful.")
+        else:
+            self.reply(530, "Login incorrect.")
+
+    def ftp_QUIT(self, argument):
+        self.reply(221, "Goodbye.")
+        return False
+
+    def ftp_FEAT(self, argument):
+        self.wfile.write(b"211-Features:\r\n MLST type*;size*;modify*;\r\n REST STREAM\r\n SIZE\r\n MDTM\r\n211 End\r\n")
+
+    def ftp_SYST(self, argument):
+        self.reply(215, "UNIX Type: L8")
+
+    def ftp_NOOP(self, argument):
+        self.reply(200, "NOOP ok.")
+
+    def ftp_TYPE(self, argument):
+        self.reply(200, f"Type set to {argument}.")
+
+    def ftp_OPTS(self, argument):
+        self.reply(200, "OK.")
+
+    def ftp_PWD(self, argument):
+        self.reply(257, f'"{self.cwd}" is the current directory.')
+
+    def ftp_CWD(self, argument):
+        virtual, path = self._resolve(argument)
+        if not os.path.isdir(path):
+            raise NotADirectoryError(f"{virtual}: not a directory")
+        self.cwd = virtual
+        self.reply(250, f"Directory changed to {virtual}.")
+
+    def ftp_PASV(self, argument):
+        if self.passive is not None:
+            self.passive.close()
+        self.passive = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.passive.bind((self.server.server_address[0], 0))
+        self.passive.listen(1)
+        host, port = self.passive.getsockname()
+        self.reply(227, f"Entering Passive Mode ({host.replace('.', ',')},{port >> 8},{port & 0xFF}).")
+
+    def ftp_REST(self, argument):
+        self.rest = int(argument)
+        self.reply(350, f"Restarting at {self.rest}.")
+
+    def ftp_SIZE(self, argument):
+        self.reply(213, str(os.path.getsize(self._resolve(argument)[1])))
+
+    def ftp_MDTM(self, argument):
+        self.reply(213, _ftp_time(os.path.getmtime(self._resolve(argument)[1])))
+
+    def ftp_RETR(self, argument):
+        rest, self.rest = self.rest, 0
+        with open(self._resolve(argument)[1], "rb") as f:
+            f.seek(rest)
+            connection = self._data_connection()
+            if connection is None:
+                return
+            self.reply(150, "Opening binary mode data connection.")
+            with connection:
+                self._send(connection, f)
+        self.reply(226, "Transfer complete.")
+
+    def _store(self, argument, append):
+        rest, self.rest = self.rest, 0
+        path = self._resolve(argument)[1]
+        mode = "ab" if append else ("r+b" if rest and os.path.exists(path) else "wb")
+        with open(path, mode) as f:
+            if rest and not append:
+                f.seek(rest)
+            connection = self._data_connection()
+            if connection is None:
+                return
+            self.reply(150, "Ok to send data.")
+            with connection:
+                self._receive(connection, f)
+        self.reply(226, "Transfer complete.")
+
+    def ftp_STOR(self, argument):
+        self._store(argument, append=False)
+
+    def ftp_APPE(self, argument):
+        self._store(argument, append=True)
+
+    def ftp_MLSD(self, argument):
+        path = self._resolve(argument)[1]
+        lines = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                stat = entry.stat()
+                kind = "dir" if entry.is_dir() else "file"
+                lines.append(f"type={kind};size={stat.st_size};modify={_ftp_time(stat.st_mtime)}; {entry.name}\r\n")
+        connection = self._data_connection()
+        if connection is None:
+            return
+        self.reply(150, "Here comes the directory listing.")
+        with connection:
+            connection.sendall("".join(lines).encode("utf-8"))
+        self.reply(226, "Directory send OK.")
+
+    def ftp_MKD(self, argument):
+        virtual, path = self._resolve(argument)
+        os.mkdir(path)
+        self.reply(257, f'"{virtual}" created.')
+
+    def ftp_RMD(self, argument):
+        os.rmdir(self._resolve(argument)[1])
+        self.reply(250, "Directory removed.")
+
+    def ftp_DELE(self, argument):
+        os.remove(self._resolve(argument)[1])
+        self.reply(250, "File deleted.")
+
+    def ftp_RNFR(self, argument):
+        path = self._resolve(argument)[1]
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{argument}: no such file")
+        self.rename_from = path
+        self.reply(350, "Ready for RNTO.")
+
+    def ftp_RNTO(self, argument):
+        if self.rename_from is None:
+            self.reply(503, "RNFR required first.")
+            return
+        os.replace(self.rename_from, self._resolve(argument)[1])
+        self.rename_from = None
+        self.reply(250, "Rename successful.")
+
+
+class LocalFTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+# Start a local FTP server over a directory
+def start_local_ftp_server(root, user=DEFAULT_FTP_USER, password=DEFAULT_FTP_PASSWORD, host=DEFAULT_HOST, port=0,
+                           rate_limit=None):
+    """
+    Serve root over FTP on host:port (port 0 picks a free port) for testing the
+    transfer and sync modules, and return the server (port in server.port). rate_limit
+    caps each data connection at that many bytes per second, like a remote link.
+    Call server.shutdown() to stop it.
+    """
+    server = LocalFTPServer((host, port), LocalFTPHandler)
+    server.root = os.path.abspath(root)
+    server.user = user
+    server.password = password
+    server.rate_limit = rate_limit
+    server.port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, name="local-ftp-server", daemon=True).start()
+    logging.info(f"Local FTP server for {server.root} listening on {host}:{server.port}.")
+    return server
@@ -1,17 +1,372 @@
+import pandas as pd
+import numpy as np
+import argparse
+import asyncio
+import errno
+import ipaddress
+import logging
+import math
 import os
+import socket
+import struct
+import sys
 import time
-import subprocess
 
-def ping(host):
-    result = subprocess.run(["ping", "-c", "1", host], stdout=subprocess.PIPE, text=True)
-    if result.returncode == 0:
-        return result.stdout.split("time=")[-1].split(" ")[0]
-    else:
+# Make the repository root importable when run as a script, not only with python -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import MAX_CONNECTIONS, MONITOR_INTERVAL
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_PROBE_PORT = 80
+PROBE_TIMEOUT = 2.0  # seconds before a probe counts as lost
+PROBE_SPREAD = 0.5  # fraction of the interval over which a cycle's probes are started
+# Log-spaced histogram buckets: 10 us to 60 s, each 5% wider than the previous one
+HISTOGRAM_MIN_MS = 0.01
+HISTOGRAM_MAX_MS = 60000.0
+HISTOGRAM_GROWTH = 1.05
+HISTOGRAM_BUCKETS = int(math.ceil(math.log(HISTOGRAM_MAX_MS / HISTOGRAM_MIN_MS) / math.log(HISTOGRAM_GROWTH))) + 1
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+
+class LatencyHistogram:
+    """
+    Latency distribution of one host in fixed memory: counts per log-spaced bucket
+    (HISTOGRAM_BUCKETS of them, ~2.5 KB) plus failures, min, max and sum.
+    Percentiles are exact to within one bucket, i.e. about 5%.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(HISTOGRAM_BUCKETS, dtype=np.int64)
+        self.samples = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+        self.last_ms = None
+
+    def record(self, latency_ms):
+        if latency_ms is None:
+            self.failures += 1
+            self.last_ms = None
+            return
+        index = int(math.log(max(latency_ms, HISTOGRAM_MIN_MS) / HISTOGRAM_MIN_MS) / math.log(HISTOGRAM_GROWTH))
+        self.counts[min(index, HISTOGRAM_BUCKETS - 1)] += 1
+        self.samples += 1
+        self.total_ms += latency_ms
+        self.min_ms = min(self.min_ms, latency_ms)
+        self.max_ms = max(self.max_ms, latency_ms)
+        self.last_ms = latency_ms
+
+    def percentile(self, q):
+        """
+        Return the q-th percentile latency in ms (upper edge of its bucket, capped at
+        the largest sample), or None without samples.
+        """
+        if not self.samples:
+            return None
+        index = int(np.searchsorted(np.cumsum(self.counts), math.ceil(q / 100 * self.samples)))
+        return min(HISTOGRAM_MIN_MS * HISTOGRAM_GROWTH ** (index + 1), self.max_ms)
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        probes = self.samples + self.failures
+        summary = {
+            "samples": self.samples,
+            "failures": self.failures,
+            "loss": self.failures / probes if probes else 0.0,
+            "min_ms": self.min_ms if self.samples else None,
+            "mean_ms": self.total_ms / self.samples if self.samples else None,
+            "max_ms": self.max_ms if self.samples else None,
+            "last_ms": self.last_ms,
+        }
+        for q in percentiles:
+            summary[f"p{q}_ms"] = self.percentile(q)
+        return summary
+
+
+# Time a TCP handshake
+async def tcp_connect_latency(host, port, timeout=PROBE_TIMEOUT):
+    """
+    Return the time in ms to open a TCP connection to host:port, or None if it was
+    refused, failed or timed out. Only the handshake is timed: the clock starts at
+    the non-blocking connect() and stops when the loop reports the socket writable,
+    so name resolution and time spent waiting behind other probes do not count.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        address = (str(ipaddress.ip_address(host)), port)
+        family = socket.AF_INET6 if ":" in address[0] else socket.AF_INET
+    except ValueError:
+        try:
+            infos = await asyncio.wait_for(loop.getaddrinfo(host, port, type=socket.SOCK_STREAM), timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        family, _, _, _, address = infos[0]
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    connected = loop.create_future()
+
+    def on_writable():
+        if not connected.done():
+            connected.set_result(time.perf_counter())
+
+    try:
+        started = time.perf_counter()
+        error = sock.connect_ex(address)
+        if error == 0:
+            return (time.perf_counter() - started) * 1000
+        if error not in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+            return None
+        loop.add_writer(sock.fileno(), on_writable)
+        try:
+            finished = await asyncio.wait_for(connected, timeout)
+        finally:
+            loop.remove_writer(sock.fileno())
+        if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+            return None
+        return (finished - started) * 1000
+    except (OSError, asyncio.TimeoutError):
         return None
+    finally:
+        sock.close()
+
+
+# Compute the Internet checksum of an ICMP packet
+def _icmp_checksum(data):
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+class ICMPProber:
+    """
+    ICMP echo over one socket shared by all probes: an unprivileged datagram ICMP
+    socket where the kernel allows it (net.ipv4.ping_group_range), otherwise a raw
+    socket (root only). Replies are matched to waiting probes by address and
+    sequence number, so hundreds of hosts can be pinged at once.
+    """
+
+    def __init__(self):
+        try:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+            self.raw = False
+        except PermissionError:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+            self.raw = True
+        self.sock.setblocking(False)
+        self.identifier = os.getpid() & 0xFFFF
+        self.sequence = 0
+        self.waiters = {}
+        self.loop = asyncio.get_running_loop()
+        self.loop.add_reader(self.sock.fileno(), self._on_readable)
+
+    def close(self):
+        self.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+
+    def _on_readable(self):
+        while True:
+            try:
+                data, (address, _) = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            received = time.perf_counter()
+            if self.raw:
+                data = data[(data[0] & 0x0F) * 4:]  # strip the IP header
+            if len(data) < 8:
+                continue
+            kind, _, _, identifier, sequence = struct.unpack("!BBHHH", data[:8])
+            # Datagram sockets get the kernel's identifier; raw ones see every reply
+            if kind != ICMP_ECHO_REPLY or (self.raw and identifier != self.identifier):
+                continue
+            waiter = self.waiters.pop((address, sequence), None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(received)
+
+    async def probe(self, address, timeout=PROBE_TIMEOUT):
+        """
+        Return the echo round-trip time to an IPv4 address in ms, or None.
+        """
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        sequence = self.sequence
+        payload = struct.pack("!d", time.time())
+        header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, self.identifier, sequence)
+        packet = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, _icmp_checksum(header + payload),
+                             self.identifier, sequence) + payload
+        waiter = self.loop.create_future()
+        self.waiters[(address, sequence)] = waiter
+        started = time.perf_counter()
+        try:
+            self.sock.sendto(packet, (address, 0))
+            received = await asyncio.wait_for(waiter, timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        finally:
+            self.waiters.pop((address, sequence), None)
+        return (received - started) * 1000
+
+
+# Parse "host", "host:port" or (host, port) targets
+def parse_target(target, default_port=DEFAULT_PROBE_PORT):
+    if isinstance(target, tuple):
+        return target[0], int(target[1])
+    host, _, port = target.rpartition(":") if target.count(":") == 1 else (target, "", "")
+    return (host, int(port)) if port else (target, default_port)
+
+
+class LatencyMonitor:
+    """
+    Probe many hosts concurrently every interval seconds (MONITOR_INTERVAL by
+    default) with TCP connect timing or ICMP echo, and keep a LatencyHistogram per
+    host. The probes of one cycle are started evenly over the first PROBE_SPREAD of
+    the interval (at most concurrency in flight), so few of them share the event
+    loop at once and their timings are not inflated by queueing; the monitor then
+    sleeps until the next cycle instead of polling.
+    """
+
+    def __init__(self, targets, interval=MONITOR_INTERVAL, timeout=PROBE_TIMEOUT, method="tcp",
+                 concurrency=MAX_CONNECTIONS, default_port=DEFAULT_PROBE_PORT):
+        if method not in ("tcp", "icmp"):
+            raise ValueError("method must be 'tcp' or 'icmp'")
+        self.targets = [parse_target(target, default_port) for target in targets]
+        self.interval = interval
+        self.timeout = timeout
+        self.method = method
+        self.concurrency = concurrency
+        self.histograms = {self._name(host, port): LatencyHistogram() for host, port in self.targets}
+        self.addresses = {}
+        self.cycles = 0
+
+    def _name(self, host, port):
+        return host if self.method == "icmp" else f"{host}:{port}"
+
+    async def _resolve(self, host):
+        # Resolve once so DNS lookups are not timed as latency
+        if host not in self.addresses:
+            try:
+                infos = await asyncio.get_running_loop().getaddrinfo(host, None, family=socket.AF_INET,
+                                                                     type=socket.SOCK_STREAM)
+                self.addresses[host] = infos[0][4][0]
+            except OSError as e:
+                logging.error(f"Cannot resolve {host}: {e}")
+                return None
+        return self.addresses[host]
+
+    async def probe_once(self, prober=None, spread=0.0):
+        """
+        Probe every target once, starting the probes evenly over spread seconds, and
+        record the results.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        step = spread / len(self.targets) if self.targets else 0.0
+
+        async def probe(index, host, port):
+            if index and step:
+                await asyncio.sleep(index * step)
+            async with semaphore:
+                address = await self._resolve(host)
+                if address is None:
+                    latency_ms = None
+                elif self.method == "icmp":
+                    latency_ms = await prober.probe(address, self.timeout)
+                else:
+                    latency_ms = await tcp_connect_latency(address, port, self.timeout)
+            self.histograms[self._name(host, port)].record(latency_ms)
+            return latency_ms
+
+        results = await asyncio.gather(*(probe(index, host, port) for index, (host, port) in enumerate(self.targets)))
+        self.cycles += 1
+        return results
+
+    async def run(self, cycles=None, export_path=None):
+        """
+        Probe all targets every interval seconds, for cycles cycles (forever when
+        None), logging a summary per cycle and, if export_path is given, writing the
+        percentiles there as CSV after each cycle.
+        """
+        loop = asyncio.get_running_loop()
+        prober = ICMPProber() if self.method == "icmp" else None
+        next_cycle = loop.time()
+        done = 0
+        try:
+            while cycles is None or done < cycles:
+                started = loop.time()
+                results = await self.probe_once(prober, self.interval * PROBE_SPREAD)
+                done += 1
+                reachable = [latency for latency in results if latency is not None]
+                logging.info(f"Probed {len(results)} hosts in {loop.time() - started:.2f}s: "
+                             f"{len(reachable)} reachable"
+                             + (f", median {np.median(reachable):.2f} ms" if reachable else ""))
+                if export_path:
+                    self.export(export_path)
+                if cycles is not None and done >= cycles:
+                    break
+                # Keep a fixed schedule; skip missed cycles instead of bursting to catch up
+                next_cycle = max(next_cycle + self.interval, loop.time())
+                await asyncio.sleep(next_cycle - loop.time())
+        finally:
+            if prober is not None:
+                prober.close()
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """
+        Return a DataFrame with one row per target: samples, failures, loss, min,
+        mean, max, last and the requested latency percentiles (ms).
+        """
+        return pd.DataFrame.from_dict({name: histogram.summary(percentiles)
+                                       for name, histogram in self.histograms.items()}, orient="index")
+
+    def export(self, path, percentiles=DEFAULT_PERCENTILES):
+        frame = self.percentiles(percentiles)
+        tmp_path = f"{path}.tmp"
+        frame.to_csv(tmp_path, index_label="target")
+        os.replace(tmp_path, path)
+        return frame
+
+
+# Measure latency to a host once
+def ping(host, port=DEFAULT_PROBE_PORT, timeout=PROBE_TIMEOUT):
+    """
+    Return the TCP connect latency to host:port in ms, or None if unreachable.
+    """
+    return asyncio.run(tcp_connect_latency(host, port, timeout))
+
+
+# Monitor latency to one or more hosts
+def monitor_network(hosts, interval=MONITOR_INTERVAL, port=DEFAULT_PROBE_PORT, method="tcp", export_path=None):
+    """
+    Monitor hosts ("host", "host:port" or a list of them) every interval seconds
+    until interrupted, then log their latency percentiles. Returns the monitor.
+    """
+    hosts = [hosts] if isinstance(hosts, str) else list(hosts)
+    monitor = LatencyMonitor(hosts, interval=interval, method=method, default_port=port)
+    logging.info(f"Monitoring network latency to {len(hosts)} hosts every {interval} seconds...")
+    try:
+        asyncio.run(monitor.run(export_path=export_path))
+    except KeyboardInterrupt:
+        pass
+    logging.info(f"Latency percentiles:\n{monitor.percentiles().to_string()}")
+    return monitor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor latency to many hosts.")
+    parser.add_argument("hosts", nargs="+", help="host or host:port")
+    parser.add_argument("--port", type=int, default=DEFAULT_PROBE_PORT, help="port for hosts given without one")
+    parser.add_argument("--interval", type=float, default=MONITOR_INTERVAL)
+    parser.add_argument("--icmp", action="store_true", help="ICMP echo instead of TCP connect timing")
+    parser.add_argument("--export", help="CSV file to write percentiles to after each cycle")
+    args = parser.parse_args()
+    monitor_network(args.hosts, interval=args.interval, port=args.port, method="icmp" if args.icmp else "tcp",
+                    export_path=args.export)
+
 
-def monitor_network(host, interval=5):
-    print(f"Monitoring network latency to {host} every {interval} seconds...")
-    while True:
-        latency = ping(host)
-        if latency:
-            print(f"Ping to {host}: {latency} ms")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
+
+# Make the repository root importable when run as a script, not only with python -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.learning_model import load_data, preprocess_data_sparse, build_model, train_model, evaluate_model
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Search data attached by each worker process (see _attach_search_data)
+_SEARCH_DATA = None
+
+
+# Copy arrays into shared memory blocks
+def _share_arrays(arrays):
+    """
+    Copy each array into its own SharedMemory block and return (handles, spec),
+    where spec lets other processes map the same memory without copying.
+    """
+    handles, spec = [], {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        handles.append(shm)
+        spec[name] = (shm.name, array.shape, array.dtype.str)
+    return handles, spec
+
+
+# Process pool initializer: map the shared fold data once per worker
+def _attach_search_data(spec, sparse_shape):
+    """
+    Attach to the shared arrays and rebuild X (dense or CSR), y, fold ids and row order.
+    """
+    global _SEARCH_DATA
+    handles, arrays = [], {}
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        handles.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    if sparse_shape is not None:
+        X = sp.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=sparse_shape, copy=False)
+    else:
+        X = arrays["X"]
+    _SEARCH_DATA = {"handles": handles, "X": X, "y": arrays["y"],
+                    "folds": arrays["folds"], "order": arrays["order"]}
+
+
+# Fit and score one candidate on one fold with a limited training budget
+def _evaluate_candidate(candidate_index, params, fold, budget):
+    """
+    Train on the first `budget` rows (in a fixed shuffled order) of the fold's
+    training part, plus the first row of any class those rows miss, and score
+    accuracy on the fold's validation part. A fit that fails scores NaN, which
+    prunes the candidate instead of aborting the search.
+    """
+    data = _SEARCH_DATA
+    order, folds, y = data["order"], data["folds"], data["y"]
+    train_part = order[folds[order] != fold]
+    train_idx = train_part[:budget]
+    # Small budgets can miss a class entirely, which most solvers reject
+    missing = np.setdiff1d(np.unique(y[train_part]), y[train_idx])
+    if missing.size:
+        train_idx = np.concatenate([train_idx, [train_part[np.argmax(y[train_part] == c)] for c in missing]])
+    valid_idx = np.nonzero(folds == fold)[0]
+
+    started = time.perf_counter()
+    model = build_model(params)
+    try:
+        model.fit(data["X"][train_idx], y[train_idx])
+    except ValueError as e:
+        logging.warning(f"Candidate {params} failed on fold {fold} with {len(train_idx)} rows: {e}")
+        return candidate_index, fold, float("nan"), time.perf_counter() - started
+    fit_seconds = time.perf_counter() - started
+    score = accuracy_score(y[valid_idx], model.predict(data["X"][valid_idx]))
+    return candidate_index, fold, score, fit_seconds
+
+
+# Successive halving search over Logistic Regression hyperparameters
+def successive_halving_search(X, y, param_grid, n_splits=5, min_resources=None, factor=3,
+                              max_workers=None, random_state=42):
+    """
+    Search param_grid with successive halving. X (dense or CSR) and y are split into
+    stratified CV folds once and shared with the worker processes through shared
+    memory. Every rung evaluates all surviving candidates on all folds in parallel
+    with a training budget of `min_resources * factor**rung` rows, and keeps the
+    best 1/factor of them. Returns (best_params, per-rung results DataFrame).
+    """
+    candidates = list(ParameterGrid(param_grid))
+    n_rows = X.shape[0]
+    # Share integer class codes: object labels would be copied as PyObject pointers,
+    # which are meaningless in processes that were not forked from this one
+    classes, y = np.unique(np.asarray(y), return_inverse=True)
+    folds = np.empty(n_rows, dtype=np.int32)
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    for fold, (_, valid_idx) in enumerate(splitter.split(np.zeros(n_rows), y)):
+        folds[valid_idx] = fold
+    order = np.random.default_rng(random_state).permutation(n_rows)
+
+    max_train_rows = n_rows - n_rows // n_splits
+    n_rungs = max(1, math.ceil(math.log(len(candidates), factor)) + 1)
+    if min_resources is None:
+        min_resources = max(max_train_rows // factor ** (n_rungs - 1), 1)
+    logging.info(f"Successive halving over {len(candidates)} candidates ({len(classes)} classes), {n_splits} folds, "
+                 f"{n_rungs} rungs starting at {min_resources} rows...")
+
+    if sp.issparse(X):
+        X = sp.csr_matrix(X)
+        arrays = {"data": X.data, "indices": X.indices, "indptr": X.indptr}
+        sparse_shape = X.shape
+    else:
+        arrays = {"X": np.asarray(X)}
+        sparse_shape = None
+    arrays.update({"y": y, "folds": folds, "order": order})
+    handles, spec = _share_arrays(arrays)
+
+    results = []
+    survivors = list(range(len(candidates)))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                 initializer=_attach_search_data, initargs=(spec, sparse_shape)) as executor:
+            for rung in range(n_rungs):
+                budget = min(min_resources * factor ** rung, max_train_rows)
+                futures = [
+                    executor.submit(_evaluate_candidate, c, candidates[c], fold, budget)
+                    for c in survivors for fold in range(n_splits)
+                ]
+                scores = {c: [] for c in survivors}
+                costs = {c: 0.0 for c in survivors}
+                for future in futures:
+                    c, _, score, fit_seconds = future.result()
+                    scores[c].append(score)
+                    costs[c] += fit_seconds
+
+                for c in survivors:
+                    results.append({
+                        "candidate": c,
+                        "params": candidates[c],
+                        "rung": rung,
+                        "budget": budget,
+                        "mean_score": float(np.mean(scores[c])),
+                        "std_score": float(np.std(scores[c])),
+                        "fit_seconds": costs[c],
+                    })
+                # Candidates that failed on any fold (NaN) rank last
+                ranked = sorted(survivors, key=lambda c: np.nan_to_num(np.mean(scores[c]), nan=-np.inf),
+                                reverse=True)
+                logging.info(f"Rung {rung}: budget {budget} rows, {len(survivors)} candidates, "
+                             f"best mean accuracy {np.mean(scores[ranked[0]]):.4f}.")
+                if len(ranked) == 1 or budget >= max_train_rows:
+                    survivors = ranked[:1]
+                    break
+                survivors = ranked[:max(1, len(ranked) // factor)]
+    finally:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+
+    results = pd.DataFrame(results)
+    total_cost = results.groupby("candidate")["fit_seconds"].sum()
+    results["candidate_total_fit_seconds"] = results["candidate"].map(total_cost)
+    best_params = candidates[survivors[0]]
+    logging.info(f"Best parameters: {best_params}")
+    return best_params, results
+
+
+# Main function: preprocess once, search, then refit the best configuration
+def main():
+    input_file = "data/data.csv"  # Replace with your file path
+    df = load_data(input_file)
+    if df is None:
+        return
+
+    X, y, schema = preprocess_data_sparse(df, target_column="target", encoding="onehot")
+    param_grid = {
+        "C": [0.01, 0.1, 1.0, 10.0],
+        "penalty": ["l2"],
+        "solver": ["lbfgs", "saga"],
+        "class_weight": [None, "balanced"],
+    }
+    best_params, results = successive_halving_search(X, y, param_grid)
+    logging.info(f"Search results:\n{results.drop(columns='params').to_string(index=False)}")
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = train_model(X_train, y_train, best_params)
+    evaluate_model(model, X_test, y_test)
+
+
+if __name__ == "__main__":
+    main()
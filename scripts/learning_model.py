@@ -1,9 +1,22 @@
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import accuracy_score, classification_report
+import joblib
 import logging
+import os
+import sys
+
+# Make the repository root importable when run as a script, not only with python -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.model_evaluation import bootstrap_metrics
+from scripts.model_registry import ModelRegistry
+
+# Local model registry used by the entry points below
+REGISTRY_ROOT = "models/registry"
+REGISTRY_MODEL_NAME = "learning_model"
 
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -37,21 +50,32 @@ def preprocess_data(df):
     logging.info("Data preprocessing completed.")
     return df
 
+# Default Logistic Regression hyperparameters
+DEFAULT_MODEL_PARAMS = {"max_iter": 1000}
+
+# Build an unfitted Logistic Regression model
+def build_model(params=None):
+    """
+    Create a Logistic Regression model, overriding the defaults with params.
+    """
+    return LogisticRegression(**{**DEFAULT_MODEL_PARAMS, **(params or {})})
+
 # Train a Logistic Regression model
-def train_model(X_train, y_train):
+def train_model(X_train, y_train, params=None):
     """
     Train a Logistic Regression model.
     """
     logging.info("Training Logistic Regression model...")
-    model = LogisticRegression(max_iter=1000)
+    model = build_model(params)
     model.fit(X_train, y_train)
     logging.info("Model trained successfully.")
     return model
 
 # Evaluate the model
-def evaluate_model(model, X_test, y_test):
+def evaluate_model(model, X_test, y_test, n_bootstrap=0, confidence=0.95):
     """
-    Evaluate the model on the test set.
+    Evaluate the model on the test set. With n_bootstrap > 0, also compute
+    bootstrap confidence intervals of the metrics and return them as a DataFrame.
     """
     logging.info("Evaluating model...")
     y_pred = model.predict(X_test)
@@ -61,6 +85,263 @@ def evaluate_model(model, X_test, y_test):
     logging.info(f"Accuracy: {accuracy}")
     logging.info(f"Classification Report:\n{report}")
 
+    if n_bootstrap > 0:
+        y_score = None
+        if hasattr(model, "predict_proba") and len(model.classes_) == 2:
+            y_score = model.predict_proba(X_test)[:, 1]
+        intervals = bootstrap_metrics(y_test, y_pred, y_score, n_bootstrap=n_bootstrap, confidence=confidence)
+        logging.info(f"Bootstrap {confidence:.0%} confidence intervals:\n{intervals.to_string(index=False)}")
+        return intervals
+
+# Accumulate schema statistics from one chunk of data
+def _update_schema_stats(stats, chunk, target_column, collect_vocabulary):
+    """
+    Fold the numeric sums, category vocabularies and target classes of a chunk into stats.
+    """
+    stats["classes"].update(chunk[target_column].dropna().unique().tolist())
+    features = chunk.drop(columns=[target_column])
+    for col in features.select_dtypes(include=np.number).columns:
+        values = features[col].dropna().astype(np.float64)
+        stats["sums"][col] = stats["sums"].get(col, 0.0) + values.sum()
+        stats["sq_sums"][col] = stats["sq_sums"].get(col, 0.0) + (values ** 2).sum()
+        stats["counts"][col] = stats["counts"].get(col, 0) + values.size
+    for col in features.select_dtypes(exclude=np.number).columns:
+        vocabulary = stats["categories"].setdefault(col, set())
+        if collect_vocabulary:
+            vocabulary.update(features[col].dropna().astype(str).unique().tolist())
+
+
+# Turn accumulated statistics into an encoding schema
+def _finalize_schema(stats, target_column, encoding, n_features):
+    """
+    Compute means/stds and freeze the vocabularies into a schema dict.
+    """
+    categorical_columns = list(stats["categories"])
+    numeric_columns = [col for col in stats["sums"] if col not in stats["categories"]]
+    means, stds = {}, {}
+    for col in numeric_columns:
+        n = max(stats["counts"][col], 1)
+        means[col] = stats["sums"][col] / n
+        variance = max(stats["sq_sums"][col] / n - means[col] ** 2, 0.0)
+        stds[col] = float(np.sqrt(variance)) or 1.0
+
+    schema = {
+        "target_column": target_column,
+        "encoding": encoding,
+        "n_features": n_features,
+        "numeric_columns": numeric_columns,
+        "categorical_columns": categorical_columns,
+        "means": means,
+        "stds": stds,
+        "categories": {col: sorted(stats["categories"][col]) for col in categorical_columns},
+        "classes": sorted(stats["classes"]),
+    }
+    logging.info(f"Schema: {len(numeric_columns)} numeric and {len(categorical_columns)} categorical columns, "
+                 f"{len(schema['classes'])} classes, {encoding} encoding.")
+    return schema
+
+
+def _empty_schema_stats():
+    return {"sums": {}, "sq_sums": {}, "counts": {}, "categories": {}, "classes": set()}
+
+
+# Build a stable encoding schema with one streaming pass over the CSV
+def build_encoding_schema(file_path, target_column="target", chunksize=50000, encoding="dense", n_features=2 ** 20):
+    """
+    Scan the CSV in chunks and collect everything needed to encode any chunk the
+    same way: numeric means/stds, sorted category vocabularies and target classes.
+    encoding is 'dense' (get_dummies-style), 'onehot' (sparse CSR with a fixed
+    vocabulary) or 'hash' (sparse hashing trick with n_features columns).
+    """
+    logging.info(f"Building encoding schema from {file_path}...")
+    stats = _empty_schema_stats()
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        _update_schema_stats(stats, chunk, target_column, collect_vocabulary=encoding != "hash")
+    return _finalize_schema(stats, target_column, encoding, n_features)
+
+
+# Build an encoding schema from an in-memory DataFrame
+def build_encoding_schema_from_frame(df, target_column="target", encoding="onehot", n_features=2 ** 20):
+    """
+    Same as build_encoding_schema, for a DataFrame that is already loaded.
+    """
+    stats = _empty_schema_stats()
+    _update_schema_stats(stats, df, target_column, collect_vocabulary=encoding != "hash")
+    return _finalize_schema(stats, target_column, encoding, n_features)
+
+
+# Encode categorical columns as a sparse CSR block
+def encode_categoricals_sparse(chunk, schema):
+    """
+    One-hot encode the categorical columns straight into a CSR matrix, either
+    against the fixed vocabulary ('onehot') or into hashed buckets ('hash').
+    Unseen categories and missing values produce no entries.
+    """
+    row_parts, col_parts = [], []
+    if schema["encoding"] == "hash":
+        width = schema["n_features"]
+        for col in schema["categorical_columns"]:
+            # Hash each distinct value once, then broadcast the buckets to the rows
+            codes, uniques = pd.factorize(chunk[col])
+            tokens = np.asarray([f"{col}={value}" for value in uniques.astype(str)], dtype=object)
+            buckets = (pd.util.hash_array(tokens) % np.uint64(width)).astype(np.int64)
+            present = np.nonzero(codes >= 0)[0]
+            row_parts.append(present)
+            col_parts.append(buckets[codes[present]])
+        n_columns = width
+    else:
+        offset = 0
+        for col in schema["categorical_columns"]:
+            vocabulary = schema["categories"][col]
+            codes = pd.Categorical(chunk[col].astype("string"), categories=vocabulary).codes
+            present = np.nonzero(codes >= 0)[0]
+            row_parts.append(present)
+            col_parts.append(offset + codes[present].astype(np.int64))
+            offset += len(vocabulary)
+        n_columns = offset
+
+    rows = np.concatenate(row_parts) if row_parts else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(col_parts) if col_parts else np.empty(0, dtype=np.int64)
+    data = np.ones(rows.size, dtype=np.float64)
+    return sp.csr_matrix((data, (rows, cols)), shape=(len(chunk), n_columns))
+
+
+# Encode one chunk with a fixed schema
+def encode_chunk(chunk, schema):
+    """
+    Fill, scale and one-hot encode a chunk so that it always produces the same
+    columns in the same order, whatever categories the chunk happens to contain.
+    Returns a dense array for 'dense' encoding and a CSR matrix otherwise.
+    """
+    numeric = np.empty((len(chunk), len(schema["numeric_columns"])))
+    for i, col in enumerate(schema["numeric_columns"]):
+        values = chunk[col].astype(np.float64).fillna(schema["means"][col])
+        numeric[:, i] = ((values - schema["means"][col]) / schema["stds"][col]).to_numpy()
+    # Scoring requests carry no target column
+    y = chunk[schema["target_column"]].to_numpy() if schema["target_column"] in chunk else None
+
+    if schema["encoding"] != "dense":
+        X = sp.hstack([sp.csr_matrix(numeric), encode_categoricals_sparse(chunk, schema)], format="csr")
+        return X, y
+
+    parts = [numeric]
+    for col in schema["categorical_columns"]:
+        vocabulary = schema["categories"][col]
+        # drop_first=True semantics: the first category is the all-zero baseline
+        codes = pd.Categorical(chunk[col].astype("string"), categories=vocabulary).codes
+        one_hot = np.zeros((len(chunk), max(len(vocabulary) - 1, 0)))
+        rows = np.nonzero(codes > 0)[0]
+        one_hot[rows, codes[rows] - 1] = 1.0
+        parts.append(one_hot)
+    X = np.column_stack(parts)
+    return X, y
+
+
+# Preprocess data into a sparse design matrix
+def preprocess_data_sparse(df, target_column="target", encoding="onehot", n_features=2 ** 20):
+    """
+    Sparse alternative to preprocess_data for high-cardinality categorical columns.
+    Returns (X, y, schema) with X as a CSR matrix that is never densified.
+    """
+    logging.info(f"Preprocessing data with sparse {encoding} encoding...")
+    schema = build_encoding_schema_from_frame(df, target_column, encoding, n_features)
+    df = df.dropna(subset=[target_column])
+    X, y = encode_chunk(df, schema)
+    logging.info(f"Sparse design matrix: {X.shape[0]} x {X.shape[1]}, {X.nnz} non-zeros.")
+    return X, y, schema
+
+
+# Deterministic streaming train/validation split
+def validation_mask(chunk_index, n_rows, validation_fraction, random_state=42):
+    """
+    Return a boolean mask selecting validation rows of a chunk. The mask depends only
+    on the chunk position, so every epoch holds out exactly the same rows.
+    """
+    rng = np.random.default_rng([random_state, chunk_index])
+    return rng.random(n_rows) < validation_fraction
+
+
+# Train an SGD logistic model over CSV chunks for several epochs
+def train_model_streaming(file_path, target_column="target", chunksize=50000, epochs=5,
+                          validation_fraction=0.2, checkpoint_path=None, random_state=42,
+                          encoding="dense", n_features=2 ** 20):
+    """
+    Train a logistic model out of core with SGDClassifier.partial_fit, holding out
+    a streaming validation split and checkpointing model state after every epoch.
+    Memory use is bounded by the chunk size. A checkpoint is only resumed when it
+    was written for the same input file (path, size and mtime) and settings, and
+    it is removed once the last epoch is done.
+    """
+    logging.info("Training SGD logistic model in streaming mode...")
+    stat = os.stat(file_path)
+    run = {"file_path": os.path.abspath(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+           "target_column": target_column, "chunksize": chunksize, "epochs": epochs,
+           "validation_fraction": validation_fraction, "random_state": random_state,
+           "encoding": encoding, "n_features": n_features}
+    checkpoint = None
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        checkpoint = joblib.load(checkpoint_path)
+        if checkpoint.get("run") != run:
+            logging.warning(f"Checkpoint {checkpoint_path} was written for another input or settings; "
+                            f"starting fresh.")
+            checkpoint = None
+    start_epoch = 0
+    if checkpoint is not None:
+        model, schema, start_epoch = checkpoint["model"], checkpoint["schema"], checkpoint["epoch"]
+        logging.info(f"Resuming streaming training from checkpoint after epoch {start_epoch}.")
+    else:
+        schema = build_encoding_schema(file_path, target_column, chunksize, encoding, n_features)
+        model = SGDClassifier(loss="log_loss", random_state=random_state)
+    classes = np.array(schema["classes"])
+
+    for epoch in range(start_epoch, epochs):
+        correct, seen = 0, 0
+        for chunk_index, chunk in enumerate(pd.read_csv(file_path, chunksize=chunksize)):
+            chunk = chunk.dropna(subset=[target_column])
+            X, y = encode_chunk(chunk, schema)
+            mask = validation_mask(chunk_index, len(chunk), validation_fraction, random_state)
+            if (~mask).any():
+                model.partial_fit(X[~mask], y[~mask], classes=classes)
+            if mask.any() and hasattr(model, "coef_"):
+                correct += int((model.predict(X[mask]) == y[mask]).sum())
+                seen += int(mask.sum())
+        accuracy = correct / seen if seen else float("nan")
+        logging.info(f"Epoch {epoch + 1}/{epochs} - validation accuracy: {accuracy:.4f} ({seen} rows)")
+
+        if checkpoint_path and epoch + 1 < epochs:
+            os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+            tmp_path = checkpoint_path + ".tmp"
+            joblib.dump({"model": model, "schema": schema, "epoch": epoch + 1, "run": run}, tmp_path)
+            os.replace(tmp_path, checkpoint_path)
+            logging.info(f"Checkpoint saved to {checkpoint_path}.")
+
+    # A finished run must not be picked up by the next one
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    logging.info("Streaming training completed.")
+    return model, schema
+
+
+# Save a fitted model together with its encoding schema
+def save_model_artifact(model, schema, artifact_path):
+    """
+    Save the model and the schema needed to encode new records into one file.
+    """
+    os.makedirs(os.path.dirname(artifact_path) or ".", exist_ok=True)
+    tmp_path = artifact_path + ".tmp"
+    joblib.dump({"model": model, "schema": schema}, tmp_path)
+    os.replace(tmp_path, artifact_path)
+    logging.info(f"Model artifact saved to {artifact_path}.")
+
+# Load a model artifact written by save_model_artifact, the registry or a streaming checkpoint
+def load_model_artifact(artifact_path, mmap_mode="r"):
+    """
+    Load (model, schema) from a model artifact file, memory-mapping its arrays.
+    """
+    artifact = joblib.load(artifact_path, mmap_mode=mmap_mode)
+    logging.info(f"Model artifact loaded from {artifact_path}.")
+    return artifact["model"], artifact["schema"]
+
 # Main function to load data, preprocess, train, and evaluate the model
 def main():
     input_file = "data/data.csv"  # Replace with your file path
@@ -82,7 +363,42 @@ def main():
     model = train_model(X_train, y_train)
     
     # Evaluate the model
-    evaluate_model(model, X_test, y_test)
+    evaluate_model(model, X_test, y_test, n_bootstrap=2000)
+
+# Main function for high-cardinality categorical data, kept sparse end to end
+def main_sparse(encoding="onehot"):
+    input_file = "data/data.csv"  # Replace with your file path
+    df = load_data(input_file)
+    if df is None:
+        return
+
+    X, y, schema = preprocess_data_sparse(df, target_column="target", encoding=encoding)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = train_model(X_train, y_train)
+    intervals = evaluate_model(model, X_test, y_test, n_bootstrap=2000)
+
+    registry = ModelRegistry(REGISTRY_ROOT)
+    version = registry.register(REGISTRY_MODEL_NAME, model, schema, metadata={
+        "training": "sparse", "encoding": encoding,
+        "metrics": intervals.set_index("metric").to_dict(orient="index"),
+    })
+    registry.promote(REGISTRY_MODEL_NAME, version)
+
+# Main function for datasets that do not fit in memory
+def main_streaming():
+    input_file = "data/data.csv"  # Replace with your file path
+    model, schema = train_model_streaming(input_file, target_column="target",
+                                          checkpoint_path="models/streaming_checkpoint.joblib")
+    registry = ModelRegistry(REGISTRY_ROOT)
+    version = registry.register(REGISTRY_MODEL_NAME, model, schema, metadata={"training": "streaming"})
+    registry.promote(REGISTRY_MODEL_NAME, version)
 
 if __name__ == "__main__":
-    main()
+    if "--streaming" in sys.argv:
+        main_streaming()
+    elif "--sparse" in sys.argv:
+        main_sparse("onehot")
+    elif "--hashed" in sys.argv:
+        main_sparse("hash")
+    else:
+        main()
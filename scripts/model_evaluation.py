@@ -0,0 +1,163 @@
+import pandas as pd
+import numpy as np
+import logging
+import time
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BYTES_PER_COUNT = 8
+# Working copies made per block of resampled counts (counts, cumsums, temporaries)
+COUNT_BLOCK_OVERHEAD = 4
+
+
+# Bootstrap resampling of aggregated cell counts
+def _resample_cells(method, rng, cell_counts, n_resamples):
+    """
+    Resample the rows behind cell_counts n_resamples times at once.
+
+    Resampling n rows with replacement gives Multinomial(n, counts / n) cell counts
+    ('index'), and Poisson(1) row weights give independent Poisson(count) cell
+    counts ('poisson'), so neither needs one weight per row.
+    """
+    cell_counts = np.asarray(cell_counts, dtype=np.float64)
+    if method == "poisson":
+        return rng.poisson(cell_counts, size=(n_resamples, cell_counts.size)).astype(np.float64)
+    n_rows = int(cell_counts.sum())
+    return rng.multinomial(n_rows, cell_counts / n_rows, size=n_resamples).astype(np.float64)
+
+
+# Accuracy and precision/recall/F1 from a block of confusion matrices
+def _metrics_from_confusion(confusion, binary_index):
+    """
+    confusion is (n_resamples, n_classes, n_classes) with true classes on axis 1.
+    Precision/recall/F1 are for the positive class when binary_index is given and
+    macro-averaged otherwise.
+    """
+    tp = np.diagonal(confusion, axis1=1, axis2=2)
+    predicted = confusion.sum(axis=1)
+    actual = confusion.sum(axis=2)
+    total = confusion.sum(axis=(1, 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        accuracy = tp.sum(axis=1) / total
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(actual > 0, tp / actual, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    if binary_index is not None:
+        return {"accuracy": accuracy, "precision": precision[:, binary_index],
+                "recall": recall[:, binary_index], "f1": f1[:, binary_index]}
+    return {"accuracy": accuracy, "precision": precision.mean(axis=1),
+            "recall": recall.mean(axis=1), "f1": f1.mean(axis=1)}
+
+
+# Mann-Whitney AUC from per-score-group counts
+def _auc_from_group_counts(positive_counts, negative_counts):
+    """
+    positive_counts/negative_counts are (n_resamples, n_score_groups) counts in
+    ascending score order; ties count as half a correctly ordered pair.
+    """
+    negatives_below = np.cumsum(negative_counts, axis=1) - negative_counts
+    numerator = (positive_counts * (negatives_below + 0.5 * negative_counts)).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return numerator / (positive_counts.sum(axis=1) * negative_counts.sum(axis=1))
+
+
+# Group scores for AUC, optionally into quantile bins
+def _score_groups(y_score, score_bins):
+    """
+    Return a group index per row in ascending score order. With score_bins set and
+    more distinct scores than that, scores are grouped into quantile bins, which
+    bounds the bootstrap cost (pairs inside one bin count as ties).
+    """
+    unique_scores, groups = np.unique(y_score, return_inverse=True)
+    if score_bins is None or unique_scores.size <= score_bins:
+        return groups, unique_scores.size
+    edges = np.unique(np.quantile(y_score, np.linspace(0, 1, score_bins + 1)[1:-1]))
+    groups = np.searchsorted(edges, y_score, side="right")
+    return groups, edges.size + 1
+
+
+# Vectorized bootstrap confidence intervals for classification metrics
+def bootstrap_metrics(y_true, y_pred, y_score=None, n_bootstrap=2000, confidence=0.95, method="poisson",
+                      pos_label=None, score_bins=10000, memory_limit_mb=256, random_state=42):
+    """
+    Compute bootstrap confidence intervals of accuracy, precision, recall, F1 and
+    (for binary problems with scores) ROC AUC.
+
+    Rows are first aggregated into confusion-matrix cells and (score group, label)
+    cells; every resample is then drawn directly as cell counts, so the cost grows
+    with the number of cells instead of the number of rows. method='poisson' uses
+    Poisson(1) row weights and method='index' resampling with replacement. Resamples
+    are processed in blocks that fit in memory_limit_mb. score_bins limits the number
+    of AUC score groups (None keeps every distinct score).
+    Returns a DataFrame with the point estimate, interval bounds and bootstrap std.
+    """
+    if method not in ("poisson", "index"):
+        raise ValueError(f"Unknown bootstrap method: {method}")
+    started = time.perf_counter()
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    n_rows = y_true.shape[0]
+    classes = np.unique(np.concatenate([y_true, y_pred]))
+    n_classes = len(classes)
+
+    binary_index = None
+    if n_classes == 2:
+        positive = pos_label if pos_label is not None else classes[1]
+        binary_index = int(np.nonzero(classes == positive)[0][0])
+
+    true_codes = np.searchsorted(classes, y_true)
+    pred_codes = np.searchsorted(classes, y_pred)
+    confusion_cells = np.bincount(true_codes * n_classes + pred_codes, minlength=n_classes ** 2)
+
+    compute_auc = y_score is not None and binary_index is not None
+    if compute_auc:
+        y_score = np.asarray(y_score, dtype=np.float64)
+        is_positive = true_codes == binary_index
+        _, exact_groups = np.unique(y_score, return_inverse=True)
+        groups, n_groups = _score_groups(y_score, score_bins)
+        # Cells 0..n_groups-1 hold positives, n_groups..2*n_groups-1 negatives
+        auc_cells = np.bincount(groups + n_groups * ~is_positive, minlength=2 * n_groups)
+
+    cells_per_resample = confusion_cells.size + (auc_cells.size if compute_auc else 0)
+    budget = max(memory_limit_mb * 1024 * 1024 // (BYTES_PER_COUNT * COUNT_BLOCK_OVERHEAD), 1)
+    resample_block = int(max(1, min(n_bootstrap, budget // cells_per_resample)))
+
+    samples = {name: np.empty(n_bootstrap) for name in ["accuracy", "precision", "recall", "f1"]}
+    if compute_auc:
+        samples["roc_auc"] = np.empty(n_bootstrap)
+
+    for block_index, b_start in enumerate(range(0, n_bootstrap, resample_block)):
+        b_stop = min(b_start + resample_block, n_bootstrap)
+        rng = np.random.default_rng([random_state, block_index])
+        confusion = _resample_cells(method, rng, confusion_cells, b_stop - b_start)
+        block_metrics = _metrics_from_confusion(confusion.reshape(-1, n_classes, n_classes), binary_index)
+        for name, values in block_metrics.items():
+            samples[name][b_start:b_stop] = values
+        if compute_auc:
+            counts = _resample_cells(method, rng, auc_cells, b_stop - b_start)
+            samples["roc_auc"][b_start:b_stop] = _auc_from_group_counts(counts[:, :n_groups], counts[:, n_groups:])
+
+    # Point estimates use the observed counts (and every distinct score for AUC)
+    point = _metrics_from_confusion(confusion_cells.reshape(1, n_classes, n_classes).astype(np.float64),
+                                    binary_index)
+    if compute_auc:
+        n_exact = int(exact_groups.max()) + 1
+        exact_cells = np.bincount(exact_groups + n_exact * ~is_positive, minlength=2 * n_exact)
+        point["roc_auc"] = _auc_from_group_counts(exact_cells[None, :n_exact].astype(np.float64),
+                                                  exact_cells[None, n_exact:].astype(np.float64))
+
+    alpha = 1.0 - confidence
+    rows = []
+    for name, values in samples.items():
+        lower, upper = np.nanquantile(values, [alpha / 2, 1 - alpha / 2])
+        rows.append({
+            "metric": name,
+            "estimate": float(point[name][0]),
+            "ci_lower": float(lower),
+            "ci_upper": float(upper),
+            "std": float(np.nanstd(values)),
+        })
+    logging.info(f"Computed {n_bootstrap} bootstrap resamples of {n_rows} rows "
+                 f"in {time.perf_counter() - started:.2f}s.")
+    return pd.DataFrame(rows)
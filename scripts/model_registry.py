@@ -0,0 +1,188 @@
+import numpy as np
+import joblib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+ARTIFACT_NAME = "model.joblib"
+METADATA_NAME = "metadata.json"
+CURRENT_NAME = "CURRENT"
+
+
+# Store vocabularies as NumPy arrays so they are memory-mapped on load
+def _arrays_for_mmap(schema):
+    """
+    Return a copy of an encoding schema whose category vocabularies are NumPy
+    string arrays; joblib stores those as raw buffers that can be memory-mapped.
+    """
+    schema = dict(schema)
+    schema["categories"] = {col: np.asarray(values, dtype=str) for col, values in schema["categories"].items()}
+    return schema
+
+
+class ModelRegistry:
+    """
+    Local registry of versioned model artifacts:
+
+        <root>/<name>/<version>/model.joblib    fitted model and encoding schema
+        <root>/<name>/<version>/metadata.json   metrics, parameters, timestamps
+        <root>/<name>/CURRENT                   version currently promoted
+
+    Artifacts are written uncompressed so their arrays load memory-mapped and
+    read-only; every process that loads the same version shares one copy of
+    the weights through the page cache.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        self.loaded = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _model_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def list_versions(self, name):
+        """
+        Return the registered versions of a model, oldest first.
+        """
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        return sorted(int(entry) for entry in os.listdir(model_dir) if entry.isdigit())
+
+    def register(self, name, model, schema, metadata=None):
+        """
+        Save a new version of a model and return its version number. The version
+        directory is written under a temporary name and renamed into place, so a
+        version is either complete or absent.
+        """
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=model_dir)
+        try:
+            joblib.dump({"model": model, "schema": _arrays_for_mmap(schema)},
+                        os.path.join(staging_dir, ARTIFACT_NAME))
+            while True:
+                versions = self.list_versions(name)
+                version = versions[-1] + 1 if versions else 1
+                record = {
+                    "name": name,
+                    "version": version,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "model_class": type(model).__name__,
+                    **(metadata or {}),
+                }
+                with open(os.path.join(staging_dir, METADATA_NAME), "w") as f:
+                    json.dump(record, f, indent=2, default=str)
+                try:
+                    os.rename(staging_dir, os.path.join(model_dir, str(version)))
+                    break
+                except OSError:
+                    # Another process registered the same version first
+                    if not os.path.isdir(os.path.join(model_dir, str(version))):
+                        raise
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        logging.info(f"Registered {name} version {version}.")
+        return version
+
+    def promote(self, name, version):
+        """
+        Atomically make a version the current one for its model.
+        """
+        if version not in self.list_versions(name):
+            raise ValueError(f"Model {name} has no version {version}.")
+        pointer = os.path.join(self._model_dir(name), CURRENT_NAME)
+        tmp_pointer = f"{pointer}.{os.getpid()}.tmp"
+        with open(tmp_pointer, "w") as f:
+            f.write(str(version))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, pointer)
+        logging.info(f"Promoted {name} version {version} to current.")
+
+    def current_version(self, name):
+        """
+        Return the current version of a model, or None if none was promoted.
+        """
+        pointer = os.path.join(self._model_dir(name), CURRENT_NAME)
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            return int(f.read().strip())
+
+    def _resolve(self, name, version):
+        if version is None:
+            version = self.current_version(name)
+            if version is None:
+                raise ValueError(f"Model {name} has no current version.")
+        return version
+
+    def artifact_path(self, name, version=None):
+        """
+        Return the artifact file of a version (the current one by default).
+        """
+        return os.path.join(self._model_dir(name), str(self._resolve(name, version)), ARTIFACT_NAME)
+
+    def metadata(self, name, version=None):
+        """
+        Return the metadata recorded for a version (the current one by default).
+        """
+        path = os.path.join(self._model_dir(name), str(self._resolve(name, version)), METADATA_NAME)
+        with open(path) as f:
+            return json.load(f)
+
+    def load(self, name, version=None):
+        """
+        Load (model, schema) of a version (the current one by default) with its arrays
+        memory-mapped read-only. Each version is loaded at most once per process.
+        """
+        version = self._resolve(name, version)
+        key = (name, version)
+        with self.lock:
+            if key not in self.loaded:
+                artifact = joblib.load(self.artifact_path(name, version), mmap_mode="r")
+                self.loaded[key] = (artifact["model"], artifact["schema"])
+                logging.info(f"Loaded {name} version {version} (memory-mapped).")
+            return self.loaded[key]
+
+    def lazy(self, name, version=None):
+        """
+        Return a LazyModel that loads the version on first use.
+        """
+        return LazyModel(self, name, version)
+
+
+class LazyModel:
+    """
+    Handle to a registered model that is loaded on first use. With version=None
+    it resolves the current version at that moment.
+    """
+
+    def __init__(self, registry, name, version=None):
+        self.registry = registry
+        self.name = name
+        self.version = version
+
+    @property
+    def model(self):
+        return self.registry.load(self.name, self.version)[0]
+
+    @property
+    def schema(self):
+        return self.registry.load(self.name, self.version)[1]
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)
@@ -0,0 +1,242 @@
+import pandas as pd
+import numpy as np
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from flask import Flask, jsonify, request
+
+# Make the repository root importable when run as a script, not only with python -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import DEFAULT_HOST
+from scripts.learning_model import encode_chunk, load_model_artifact, REGISTRY_ROOT, REGISTRY_MODEL_NAME
+from scripts.model_registry import ModelRegistry
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_PORT = 5000
+LATENCY_WINDOW = 10000  # most recent request latencies kept for percentiles
+
+
+class ServingMetrics:
+    """
+    Thread-safe request/record/batch/failure counters and a fixed-size latency window.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.lock = threading.Lock()
+        self.latencies = np.zeros(window)
+        self.window = window
+        self.observed = 0
+        self.requests = 0
+        self.records = 0
+        self.batches = 0
+        self.batched_records = 0
+        self.failed_requests = 0
+        self.started = time.monotonic()
+
+    def record_request(self, latency, n_records):
+        with self.lock:
+            self.latencies[self.observed % self.window] = latency
+            self.observed += 1
+            self.requests += 1
+            self.records += n_records
+
+    def record_failure(self):
+        with self.lock:
+            self.failed_requests += 1
+
+    def record_batch(self, batch_size):
+        with self.lock:
+            self.batches += 1
+            self.batched_records += batch_size
+
+    def snapshot(self):
+        """
+        Return latency percentiles (ms) and throughput counters.
+        """
+        with self.lock:
+            latencies = self.latencies[:min(self.observed, self.window)].copy()
+            elapsed = time.monotonic() - self.started
+            requests, records = self.requests, self.records
+            batches, batched_records = self.batches, self.batched_records
+            failed_requests = self.failed_requests
+        has_data = latencies.size > 0
+        return {
+            "requests": requests,
+            "records": records,
+            "failed_requests": failed_requests,
+            "micro_batches": batches,
+            "mean_micro_batch_size": batched_records / batches if batches else 0.0,
+            "latency_p50_ms": float(np.percentile(latencies, 50) * 1000) if has_data else None,
+            "latency_p99_ms": float(np.percentile(latencies, 99) * 1000) if has_data else None,
+            "requests_per_second": requests / elapsed if elapsed else 0.0,
+            "records_per_second": records / elapsed if elapsed else 0.0,
+            "uptime_seconds": elapsed,
+        }
+
+
+class ModelScorer:
+    """
+    Preloaded model and encoding schema that score a DataFrame of records.
+    """
+
+    def __init__(self, artifact_path):
+        self.model, self.schema = load_model_artifact(artifact_path)
+        self.feature_columns = self.schema["numeric_columns"] + self.schema["categorical_columns"]
+
+    def score(self, frame):
+        """
+        Return (predicted labels, class probabilities) for the records in frame.
+        """
+        # Missing feature columns are treated like missing values
+        frame = frame.reindex(columns=self.feature_columns)
+        X, _ = encode_chunk(frame, self.schema)
+        probabilities = self.model.predict_proba(X)
+        labels = self.model.classes_[probabilities.argmax(axis=1)]
+        return labels, probabilities
+
+
+class MicroBatcher:
+    """
+    Merge concurrent single-record requests into micro-batches. A batch is scored
+    as soon as it holds max_batch_size records or max_latency seconds after its
+    first record arrived, whichever comes first.
+    """
+
+    def __init__(self, scorer, metrics, max_batch_size=64, max_latency=0.005):
+        self.scorer = scorer
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.pending = queue.Queue()
+        self.worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self.worker.start()
+
+    def submit(self, record):
+        """
+        Queue one record and return a Future resolving to (label, probabilities).
+        """
+        future = Future()
+        self.pending.put((record, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._score_batch(batch)
+
+    def _score_batch(self, batch):
+        records = [record for record, _ in batch]
+        try:
+            labels, probabilities = self.scorer.score(pd.DataFrame.from_records(records))
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # One bad record must not fail the requests batched with it: score each alone
+            logging.warning(f"Micro-batch of {len(batch)} records failed ({e}); scoring them one by one.")
+            for record, future in batch:
+                self._score_batch([(record, future)])
+            return
+        self.metrics.record_batch(len(batch))
+        for i, (_, future) in enumerate(batch):
+            future.set_result((labels[i], probabilities[i]))
+
+
+# Convert NumPy values into JSON-serializable Python values
+def _to_python(values):
+    return np.asarray(values).tolist()
+
+
+# Build the Flask scoring application
+def create_app(artifact_path, max_batch_size=64, max_latency_ms=5.0):
+    """
+    Create the scoring service. The model and preprocessing schema are loaded once here.
+
+    POST /predict accepts a single record ({"feature": value, ...}), a list of
+    records, or a columnar batch ({"columns": {"feature": [values, ...]}}).
+    Single records are merged into micro-batches; batches are scored directly.
+    GET /metrics reports p50/p99 latency and throughput counters.
+    """
+    logging.info(f"Starting model server with artifact {artifact_path}...")
+    scorer = ModelScorer(artifact_path)
+    metrics = ServingMetrics()
+    batcher = MicroBatcher(scorer, metrics, max_batch_size, max_latency_ms / 1000.0)
+    classes = _to_python(scorer.model.classes_)
+
+    app = Flask(__name__)
+
+    @app.route("/predict", methods=["POST"])
+    def predict():
+        started = time.monotonic()
+        payload = request.get_json(silent=True)
+        if payload is None:
+            metrics.record_failure()
+            return jsonify({"error": "Request body must be JSON."}), 400
+
+        try:
+            if isinstance(payload, dict) and "columns" in payload:
+                frame = pd.DataFrame(payload["columns"])
+            elif isinstance(payload, list):
+                frame = pd.DataFrame.from_records(payload)
+            elif isinstance(payload, dict):
+                label, probabilities = batcher.submit(payload).result()
+                metrics.record_request(time.monotonic() - started, 1)
+                return jsonify({
+                    "prediction": _to_python(label),
+                    "probabilities": dict(zip(map(str, classes), _to_python(probabilities))),
+                })
+            else:
+                metrics.record_failure()
+                return jsonify({"error": "Unsupported payload format."}), 400
+
+            labels, probabilities = scorer.score(frame)
+        except Exception as e:
+            logging.error(f"Error scoring request: {e}")
+            metrics.record_failure()
+            return jsonify({"error": str(e)}), 400
+
+        metrics.record_request(time.monotonic() - started, len(frame))
+        return jsonify({
+            "classes": classes,
+            "predictions": _to_python(labels),
+            "probabilities": _to_python(probabilities),
+        })
+
+    @app.route("/metrics", methods=["GET"])
+    def serving_metrics():
+        return jsonify(metrics.snapshot())
+
+    @app.route("/health", methods=["GET"])
+    def health():
+        return jsonify({"status": "ok", "artifact": artifact_path})
+
+    return app
+
+
+def main():
+    if len(sys.argv) > 1:
+        artifact_path = sys.argv[1]
+    else:
+        # Serve the version currently promoted in the local registry
+        artifact_path = ModelRegistry(REGISTRY_ROOT).artifact_path(REGISTRY_MODEL_NAME)
+    app = create_app(artifact_path)
+    app.run(host=DEFAULT_HOST, port=DEFAULT_PORT, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
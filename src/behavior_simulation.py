@@ -0,0 +1,153 @@
+import numpy as np
+import logging
+import os
+import sys
+
+# Make the repository root importable when run as a script, not only with python -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.checkpoint import save_checkpoint, load_checkpoint
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Default intervention parameters (no intervention applied)
+DEFAULT_PARAMS = {
+    "reinforcement": 0.0,       # positive reinforcement for abstinent steps
+    "trigger_reduction": 0.0,   # fraction of triggers removed from the environment
+    "cognitive_shift": 0.0,     # damping of the craving response to a trigger
+}
+
+# Baseline dynamics of the simulated agents
+BASE_TRIGGER_RATE = 0.3
+TRIGGER_INTENSITY = 0.4
+CRAVING_DECAY = 0.9
+RELAPSE_THRESHOLD = 0.6
+RELAPSE_STEEPNESS = 10.0
+NOISE_SCALE = 0.05
+
+# Per-agent metrics produced by a simulation run
+METRIC_NAMES = ["relapse_rate", "mean_craving", "first_relapse_step"]
+
+
+# Initialize the state of a population of agents
+def init_agents(n_agents, rng):
+    """
+    Create the initial state for a population of simulated agents.
+    """
+    return {
+        "craving": rng.uniform(0.0, 0.3, size=n_agents),
+        "relapses": np.zeros(n_agents, dtype=np.int64),
+        "craving_sum": np.zeros(n_agents),
+        "first_relapse": np.full(n_agents, -1, dtype=np.int64),
+        "step": 0,
+    }
+
+
+# Advance every agent by one time step
+def step_agents(state, params, rng):
+    """
+    Advance all agents one step: sample triggers, update cravings and record relapses.
+    """
+    craving = state["craving"]
+    n_agents = craving.shape[0]
+
+    trigger_rate = BASE_TRIGGER_RATE * (1.0 - params["trigger_reduction"])
+    triggers = rng.random(n_agents) < trigger_rate
+    response = TRIGGER_INTENSITY * (1.0 - params["cognitive_shift"])
+
+    craving = CRAVING_DECAY * craving + triggers * response + rng.normal(0.0, NOISE_SCALE, n_agents)
+    relapse_prob = 1.0 / (1.0 + np.exp(-RELAPSE_STEEPNESS * (craving - RELAPSE_THRESHOLD)))
+    relapsed = rng.random(n_agents) < relapse_prob
+
+    # Abstinent steps are reinforced, which lowers the craving further
+    craving = craving - (~relapsed) * params["reinforcement"] * 0.05
+    craving = np.clip(craving, 0.0, 1.0)
+
+    first = (state["first_relapse"] < 0) & relapsed
+    state["first_relapse"][first] = state["step"]
+    state["relapses"] += relapsed
+    state["craving_sum"] += craving
+    state["craving"] = craving
+    state["step"] += 1
+    return state
+
+
+# Summarize the per-agent metrics of a finished run
+def summarize_agents(state):
+    """
+    Return a (n_agents, len(METRIC_NAMES)) array of per-agent metrics.
+    """
+    n_steps = max(state["step"], 1)
+    first_relapse = np.where(state["first_relapse"] < 0, n_steps, state["first_relapse"])
+    return np.column_stack([
+        state["relapses"] / n_steps,
+        state["craving_sum"] / n_steps,
+        first_relapse,
+    ]).astype(np.float64)
+
+
+# Run a full behavior simulation
+def simulate_behavior(params=None, n_agents=1000, n_steps=200, seed=None):
+    """
+    Simulate a population of agents under the given intervention parameters
+    and return their per-agent metrics.
+    """
+    merged = dict(DEFAULT_PARAMS)
+    if params:
+        merged.update(params)
+    rng = np.random.default_rng(seed)
+
+    state = init_agents(n_agents, rng)
+    for _ in range(n_steps):
+        state = step_agents(state, merged, rng)
+    return summarize_agents(state)
+
+
+# Describe a seed in JSON form for the checkpoint's run configuration
+def _seed_config(seed):
+    """
+    Return seed as JSON-compatible values: a SeedSequence becomes its entropy and
+    spawn_key (lists, as they read back from JSON), other seeds are kept as is.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        entropy = seed.entropy if np.isscalar(seed.entropy) else list(seed.entropy)
+        return {"entropy": entropy, "spawn_key": list(seed.spawn_key)}
+    return seed
+
+
+# Run a behavior simulation that checkpoints and resumes
+def simulate_behavior_resumable(checkpoint_dir, params=None, n_agents=1000, n_steps=200, seed=None,
+                                checkpoint_every=50):
+    """
+    Simulate like simulate_behavior, saving agent and RNG state to checkpoint_dir
+    every checkpoint_every steps and resuming from the latest checkpoint if one
+    exists for the same run configuration.
+    """
+    merged = dict(DEFAULT_PARAMS)
+    if params:
+        merged.update(params)
+    run_config = {"params": merged, "n_agents": n_agents, "n_steps": n_steps, "seed": _seed_config(seed)}
+
+    checkpoint = load_checkpoint(checkpoint_dir)
+    if checkpoint is not None and checkpoint[2].get("run_config") == run_config:
+        arrays, rng, metadata = checkpoint
+        state = dict(arrays)
+        state["step"] = metadata["step"]
+        logging.info(f"Resuming simulation at step {state['step']} of {n_steps}.")
+    else:
+        rng = np.random.default_rng(seed)
+        state = init_agents(n_agents, rng)
+
+    while state["step"] < n_steps:
+        state = step_agents(state, merged, rng)
+        if state["step"] % checkpoint_every == 0 or state["step"] == n_steps:
+            arrays = {k: v for k, v in state.items() if k != "step"}
+            save_checkpoint(checkpoint_dir, arrays, rng=rng,
+                            metadata={"step": state["step"], "run_config": run_config})
+    return summarize_agents(state)
+
+
+if __name__ == "__main__":
+    metrics = simulate_behavior({"reinforcement": 0.5}, n_agents=500, n_steps=100, seed=42)
+    for name, values in zip(METRIC_NAMES, metrics.T):
+        logging.info(f"{name}: mean={values.mean():.3f}, std={values.std():.3f}")
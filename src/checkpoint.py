@@ -0,0 +1,228 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import logging
+import os
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MANIFEST_NAME = "manifest.json"
+CHECKPOINT_VERSION = 1
+DEFAULT_BLOCK_SIZE = 1 << 20  # bytes per change-tracking block
+
+
+# File name used for an array inside a checkpoint slot
+def _array_file_name(name):
+    """
+    Map an array name to a file name that is safe on every filesystem.
+    """
+    return hashlib.md5(name.encode("utf-8")).hexdigest()[:16] + ".npy"
+
+
+# Raw byte view of an array
+def _byte_view(array):
+    """
+    Return a flat uint8 view of a C-contiguous array.
+    """
+    return array.reshape(-1).view(np.uint8)
+
+
+# Hash an array in fixed-size blocks
+def _block_hashes(array, block_size):
+    """
+    Return one short hex digest per block_size bytes of the array.
+    """
+    data = _byte_view(array)
+    return [
+        hashlib.blake2b(data[start:start + block_size], digest_size=16).hexdigest()
+        for start in range(0, data.size, block_size)
+    ]
+
+
+# Read the checkpoint manifest
+def _read_manifest(checkpoint_dir):
+    """
+    Return the parsed manifest, or None when no checkpoint exists yet.
+    """
+    path = os.path.join(checkpoint_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+# Atomically replace the checkpoint manifest
+def _write_manifest(checkpoint_dir, manifest):
+    """
+    Write the manifest to a temporary file, fsync it and rename it into place.
+    """
+    path = os.path.join(checkpoint_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Serialize the state of a NumPy random generator
+def rng_state(rng):
+    """
+    Return the JSON-serializable state of a numpy.random.Generator.
+    """
+    return rng.bit_generator.state
+
+
+# Rebuild a NumPy random generator from its serialized state
+def restore_rng(state):
+    """
+    Create a numpy.random.Generator positioned exactly at the saved state.
+    """
+    bit_generator = getattr(np.random, state["bit_generator"])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
+
+
+# Save a checkpoint, writing only the blocks that changed
+def save_checkpoint(checkpoint_dir, arrays, rng=None, metadata=None, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Save named NumPy arrays, the RNG state and JSON metadata to checkpoint_dir.
+
+    Arrays are kept as memory-mappable .npy files in two alternating slots. Each
+    save goes to the inactive slot and rewrites only the blocks whose content
+    differs from what that slot already holds; the manifest is then atomically
+    switched over, so a crash mid-save always leaves the previous checkpoint intact.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    manifest = _read_manifest(checkpoint_dir)
+    if manifest is None:
+        manifest = {
+            "version": CHECKPOINT_VERSION,
+            "generation": 0,
+            "active_slot": None,
+            "pending_slot": None,
+            "block_size": block_size,
+            "slots": [{"arrays": {}}, {"arrays": {}}],
+        }
+
+    target = 0 if manifest["active_slot"] is None else 1 - manifest["active_slot"]
+    slot = manifest["slots"][target]
+    # A slot that was being written when the process died cannot be trusted block by block
+    if manifest["pending_slot"] == target or manifest["block_size"] != block_size:
+        slot["arrays"] = {}
+    manifest["block_size"] = block_size
+    manifest["pending_slot"] = target
+    _write_manifest(checkpoint_dir, manifest)
+
+    slot_dir = os.path.join(checkpoint_dir, f"slot{target}")
+    os.makedirs(slot_dir, exist_ok=True)
+    written_blocks = 0
+    total_blocks = 0
+    new_entries = {}
+
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise ValueError(f"Array '{name}' has object dtype and cannot be memory-mapped.")
+        path = os.path.join(slot_dir, _array_file_name(name))
+        descr = np.lib.format.dtype_to_descr(array.dtype)
+        hashes = _block_hashes(array, block_size)
+        total_blocks += len(hashes)
+        previous = slot["arrays"].get(name)
+
+        if (previous is None or previous["shape"] != list(array.shape)
+                or previous["descr"] != json.loads(json.dumps(descr)) or not os.path.exists(path)):
+            target_map = np.lib.format.open_memmap(path, mode="w+", dtype=array.dtype, shape=array.shape)
+            if array.size:
+                target_map[...] = array
+            written_blocks += len(hashes)
+        else:
+            target_map = np.lib.format.open_memmap(path, mode="r+")
+            source_bytes = _byte_view(array)
+            target_bytes = _byte_view(target_map)
+            for i, (old_hash, new_hash) in enumerate(zip(previous["hashes"], hashes)):
+                if old_hash != new_hash:
+                    start = i * block_size
+                    target_bytes[start:start + block_size] = source_bytes[start:start + block_size]
+                    written_blocks += 1
+        if isinstance(target_map, np.memmap):
+            target_map.flush()
+        del target_map
+        new_entries[name] = {
+            "file": _array_file_name(name),
+            "shape": list(array.shape),
+            "descr": descr,
+            "hashes": hashes,
+        }
+
+    # Drop arrays that are no longer part of the checkpoint
+    for name, entry in slot["arrays"].items():
+        if name not in new_entries:
+            stale_path = os.path.join(slot_dir, entry["file"])
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+
+    slot["arrays"] = new_entries
+    manifest["active_slot"] = target
+    manifest["pending_slot"] = None
+    manifest["generation"] += 1
+    manifest["rng"] = rng_state(rng) if rng is not None else None
+    manifest["metadata"] = metadata or {}
+    _write_manifest(checkpoint_dir, manifest)
+
+    logging.info(f"Checkpoint {manifest['generation']} saved to {checkpoint_dir}: "
+                 f"wrote {written_blocks} of {total_blocks} blocks.")
+    return manifest["generation"]
+
+
+# Load the latest checkpoint by remapping its array files
+def load_checkpoint(checkpoint_dir, mmap_mode="c"):
+    """
+    Load the latest complete checkpoint from checkpoint_dir.
+
+    Returns (arrays, rng, metadata), where arrays are memory-mapped with the
+    given mode ('c' gives private writable copies, 'r' read-only views),
+    or None when no checkpoint exists.
+    """
+    manifest = _read_manifest(checkpoint_dir)
+    if manifest is None or manifest["active_slot"] is None:
+        return None
+
+    active = manifest["active_slot"]
+    slot_dir = os.path.join(checkpoint_dir, f"slot{active}")
+    arrays = {}
+    for name, entry in manifest["slots"][active]["arrays"].items():
+        path = os.path.join(slot_dir, entry["file"])
+        if int(np.prod(entry["shape"])) == 0:
+            arrays[name] = np.load(path)  # empty arrays cannot be memory-mapped
+        else:
+            arrays[name] = np.load(path, mmap_mode=mmap_mode)
+
+    rng = restore_rng(manifest["rng"]) if manifest.get("rng") else None
+    logging.info(f"Loaded checkpoint {manifest['generation']} from {checkpoint_dir} ({len(arrays)} arrays).")
+    return arrays, rng, manifest.get("metadata", {})
+
+
+# Flatten a DataFrame of partial results into checkpointable arrays
+def frame_to_arrays(df, prefix):
+    """
+    Convert a DataFrame with non-object columns into a dict of arrays keyed by '<prefix>/<column>'.
+    """
+    arrays = {f"{prefix}/{col}": df[col].to_numpy() for col in df.columns}
+    arrays[f"{prefix}/__index__"] = df.index.to_numpy()
+    return arrays
+
+
+# Rebuild a DataFrame of partial results from checkpointed arrays
+def frame_from_arrays(arrays, prefix):
+    """
+    Rebuild the DataFrame stored with frame_to_arrays, without copying column data.
+    """
+    head = f"{prefix}/"
+    columns = {
+        name[len(head):]: values for name, values in arrays.items()
+        if name.startswith(head) and name != f"{prefix}/__index__"
+    }
+    return pd.DataFrame(columns, index=arrays.get(f"{prefix}/__index__"), copy=False)
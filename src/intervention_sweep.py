@@ -0,0 +1,355 @@
+import pandas as pd
+import numpy as np
+import itertools
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# Make the repository root importable when run as a script, not only with python -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.behavior_simulation import simulate_behavior, METRIC_NAMES
+from src.pattern_recognition import standardize_data, kmeans_clustering
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Quantiles reported in the sweep summary
+SUMMARY_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+class RunningStats:
+    """
+    Mergeable count/mean/variance/min/max for a fixed number of metrics
+    (Welford updates, Chan et al. parallel merge).
+    """
+
+    def __init__(self, n_metrics):
+        self.count = 0
+        self.mean = np.zeros(n_metrics)
+        self.m2 = np.zeros(n_metrics)
+        self.min = np.full(n_metrics, np.inf)
+        self.max = np.full(n_metrics, -np.inf)
+
+    def update(self, values):
+        """
+        Add a (n_samples, n_metrics) block of observations.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape[0] == 0:
+            return
+        block = RunningStats(values.shape[1])
+        block.count = values.shape[0]
+        block.mean = values.mean(axis=0)
+        block.m2 = ((values - block.mean) ** 2).sum(axis=0)
+        block.min = values.min(axis=0)
+        block.max = values.max(axis=0)
+        self.merge(block)
+
+    def merge(self, other):
+        """
+        Merge another RunningStats into this one.
+        """
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / total
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+
+    def variance(self, ddof=1):
+        """
+        Return the per-metric variance.
+        """
+        if self.count <= ddof:
+            return np.full_like(self.mean, np.nan)
+        return self.m2 / (self.count - ddof)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with logarithmic buckets (DDSketch-style).
+    Quantiles are accurate to `relative_accuracy` of the true value.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _add_to_store(self, store, magnitudes):
+        keys = np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64)
+        unique_keys, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(unique_keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def update(self, values):
+        """
+        Add a 1-D array of observations.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.count += values.size
+        tiny = np.finfo(np.float64).tiny
+        positive = values[values > tiny]
+        negative = -values[values < -tiny]
+        self.zero_count += values.size - positive.size - negative.size
+        if positive.size:
+            self._add_to_store(self.positive, positive)
+        if negative.size:
+            self._add_to_store(self.negative, negative)
+
+    def merge(self, other):
+        """
+        Merge another sketch with the same relative accuracy into this one.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy.")
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def _bucket_value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """
+        Return the approximate q-quantile (0 <= q <= 1).
+        """
+        if self.count == 0:
+            return np.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.positive))
+
+
+class MetricAggregate:
+    """
+    Streaming summary (moments and quantiles) of a set of named metrics.
+    """
+
+    def __init__(self, metric_names, relative_accuracy=0.01):
+        self.metric_names = list(metric_names)
+        self.stats = RunningStats(len(self.metric_names))
+        self.sketches = [QuantileSketch(relative_accuracy) for _ in self.metric_names]
+
+    def update(self, values):
+        """
+        Add a (n_samples, n_metrics) block of observations.
+        """
+        self.stats.update(values)
+        for i, sketch in enumerate(self.sketches):
+            sketch.update(values[:, i])
+
+    def merge(self, other):
+        """
+        Merge another MetricAggregate into this one.
+        """
+        self.stats.merge(other.stats)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+
+    def summary(self, quantiles=SUMMARY_QUANTILES):
+        """
+        Return a flat dict of summary statistics keyed by '<metric>_<stat>'.
+        """
+        row = {"n_samples": self.stats.count}
+        variance = self.stats.variance()
+        for i, name in enumerate(self.metric_names):
+            row[f"{name}_mean"] = self.stats.mean[i]
+            row[f"{name}_var"] = variance[i]
+            row[f"{name}_min"] = self.stats.min[i]
+            row[f"{name}_max"] = self.stats.max[i]
+            for q in quantiles:
+                row[f"{name}_p{int(round(q * 100)):02d}"] = self.sketches[i].quantile(q)
+        return row
+
+
+# Build the cartesian grid of intervention parameters
+def build_parameter_grid(param_values):
+    """
+    Expand a dict of {parameter: [values]} into a list of parameter dicts.
+    """
+    names = sorted(param_values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(param_values[n] for n in names))]
+
+
+# Structured dtype of the per-agent records written to shard files
+def shard_dtype(metric_names):
+    """
+    Return the NumPy record dtype used for shard files.
+    """
+    fields = [("point", np.int32), ("seed_index", np.int32), ("agent", np.int32)]
+    fields += [(name, np.float32) for name in metric_names]
+    return np.dtype(fields)
+
+
+# Run a single (parameter point, seed) job inside a worker process
+def run_sweep_job(job, output_dir, n_agents, n_steps, base_seed, simulate, metric_names, relative_accuracy):
+    """
+    Simulate one (parameter point, seed) job, append its per-agent results to
+    this worker's shard file and return a partial MetricAggregate.
+    """
+    point_index, seed_index, params = job
+    # The seed depends only on (base_seed, point, seed index), never on scheduling order
+    seed = np.random.SeedSequence(base_seed, spawn_key=(point_index, seed_index))
+    metrics = simulate(params, n_agents=n_agents, n_steps=n_steps, seed=seed)
+
+    records = np.empty(metrics.shape[0], dtype=shard_dtype(metric_names))
+    records["point"] = point_index
+    records["seed_index"] = seed_index
+    records["agent"] = np.arange(metrics.shape[0])
+    for i, name in enumerate(metric_names):
+        records[name] = metrics[:, i]
+    shard_path = os.path.join(output_dir, f"shard-{os.getpid()}.bin")
+    with open(shard_path, "ab") as f:
+        records.tofile(f)
+
+    aggregate = MetricAggregate(metric_names, relative_accuracy)
+    aggregate.update(metrics)
+    return point_index, aggregate
+
+
+# Merge the partial aggregates of finished jobs
+def _merge_completed(pending, aggregates):
+    """
+    Wait for at least one pending job, merge its results and return the
+    still-pending futures with the number of merged jobs.
+    """
+    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        point_index, partial = future.result()
+        aggregates[point_index].merge(partial)
+    return pending, len(done)
+
+
+# Run the full intervention sweep on a process pool
+def run_intervention_sweep(param_values, n_seeds, output_dir, n_agents=1000, n_steps=200,
+                           base_seed=42, max_workers=None, simulate=simulate_behavior,
+                           metric_names=METRIC_NAMES, relative_accuracy=0.01):
+    """
+    Run every (parameter point, seed) job of the sweep on a process pool.
+    Raw per-agent results are streamed to shard files in output_dir and summary
+    statistics are merged as jobs complete; returns the summary DataFrame.
+    """
+    grid = build_parameter_grid(param_values)
+    logging.info(f"Running intervention sweep: {len(grid)} parameter points x {n_seeds} seeds...")
+    os.makedirs(output_dir, exist_ok=True)
+    for name in os.listdir(output_dir):
+        if name.startswith("shard-") and name.endswith(".bin"):
+            os.remove(os.path.join(output_dir, name))
+
+    jobs = ((p, s, params) for p, params in enumerate(grid) for s in range(n_seeds))
+    aggregates = [MetricAggregate(metric_names, relative_accuracy) for _ in grid]
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = 4 * max_workers
+    completed = 0
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for job in jobs:
+            # Keep a bounded number of jobs in flight so results never pile up in memory
+            if len(pending) >= max_in_flight:
+                pending, merged = _merge_completed(pending, aggregates)
+                completed += merged
+            pending.add(executor.submit(run_sweep_job, job, output_dir, n_agents, n_steps, base_seed,
+                                        simulate, metric_names, relative_accuracy))
+        while pending:
+            pending, merged = _merge_completed(pending, aggregates)
+            completed += merged
+
+    logging.info(f"Completed {completed} sweep jobs.")
+    summary = pd.DataFrame([{**params, **agg.summary()} for params, agg in zip(grid, aggregates)])
+    summary.to_csv(os.path.join(output_dir, "summary.csv"), index=False)
+
+    manifest = {
+        "grid": grid,
+        "n_seeds": n_seeds,
+        "n_agents": n_agents,
+        "n_steps": n_steps,
+        "base_seed": base_seed,
+        "metrics": list(metric_names),
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    logging.info(f"Sweep summary saved to {output_dir}.")
+    return summary
+
+
+# Load the per-agent records of a finished sweep
+def load_sweep_results(output_dir, points=None):
+    """
+    Load shard files of a sweep into a DataFrame with one row per simulated agent,
+    joined with its intervention parameters. Optionally restrict to some points.
+    """
+    with open(os.path.join(output_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    dtype = shard_dtype(manifest["metrics"])
+
+    frames = []
+    for name in sorted(os.listdir(output_dir)):
+        if not (name.startswith("shard-") and name.endswith(".bin")):
+            continue
+        records = np.memmap(os.path.join(output_dir, name), dtype=dtype, mode="r")
+        if points is not None:
+            records = records[np.isin(records["point"], points)]
+        frames.append(pd.DataFrame(np.asarray(records)))
+    results = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=dtype.names)
+
+    grid = pd.DataFrame(manifest["grid"])
+    grid["point"] = np.arange(len(grid), dtype=np.int32)
+    results = results.merge(grid, on="point", how="left")
+    results.sort_values(["point", "seed_index", "agent"], inplace=True, ignore_index=True)
+    logging.info(f"Loaded {results.shape[0]} sweep records from {output_dir}.")
+    return results
+
+
+# Load the summary table of a finished sweep
+def load_sweep_summary(output_dir):
+    """
+    Load the per-point summary statistics of a sweep.
+    """
+    return pd.read_csv(os.path.join(output_dir, "summary.csv"))
+
+
+def main():
+    output_dir = "data/sweeps/interventions"
+    param_values = {
+        "reinforcement": [0.0, 0.25, 0.5, 0.75, 1.0],
+        "trigger_reduction": [0.0, 0.25, 0.5],
+        "cognitive_shift": [0.0, 0.25, 0.5],
+    }
+    summary = run_intervention_sweep(param_values, n_seeds=20, output_dir=output_dir)
+
+    # Group intervention settings by their outcome profile
+    outcome_columns = [f"{name}_mean" for name in METRIC_NAMES]
+    data_scaled = standardize_data(summary[outcome_columns])
+    data_with_clusters, kmeans_model = kmeans_clustering(data_scaled, n_clusters=3)
+    summary["cluster"] = data_with_clusters["cluster"]
+    logging.info(f"Intervention clusters:\n{summary.groupby('cluster')[outcome_columns].mean()}")
+
+
+if __name__ == "__main__":
+    main()
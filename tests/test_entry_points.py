@@ -0,0 +1,50 @@
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Modules meant to be run as scripts
+SCRIPT_MODULES = [
+    "src.intervention_sweep",
+    "scripts.model_server",
+    "scripts.hyperparameter_search",
+]
+
+# Modules with a command line (argparse) entry point
+CLI_MODULES = [
+    "networking.network_monitor",
+    "twitter.benchmark",
+    "networking.ftp_sync",
+]
+
+
+def _script_path(module):
+    return os.path.join(REPO_ROOT, *module.split(".")) + ".py"
+
+
+@pytest.mark.parametrize("module", CLI_MODULES)
+def test_module_imports(module):
+    importlib.import_module(module)
+
+
+@pytest.mark.parametrize("module", SCRIPT_MODULES)
+def test_script_runs_from_any_directory(module, tmp_path):
+    # Load the file without running its main block, with only the working directory on sys.path
+    result = subprocess.run([sys.executable, "-c", "import runpy, sys; runpy.run_path(sys.argv[1])", _script_path(module)],
+                            cwd=tmp_path, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.parametrize("module", CLI_MODULES)
+def test_script_help(module, tmp_path):
+    # Run as a file from another directory, the way the scripts are documented
+    script = _script_path(module)
+    result = subprocess.run([sys.executable, script, "--help"], cwd=tmp_path, capture_output=True, text=True,
+                            timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert "usage:" in result.stdout
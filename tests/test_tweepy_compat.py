@@ -0,0 +1,61 @@
+import os
+import sys
+
+import numpy as np
+import tweepy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twitter.followers import _lookup_profiles, iter_id_pages  # noqa: E402
+from twitter.tweepy_compat import api_method, lookup_users_kwargs  # noqa: E402
+
+
+# tweepy.API with its HTTP layer replaced: records calls, returns canned payloads
+class RecordingAPI(tweepy.API):
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = responses
+        self.calls = []
+
+    def request(self, method, endpoint, *, endpoint_parameters=(), params=None, payload_type=None, **kwargs):
+        self.calls.append((endpoint, kwargs))
+        return self.responses[endpoint](kwargs)
+
+
+def test_api_method_resolves_tweepy_names():
+    api = RecordingAPI({})
+    assert api_method(api, "followers_ids") == api.get_follower_ids
+    assert api_method(api, "friends_ids") == api.get_friend_ids
+    assert lookup_users_kwargs(api, [1, 2]) == {"user_id": [1, 2]}
+
+
+def test_iter_id_pages_follows_cursor_on_tweepy_api():
+    pages = {-1: ([1, 2], (0, 7)), 7: ([3], (7, 0))}
+    api = RecordingAPI({"followers/ids": lambda kwargs: pages[kwargs["cursor"]]})
+    ids = np.concatenate(list(iter_id_pages(api, "someone")))
+    assert ids.tolist() == [1, 2, 3]
+    assert [kwargs["screen_name"] for _, kwargs in api.calls] == ["someone", "someone"]
+
+
+def test_lookup_profiles_uses_tweepy_keyword():
+    def lookup(kwargs):
+        return [tweepy.models.User.parse(None, {"id": user_id, "screen_name": f"u{user_id}", "followers_count": 1,
+                                                "friends_count": 2, "statuses_count": 3})
+                for user_id in map(int, kwargs["user_id"].split(","))]
+
+    api = RecordingAPI({"users/lookup": lookup})
+    profiles = _lookup_profiles(api, np.array([5, 6]))
+    assert api.calls[0][1]["user_id"] == "5,6"
+    assert sorted(profiles["id"].tolist()) == [5, 6]
+
+
+def test_trend_names_use_tweepy_method(tmp_path):
+    from twitter import api_cache
+
+    api = RecordingAPI({"trends/place": lambda kwargs: [{"trends": [{"name": "#a"}, {"name": "#b"}]}]})
+    cache = api_cache.SharedAPICache(str(tmp_path / "cache.sqlite"))
+    previous, api_cache._default_cache = api_cache._default_cache, cache
+    try:
+        assert api_cache.cached_trend_names(api, 1) == ["#a", "#b"]
+    finally:
+        api_cache._default_cache = previous
@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import RETRY_ATTEMPTS
+from twitter.rate_limits import default_scheduler
+from twitter.tweepy_compat import RateLimitError, TweepError, api_code
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Per-endpoint limits: concurrent requests in flight, sustained requests per
+# second and burst size. Rates follow the v1.1 write limits (300 statuses per
+# 3 hours, 1000 favorites per 24 hours).
+ENDPOINT_LIMITS = {
+    "statuses/retweet": {"concurrency": 4, "rate": 300 / (3 * 3600), "burst": 10},
+    "statuses/update": {"concurrency": 4, "rate": 300 / (3 * 3600), "burst": 10},
+    "favorites/create": {"concurrency": 4, "rate": 1000 / (24 * 3600), "burst": 20},
+}
+
+BACKOFF_BASE = 1.0  # seconds before the first retry (before jitter)
+BACKOFF_MAX = 60.0
+
+
+# Blocking API calls behind each action
+def _retweet(api, tweet_id):
+    return api.retweet(tweet_id)
+
+
+def _like(api, tweet_id):
+    return api.create_favorite(tweet_id)
+
+
+def _reply(api, tweet_id, message):
+    return api.update_status(status=message, in_reply_to_status_id=tweet_id)
+
+
+# Action name -> (endpoint, call)
+ACTIONS = {
+    "retweet": ("statuses/retweet", _retweet),
+    "like": ("favorites/create", _like),
+    "reply": ("statuses/update", _reply),
+}
+
+
+# Decide whether a failed call is worth retrying
+def is_retryable(error):
+    """
+    Rate limiting, server errors and network failures (no response) are retried;
+    other API errors, such as duplicate actions, are final.
+    """
+    if isinstance(error, RateLimitError):
+        return True
+    if not isinstance(error, TweepError):
+        return False
+    response = getattr(error, "response", None)
+    return response is None or response.status_code == 429 or response.status_code >= 500
+
+
+# Jittered exponential backoff delay
+def backoff_delay(attempt, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+    """
+    "Full jitter" backoff: a uniform delay up to base * 2**attempt, capped at maximum.
+    Spreading retries out keeps failed requests from retrying in lockstep.
+    """
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """
+    Token bucket for one endpoint: holds up to capacity tokens, refilled at rate
+    tokens per second. Waiters are served in arrival order. A caller takes its token
+    up front (the balance may go negative) and sleeps until it is due, so a bucket is
+    not tied to one event loop and can outlive the executors that share it.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """
+        Take a token and return the seconds until it is available.
+        """
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self):
+        """
+        Wait until a token is available and take it.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Token buckets shared by every executor, keyed by (endpoint, rate, burst), so
+# back-to-back batches (polls, stream micro-batches) draw from one budget instead
+# of each starting with a full burst
+default_buckets = {}
+default_buckets_lock = threading.Lock()
+
+
+# Get the shared token bucket for an endpoint limit
+def shared_bucket(endpoint, limit, buckets=None):
+    buckets = default_buckets if buckets is None else buckets
+    key = (endpoint, limit["rate"], limit["burst"])
+    with default_buckets_lock:
+        if key not in buckets:
+            buckets[key] = TokenBucket(limit["rate"], limit["burst"])
+        return buckets[key]
+
+
+class ActionExecutor:
+    """
+    Queue Twitter actions and run them concurrently. Every endpoint has its own
+    queue served by a fixed number of workers (its concurrency cap) and its own
+    token bucket, so throughput is bounded by each endpoint's rate limit rather
+    than by round-trip latency. The blocking tweepy calls run in a thread pool.
+    A RateLimitScheduler holds back an endpoint whose header-reported quota is
+    exhausted until its window resets, while other endpoints keep going.
+
+        async with ActionExecutor(api) as executor:
+            outcomes = await asyncio.gather(*[executor.submit("like", tweet_id=i) for i in ids])
+    """
+
+    def __init__(self, api, limits=None, max_retries=RETRY_ATTEMPTS, backoff_base=BACKOFF_BASE, scheduler=None,
+                 buckets=None):
+        self.api = api
+        self.scheduler = scheduler or default_scheduler
+        self.limits = {**ENDPOINT_LIMITS, **(limits or {})}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.shared_buckets = buckets
+        self.queues = {}
+        self.buckets = {}
+        self.workers = []
+        self.pool = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def start(self):
+        """
+        Create the endpoint queues and workers and look up the shared token buckets
+        (default_buckets unless the executor was given its own dict).
+        """
+        total_workers = sum(limit["concurrency"] for limit in self.limits.values())
+        self.pool = ThreadPoolExecutor(max_workers=total_workers, thread_name_prefix="twitter-action")
+        for endpoint, limit in self.limits.items():
+            self.queues[endpoint] = asyncio.Queue()
+            self.buckets[endpoint] = shared_bucket(endpoint, limit, self.shared_buckets)
+            for _ in range(limit["concurrency"]):
+                self.workers.append(asyncio.create_task(self._worker(endpoint)))
+
+    async def close(self):
+        """
+        Wait for queued actions to finish, then stop the workers.
+        """
+        for endpoint_queue in self.queues.values():
+            await endpoint_queue.join()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        self.pool.shutdown(wait=True)
+
+    def submit(self, action, **kwargs):
+        """
+        Queue an action ("retweet", "like" or "reply") and return a future that
+        resolves to its outcome dict.
+        """
+        endpoint, _ = ACTIONS[action]
+        future = asyncio.get_running_loop().create_future()
+        self.queues[endpoint].put_nowait((action, kwargs, future))
+        return future
+
+    async def _worker(self, endpoint):
+        endpoint_queue = self.queues[endpoint]
+        while True:
+            action, kwargs, future = await endpoint_queue.get()
+            try:
+                outcome = await self._execute(endpoint, action, kwargs)
+                if not future.done():
+                    future.set_result(outcome)
+            except Exception as e:
+                # Fail this action only; the worker keeps serving the queue
+                logging.error(f"Unexpected error executing {action} {kwargs}: {e}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                endpoint_queue.task_done()
+
+    async def _execute(self, endpoint, action, kwargs):
+        _, call = ACTIONS[action]
+        loop = asyncio.get_running_loop()
+        outcome = {"action": action, **kwargs, "ok": False, "attempts": 0, "error": None, "api_code": None,
+                   "retryable": False, "result": None}
+        for attempt in range(self.max_retries + 1):
+            await self.scheduler.acquire_async(endpoint)
+            await self.buckets[endpoint].acquire()
+            outcome["attempts"] = attempt + 1
+            try:
+                outcome["result"] = await loop.run_in_executor(self.pool, lambda: call(self.api, **kwargs))
+                # last_response is shared by concurrent calls; its URL names the right endpoint
+                self.scheduler.observe(getattr(self.api, "last_response", None))
+                outcome["ok"] = True
+                outcome["error"] = None
+                return outcome
+            except Exception as e:
+                self.scheduler.observe(getattr(e, "response", None), endpoint)
+                outcome["error"] = str(e)
+                outcome["api_code"] = api_code(e)
+                outcome["retryable"] = is_retryable(e)
+                if not is_retryable(e) or attempt == self.max_retries:
+                    logging.error(f"Error executing {action} {kwargs}: {e}")
+                    return outcome
+                if self.scheduler.delay(endpoint) > 0:
+                    # The next acquire waits exactly until the window resets
+                    logging.warning(f"Retrying {action} {kwargs} after the rate-limit window resets.")
+                    continue
+                delay = backoff_delay(attempt, self.backoff_base)
+                logging.warning(f"Retrying {action} {kwargs} in {delay:.1f}s after error: {e}")
+                await asyncio.sleep(delay)
+        return outcome
+
+
+# Run a batch of actions concurrently
+async def execute_actions_async(api, actions, limits=None, scheduler=None, buckets=None):
+    """
+    Execute (action, kwargs) pairs concurrently and return their outcomes in order.
+    An action that fails unexpectedly (not an API error) gets a failed outcome.
+    """
+    actions = list(actions)
+    async with ActionExecutor(api, limits, scheduler=scheduler, buckets=buckets) as executor:
+        futures = [executor.submit(action, **kwargs) for action, kwargs in actions]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+    return [result if not isinstance(result, BaseException) else
+            {"action": action, **kwargs, "ok": False, "attempts": 1, "error": str(result), "api_code": None,
+             "retryable": False, "result": None}
+            for (action, kwargs), result in zip(actions, results)]
+
+
+# Run a batch of actions from synchronous code
+def execute_actions(api, actions, limits=None, scheduler=None, buckets=None):
+    """
+    Execute (action, kwargs) pairs concurrently within per-endpoint limits and
+    return one outcome dict per action, in order.
+    """
+    actions = list(actions)
+    if not actions:
+        return []
+    started = time.monotonic()
+    outcomes = asyncio.run(execute_actions_async(api, actions, limits, scheduler, buckets))
+    succeeded = sum(outcome["ok"] for outcome in outcomes)
+    logging.info(f"Executed {len(outcomes)} actions in {time.monotonic() - started:.2f}s "
+                 f"({succeeded} succeeded, {len(outcomes) - succeeded} failed).")
+    return outcomes
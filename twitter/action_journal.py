@@ -0,0 +1,291 @@
+import fcntl
+import logging
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+
+from twitter.action_executor import ACTIONS, execute_actions
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+ACTION_JOURNAL_PATH = "data/twitter_state/actions.journal"
+COMPACT_THRESHOLD = 64 * 1024 * 1024  # bytes of log before it is rewritten on open
+
+# Record: crc32, kind, action, tweet_id, payload length, then the UTF-8 payload (reply text)
+RECORD_HEADER = struct.Struct("<IBBqH")
+# RETRIED marks a transient failure of a planned action; the action stays planned
+PLANNED, DONE, FAILED, RETRIED = 1, 2, 3, 4
+MAX_ATTEMPTS = 5  # executions of a planned action before a transient failure is final
+ACTION_CODES = {name: code for code, name in enumerate(sorted(ACTIONS), start=1)}
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+# API errors meaning the action already happened (favorited, retweeted). 187
+# (duplicate status) is not one of them: replies reuse fixed texts, so it can be
+# raised for a reply that was never posted.
+ALREADY_DONE_CODES = {139, 327}
+
+
+# Serialize one journal record
+def _encode_record(kind, action, tweet_id, payload=b""):
+    body = RECORD_HEADER.pack(0, kind, ACTION_CODES[action], tweet_id, len(payload))[4:] + payload
+    return struct.pack("<I", zlib.crc32(body)) + body
+
+
+class ActionJournal:
+    """
+    Write-ahead journal of Twitter write actions, keyed by (action, tweet_id):
+
+    - plan() drops actions that are already planned, done or repeated within the
+      batch, appends PLANNED records for the rest and fsyncs once per batch;
+    - complete() appends DONE or FAILED records for executed actions, or RETRIED
+      for transient failures, which become FAILED after max_attempts executions;
+    - pending() returns actions that were planned but never finished, which are
+      replayed after a crash or restart.
+
+    Records are small binary entries with a CRC, so a torn write at the end of the
+    log is detected and truncated on open. State lives in a dict, so every lookup
+    is O(1). Large logs are compacted on open to one record per known action.
+
+    Bot processes can share a journal: every read-modify-write holds an flock on
+    <path>.lock and first applies the records other processes appended (or reloads
+    the log if one of them compacted it). Actions another running process planned
+    are left to it; pending() only replays them after a restart.
+    """
+
+    def __init__(self, path=ACTION_JOURNAL_PATH, compact_threshold=COMPACT_THRESHOLD, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.status = {}
+        self.payloads = {}
+        self.attempts = {}  # planned action -> transient failures so far
+        self.in_flight = set()
+        self.foreign = set()  # planned by other running processes
+        self.offset = 0  # bytes of the log applied to the state
+        self.loaded = False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock_file = open(f"{path}.lock", "ab")
+        with self.lock, self._file_lock():
+            if not os.path.exists(self.path):
+                open(self.path, "wb").close()
+            self.log = open(self.path, "ab")
+            self._sync()
+            self.loaded = True
+            logging.info(f"Loaded action journal with {len(self.status)} actions ({len(self.payloads)} unfinished).")
+            if os.path.getsize(self.path) > compact_threshold:
+                self._compact()
+
+    @contextmanager
+    def _file_lock(self):
+        fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _sync(self):
+        """
+        Apply the records appended since the last sync; the caller holds both locks.
+        """
+        if os.stat(self.path).st_ino != os.fstat(self.log.fileno()).st_ino:
+            # Another process compacted the log: reload it from the start
+            self.log.close()
+            self.log = open(self.path, "ab")
+            self.status, self.payloads, self.attempts = {}, {}, {}
+            self.offset = 0
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            crc, kind, action_code, tweet_id, length = RECORD_HEADER.unpack_from(data, offset)
+            end = offset + RECORD_HEADER.size + length
+            if end > len(data) or zlib.crc32(data[offset + 4:end]) != crc or action_code not in ACTION_NAMES:
+                break
+            key = (ACTION_NAMES[action_code], tweet_id)
+            if kind == RETRIED:
+                self.attempts[key] = self.attempts.get(key, 0) + 1
+            elif kind == PLANNED:
+                self.status[key] = kind
+                self.payloads[key] = data[offset + RECORD_HEADER.size:end].decode("utf-8")
+                if self.loaded:
+                    self.foreign.add(key)
+            else:
+                self.status[key] = kind
+                self.payloads.pop(key, None)
+                self.attempts.pop(key, None)
+                self.foreign.discard(key)
+            offset = end
+        if offset < len(data):
+            # Writers hold the file lock, so an incomplete tail is a torn write
+            logging.warning(f"Truncating {len(data) - offset} bytes of incomplete journal records.")
+            with open(self.path, "r+b") as f:
+                f.truncate(self.offset + offset)
+        self.offset += offset
+
+    def _append(self, records):
+        data = b"".join(records)
+        self.log.write(data)
+        self.log.flush()
+        os.fsync(self.log.fileno())
+        self.offset += len(data)
+
+    @staticmethod
+    def _key(action, kwargs):
+        return action, int(kwargs["tweet_id"])
+
+    def plan(self, actions):
+        """
+        Record (action, kwargs) pairs as planned and return the ones that still have
+        to be executed: duplicates and already handled actions are coalesced away.
+        """
+        planned = []
+        records = []
+        with self.lock, self._file_lock():
+            self._sync()
+            for action, kwargs in actions:
+                key = self._key(action, kwargs)
+                if key in self.status:
+                    continue
+                payload = kwargs.get("message", "")
+                self.status[key] = PLANNED
+                self.payloads[key] = payload
+                self.in_flight.add(key)
+                records.append(_encode_record(PLANNED, action, key[1], payload.encode("utf-8")))
+                planned.append((action, kwargs))
+            if records:
+                self._append(records)
+        if len(planned) < len(actions):
+            logging.info(f"Coalesced {len(actions) - len(planned)} duplicate or already handled actions.")
+        return planned
+
+    def complete(self, outcomes):
+        """
+        Record the outcomes of executed actions. Actions the API reports as already
+        done count as done; transient failures stay pending so they are replayed,
+        until an action has been tried max_attempts times.
+        """
+        records = []
+        with self.lock, self._file_lock():
+            self._sync()
+            for outcome in outcomes:
+                key = self._key(outcome["action"], outcome)
+                self.in_flight.discard(key)
+                if outcome["ok"] or outcome.get("api_code") in ALREADY_DONE_CODES:
+                    kind = DONE
+                elif outcome.get("retryable") and self.attempts.get(key, 0) + 1 < self.max_attempts:
+                    self.attempts[key] = self.attempts.get(key, 0) + 1
+                    records.append(_encode_record(RETRIED, key[0], key[1]))
+                    continue
+                else:
+                    kind = FAILED
+                self.status[key] = kind
+                self.payloads.pop(key, None)
+                self.attempts.pop(key, None)
+                records.append(_encode_record(kind, key[0], key[1]))
+            if records:
+                self._append(records)
+
+    def is_handled(self, action, tweet_id):
+        """
+        Return True if the action on this tweet was planned, done or failed before.
+        """
+        return (action, int(tweet_id)) in self.status
+
+    def pending(self):
+        """
+        Return planned but unfinished actions that no caller is executing right now,
+        as (action, kwargs) pairs; they count as in flight until complete().
+        """
+        with self.lock, self._file_lock():
+            self._sync()
+            items = [(key, payload) for key, payload in self.payloads.items()
+                     if key not in self.in_flight and key not in self.foreign]
+            self.in_flight.update(key for key, _ in items)
+        pending = []
+        for (action, tweet_id), payload in items:
+            kwargs = {"tweet_id": tweet_id}
+            if action == "reply":
+                kwargs["message"] = payload
+            pending.append((action, kwargs))
+        return pending
+
+    def compact(self):
+        """
+        Rewrite the log with one record per known action, plus the RETRIED records
+        of planned ones (atomically).
+        """
+        with self.lock, self._file_lock():
+            self._sync()
+            self._compact()
+
+    def _compact(self):
+        records = []
+        for (action, tweet_id), kind in self.status.items():
+            if kind != PLANNED:
+                records.append(_encode_record(kind, action, tweet_id))
+                continue
+            records.append(_encode_record(kind, action, tweet_id,
+                                          self.payloads.get((action, tweet_id), "").encode("utf-8")))
+            records += [_encode_record(RETRIED, action, tweet_id)] * self.attempts.get((action, tweet_id), 0)
+        data = b"".join(records)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.log.close()
+        os.replace(tmp_path, self.path)
+        self.log = open(self.path, "ab")
+        self.offset = len(data)
+        logging.info(f"Compacted action journal to {len(records)} records.")
+
+    def close(self):
+        self.log.close()
+        self.lock_file.close()
+
+
+# Journal shared by the Twitter modules, opened on first use
+_default_journal = None
+_default_journal_lock = threading.Lock()
+
+
+def default_journal():
+    """
+    Return the shared action journal at ACTION_JOURNAL_PATH.
+    """
+    global _default_journal
+    with _default_journal_lock:
+        if _default_journal is None:
+            _default_journal = ActionJournal()
+        return _default_journal
+
+
+def set_default_journal(journal):
+    """
+    Replace the shared action journal (e.g. with one in a temporary directory) and
+    return the previous one.
+    """
+    global _default_journal
+    with _default_journal_lock:
+        previous, _default_journal = _default_journal, journal
+        return previous
+
+
+# Execute actions through the journal
+def execute_journaled_actions(api, actions, journal=None, replay=True):
+    """
+    Plan actions in the journal, execute the ones not handled before (plus, with
+    replay=True, unfinished actions from earlier runs) and record their outcomes.
+    Returns the outcomes of the executed actions.
+    """
+    journal = journal or default_journal()
+    to_run = journal.pending() if replay else []
+    if to_run:
+        logging.info(f"Replaying {len(to_run)} unfinished actions from the journal.")
+    to_run += journal.plan(list(actions))
+    outcomes = execute_actions(api, to_run)
+    journal.complete(outcomes)
+    return outcomes
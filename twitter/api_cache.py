@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from twitter.tweepy_compat import api_method
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+API_CACHE_PATH = "data/twitter_state/api_cache.sqlite"
+# Seconds a cached response is fresh, per endpoint; after that it is served stale
+# (and refreshed in the background) for as long again
+ENDPOINT_TTLS = {
+    "trends/place": 300,
+    "users/show": 900,
+    "account/verify_credentials": 3600,
+}
+DEFAULT_TTL = 300
+FETCH_LOCK_TIMEOUT = 30.0  # seconds before another process may take over a fetch
+POLL_INTERVAL = 0.05  # seconds between checks while another process fetches
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    stale_until REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fetch_locks (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SharedAPICache:
+    """
+    TTL cache for read-only API responses shared by every bot process on the host
+    through a SQLite database (WAL mode, one connection per thread).
+
+    - Fresh entries are returned directly.
+    - Stale entries (past their TTL but within the stale window) are returned at
+      once while one caller refreshes them in the background.
+    - Misses are coalesced: threads of a process wait on a per-key lock, and
+      processes on a row in fetch_locks, so concurrent misses trigger one fetch.
+
+    Values must be JSON-serializable; None results are never cached.
+    """
+
+    def __init__(self, path=API_CACHE_PATH, ttls=None, default_ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttls = {**ENDPOINT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.owner = f"{os.getpid()}-{id(self)}"
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "fetches": 0, "coalesced": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        if not hasattr(self.local, "connection"):
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return self.local.connection
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def _key_lock(self, key):
+        with self.lock:
+            if key not in self.key_locks:
+                self.key_locks[key] = threading.Lock()
+            return self.key_locks[key]
+
+    def _read(self, key):
+        return self._connection().execute(
+            "SELECT value, fetched_at, expires_at, stale_until FROM entries WHERE key = ?", (key,)).fetchone()
+
+    def _write(self, endpoint, key, value):
+        ttl = self.ttls.get(endpoint, self.default_ttl)
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO entries (key, value, fetched_at, expires_at, stale_until) VALUES (?, ?, ?, ?, ?)",
+            (key, json.dumps(value), now, now + ttl, now + 2 * ttl))
+
+    def _try_fetch_lock(self, key):
+        connection = self._connection()
+        now = time.time()
+        connection.execute("DELETE FROM fetch_locks WHERE key = ? AND expires_at < ?", (key, now))
+        cursor = connection.execute("INSERT OR IGNORE INTO fetch_locks (key, owner, expires_at) VALUES (?, ?, ?)",
+                                    (key, self.owner, now + FETCH_LOCK_TIMEOUT))
+        return cursor.rowcount == 1
+
+    def _release_fetch_lock(self, key):
+        self._connection().execute("DELETE FROM fetch_locks WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def _fetch_and_store(self, endpoint, key, fetch):
+        try:
+            value = fetch()
+            self._count("fetches")
+            if value is not None:
+                self._write(endpoint, key, value)
+            return value
+        finally:
+            self._release_fetch_lock(key)
+
+    def _refresh_in_background(self, endpoint, key, fetch):
+        def refresh():
+            try:
+                self._fetch_and_store(endpoint, key, fetch)
+            except Exception as e:
+                logging.error(f"Error refreshing cached {endpoint} response: {e}")
+
+        threading.Thread(target=refresh, name="api-cache-refresh", daemon=True).start()
+
+    def get_or_fetch(self, endpoint, params, fetch):
+        """
+        Return the cached response of endpoint for params, calling fetch() only when
+        no usable entry exists (or, for stale entries, in the background).
+        """
+        key = f"{endpoint}:{json.dumps(params, sort_keys=True, default=str)}"
+        row = self._read(key)
+        now = time.time()
+        if row is not None and now < row[2]:
+            self._count("hits")
+            return json.loads(row[0])
+        if row is not None and now < row[3]:
+            self._count("stale_hits")
+            if self._try_fetch_lock(key):
+                self._refresh_in_background(endpoint, key, fetch)
+            return json.loads(row[0])
+
+        started = time.time()
+        with self._key_lock(key):
+            # Another thread of this process may have fetched while we waited
+            row = self._read(key)
+            if row is not None and row[1] >= started:
+                self._count("coalesced")
+                return json.loads(row[0])
+            self._count("misses")
+            deadline = time.time() + FETCH_LOCK_TIMEOUT
+            while not self._try_fetch_lock(key):
+                # Another process is fetching: wait for its result
+                time.sleep(POLL_INTERVAL)
+                row = self._read(key)
+                if row is not None and row[1] >= started:
+                    self._count("coalesced")
+                    return json.loads(row[0])
+                if time.time() > deadline:
+                    break
+            return self._fetch_and_store(endpoint, key, fetch)
+
+
+# Process-wide cache instance, created on first use
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_api_cache():
+    """
+    Return the shared API cache at API_CACHE_PATH.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SharedAPICache()
+        return _default_cache
+
+
+# Cached read-only API calls
+def cached_trend_names(api, woeid):
+    """
+    Return the trending topic names for a WOEID through the shared cache.
+    """
+    return default_api_cache().get_or_fetch(
+        "trends/place", {"woeid": woeid}, lambda: [trend["name"] for trend in api_method(api, "trends_place")(woeid)[0]["trends"]])
+
+
+def cached_user(api, user_handle):
+    """
+    Return basic profile fields of a user (id, screen_name and counts) through the shared cache.
+    """
+    def fetch():
+        user = api.get_user(screen_name=user_handle)
+        return {"id": user.id, "screen_name": user.screen_name, "followers_count": user.followers_count,
+                "friends_count": user.friends_count, "statuses_count": user.statuses_count}
+
+    return default_api_cache().get_or_fetch("users/show", {"screen_name": user_handle.lower()}, fetch)
+
+
+def cached_verify_credentials(api, account_key):
+    """
+    Return the authenticated account's id and screen name through the shared cache,
+    or None when the credentials are rejected (failures are not cached).
+    """
+    def fetch():
+        user = api.verify_credentials()
+        return {"id": user.id, "screen_name": user.screen_name} if user else None
+
+    # Only a digest of the credential is stored in the cache
+    account = hashlib.sha256(str(account_key).encode("utf-8")).hexdigest()[:16]
+    return default_api_cache().get_or_fetch("account/verify_credentials", {"account": account}, fetch)
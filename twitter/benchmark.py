@@ -0,0 +1,121 @@
+import pandas as pd
+import tweepy
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Make the repository root importable when run as a script, not only with python -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from twitter import action_executor
+from twitter.action_journal import ActionJournal, set_default_journal
+from twitter.fake_api import DEFAULT_FAKE_CONFIG, FakeTwitterAPI, start_fake_server
+from twitter.poll_state import PollState
+from twitter.tweet_handler import filter_and_interact, monitor_hashtag
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Server limits high enough that a benchmark run measures throughput, not waiting
+BENCHMARK_FAKE_CONFIG = {
+    "rate_limits": {endpoint: 100000 for endpoint in DEFAULT_FAKE_CONFIG["rate_limits"]},
+}
+# Client-side action limits for benchmark runs (the production ones allow a few actions per minute)
+BENCHMARK_ACTION_LIMITS = {
+    endpoint: {"concurrency": 8, "rate": 10000.0, "burst": 1000}
+    for endpoint in action_executor.ENDPOINT_LIMITS
+}
+
+
+# Temporarily replace the executor's per-endpoint limits
+@contextmanager
+def action_limits(limits):
+    saved = dict(action_executor.ENDPOINT_LIMITS)
+    action_executor.ENDPOINT_LIMITS.update(limits)
+    try:
+        yield
+    finally:
+        action_executor.ENDPOINT_LIMITS.clear()
+        action_executor.ENDPOINT_LIMITS.update(saved)
+
+
+# Temporarily journal actions in another file
+@contextmanager
+def journal_at(path):
+    journal = ActionJournal(path)
+    previous = set_default_journal(journal)
+    try:
+        yield journal
+    finally:
+        set_default_journal(previous)
+        journal.close()
+
+
+# Summarize one timed scenario
+def _scenario_row(scenario, n_tweets, outcomes, seconds):
+    succeeded = sum(outcome["ok"] for outcome in outcomes)
+    return {
+        "scenario": scenario,
+        "tweets": n_tweets,
+        "actions": len(outcomes),
+        "failed_actions": len(outcomes) - succeeded,
+        "seconds": seconds,
+        "tweets_per_second": n_tweets / seconds if seconds else 0.0,
+        "actions_per_second": len(outcomes) / seconds if seconds else 0.0,
+    }
+
+
+# Run monitor_hashtag and filter_and_interact against the fake API
+def run_benchmark(count=1000, config=None, limits=None, hashtag="recovery"):
+    """
+    Start a fake Twitter API, run monitor_hashtag and filter_and_interact end to end
+    against it and return a DataFrame of tweets/sec and actions/sec per scenario.
+    config overrides DEFAULT_FAKE_CONFIG (latency, error rate, rate limits) and
+    limits overrides the executor's per-endpoint limits.
+    """
+    server = start_fake_server({**BENCHMARK_FAKE_CONFIG, "search_results": count, **(config or {})})
+    api = FakeTwitterAPI(server.base_url)
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as state_dir, action_limits(limits or BENCHMARK_ACTION_LIMITS), \
+                journal_at(os.path.join(state_dir, "actions.journal")):
+            state = PollState(state_dir)
+            started = time.perf_counter()
+            outcomes = monitor_hashtag(api, hashtag, count=count, state=state)
+            rows.append(_scenario_row("monitor_hashtag", len(state.processed_ids), outcomes,
+                                      time.perf_counter() - started))
+
+            # A second poll finds nothing new: measures the checkpoint fast path
+            started = time.perf_counter()
+            outcomes = monitor_hashtag(api, hashtag, count=count, state=state)
+            rows.append(_scenario_row("monitor_hashtag (repeat poll)", 0, outcomes, time.perf_counter() - started))
+
+            tweets = list(tweepy.Cursor(api.search_tweets, q=f"#{hashtag}-interact", count=100).items(count))
+            started = time.perf_counter()
+            outcomes = filter_and_interact(api, tweets)
+            rows.append(_scenario_row("filter_and_interact", len(tweets), outcomes, time.perf_counter() - started))
+        stats = api.server_stats()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    report = pd.DataFrame(rows)
+    logging.info(f"Benchmark results:\n{report.to_string(index=False)}")
+    logging.info(f"Fake API requests per endpoint:\n{pd.DataFrame(stats).T.to_string()}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Twitter modules against a local fake API.")
+    parser.add_argument("--count", type=int, default=1000, help="tweets returned by the hashtag search")
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_FAKE_CONFIG["latency_ms"])
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of actions answered with 503")
+    args = parser.parse_args()
+    run_benchmark(count=args.count, config={"latency_ms": args.latency_ms, "error_rate": args.error_rate})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+import numpy as np
+import tweepy
+import requests
+import json
+import logging
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from config.settings import DEFAULT_HOST
+from twitter.tweepy_compat import error_for_response
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Server behaviour: latency (mean and jitter, ms), probability of an injected 503 per action (POST),
+# tweets returned per search query and rate-limit windows per endpoint
+DEFAULT_FAKE_CONFIG = {
+    "latency_ms": 50.0,
+    "latency_jitter_ms": 20.0,
+    "error_rate": 0.0,
+    "search_results": 1000,
+    "followers": 20000,
+    "window_seconds": 15 * 60,
+    "rate_limits": {
+        "search/tweets": 180,
+        "statuses/user_timeline": 900,
+        "favorites/create": 1000,
+        "statuses/retweet": 300,
+        "statuses/update": 300,
+        "trends/place": 75,
+        "followers/ids": 15,
+        "friends/ids": 15,
+        "users/lookup": 900,
+        "users/show": 900,
+        "account/verify_credentials": 75,
+    },
+    "seed": 42,
+}
+
+TWEET_TEMPLATES = [
+    "Day {n} of recovery and I feel great, thank you all! https://t.co/{n} #recovery",
+    "Really bad night, cravings are awful @friend{n} #recovery",
+    "Meeting at 7pm tonight, room {n} #recovery",
+    "So happy and proud of this community!!! www.example.com/{n}",
+    "Everything feels hopeless today... #recovery",
+]
+TWITTER_TIME_FORMAT = "%a %b %d %H:%M:%S +0000 %Y"
+
+
+class FakeTwitterState:
+    """
+    Shared state of the fake API: deterministic tweet and user data, rate-limit
+    windows, performed actions and request statistics.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.rng = np.random.default_rng(config["seed"])
+        self.epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.windows = {}
+        self.favorited = set()
+        self.retweeted = set()
+        self.next_status_id = 10 ** 15
+        self.stats = {}
+
+    def tweet(self, tweet_id, user_id=None):
+        n = int(tweet_id)
+        user_id = user_id or 1000 + n % 5000
+        return {
+            "id": n,
+            "id_str": str(n),
+            "created_at": (self.epoch + timedelta(seconds=n % 10 ** 7)).strftime(TWITTER_TIME_FORMAT),
+            "full_text": TWEET_TEMPLATES[n % len(TWEET_TEMPLATES)].format(n=n),
+            "text": TWEET_TEMPLATES[n % len(TWEET_TEMPLATES)].format(n=n),
+            "favorite_count": n % 97,
+            "retweet_count": n % 13,
+            "user": self.user(user_id),
+        }
+
+    def user(self, user_id, screen_name=None):
+        user_id = int(user_id)
+        return {
+            "id": user_id,
+            "id_str": str(user_id),
+            "screen_name": screen_name or f"user{user_id}",
+            "followers_count": (user_id * 7919) % 20000,
+            "friends_count": (user_id * 104729) % 3000,
+            "statuses_count": user_id % 10000,
+            "status": {"id": user_id * 1000, "id_str": str(user_id * 1000), "text": "latest"},
+        }
+
+    def take_quota(self, endpoint):
+        """
+        Count a request against the endpoint's window; return (allowed, headers).
+        """
+        limit = self.config["rate_limits"].get(endpoint, 1000)
+        window_seconds = self.config["window_seconds"]
+        now = time.time()
+        with self.lock:
+            window = self.windows.get(endpoint)
+            if window is None or now >= window["reset"]:
+                window = {"remaining": limit, "reset": int(now + window_seconds)}
+                self.windows[endpoint] = window
+            allowed = window["remaining"] > 0
+            if allowed:
+                window["remaining"] -= 1
+            stats = self.stats.setdefault(endpoint, {"requests": 0, "rate_limited": 0, "errors": 0})
+            stats["requests"] += 1
+            stats["rate_limited"] += int(not allowed)
+        headers = {"x-rate-limit-limit": str(limit), "x-rate-limit-remaining": str(window["remaining"]),
+                   "x-rate-limit-reset": str(window["reset"])}
+        return allowed, headers
+
+
+class FakeTwitterHandler(BaseHTTPRequestHandler):
+    """
+    Request handler serving v1.1-shaped JSON for the endpoints the Twitter modules use.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, code, message, headers=None):
+        self._send(status, {"errors": [{"code": code, "message": message}]}, headers)
+
+    def _handle(self, method):
+        state = self.server.state
+        config = state.config
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if method == "POST":
+            length = int(self.headers.get("Content-Length", 0) or 0)
+            if length:
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                params.update({key: values[-1] for key, values in form.items()})
+
+        if url.path == "/_stats":
+            with state.lock:
+                return self._send(200, state.stats)
+
+        parts = [part for part in url.path.split("/") if part][1:]
+        if parts:
+            parts[-1] = parts[-1].rsplit(".", 1)[0]
+        resource_id = parts.pop() if parts and parts[-1].isdigit() else None
+        endpoint = "/".join(parts)
+
+        with state.lock:
+            latency = max(0.0, config["latency_ms"] + state.rng.normal(0, config["latency_jitter_ms"])) / 1000.0
+            # Errors are injected into actions (POSTs), the calls the executor retries
+            inject_error = self.command == "POST" and state.rng.random() < config["error_rate"]
+        time.sleep(latency)
+
+        allowed, headers = state.take_quota(endpoint)
+        if not allowed:
+            return self._error(429, 88, "Rate limit exceeded", headers)
+        if inject_error:
+            with state.lock:
+                state.stats[endpoint]["errors"] += 1
+            return self._error(503, 130, "Over capacity", headers)
+
+        try:
+            payload = self._respond(state, endpoint, resource_id, params)
+        except KeyError as e:
+            return self._error(400, 44, f"Missing parameter {e}", headers)
+        if payload is None:
+            return self._error(404, 34, "Sorry, that page does not exist", headers)
+        if isinstance(payload, tuple):
+            return self._error(403, payload[0], payload[1], headers)
+        self._send(200, payload, headers)
+
+    def _respond(self, state, endpoint, resource_id, params):
+        config = state.config
+        count = int(params.get("count", 20))
+        page = int(params.get("page", 1))
+        since_id = int(params.get("since_id", 0) or 0)
+
+        if endpoint in ("search/tweets", "statuses/user_timeline"):
+            # Newest first: result k of the query has id base - k
+            key = params.get("q", params.get("screen_name", ""))
+            base = 10 ** 12 + (zlib.crc32(key.encode("utf-8")) % 10 ** 6) * 10 ** 4
+            start = (page - 1) * count
+            stop = min(page * count, config["search_results"])
+            statuses = [state.tweet(base - k) for k in range(start, stop) if base - k > since_id]
+            return {"statuses": statuses, "search_metadata": {"count": count}} if endpoint == "search/tweets" \
+                else statuses
+        if endpoint == "favorites/create":
+            tweet_id = int(params["id"])
+            with state.lock:
+                if tweet_id in state.favorited:
+                    return (139, "You have already favorited this status.")
+                state.favorited.add(tweet_id)
+            return state.tweet(tweet_id)
+        if endpoint == "statuses/retweet":
+            tweet_id = int(resource_id or params["id"])
+            with state.lock:
+                if tweet_id in state.retweeted:
+                    return (327, "You have already retweeted this Tweet.")
+                state.retweeted.add(tweet_id)
+            return state.tweet(tweet_id)
+        if endpoint == "statuses/update":
+            with state.lock:
+                state.next_status_id += 1
+                status = state.tweet(state.next_status_id)
+            status["full_text"] = status["text"] = params["status"]
+            status["in_reply_to_status_id"] = int(params.get("in_reply_to_status_id", 0) or 0) or None
+            return status
+        if endpoint == "trends/place":
+            return [{"trends": [{"name": f"#trend{i}", "tweet_volume": 1000 * (50 - i)} for i in range(50)],
+                     "locations": [{"woeid": int(params.get("id", 1))}]}]
+        if endpoint in ("followers/ids", "friends/ids"):
+            total = config["followers"]
+            cursor = int(params.get("cursor", -1))
+            start = 0 if cursor == -1 else cursor
+            stop = min(start + 5000, total)
+            return {"ids": list(range(start + 1, stop + 1)), "next_cursor": stop if stop < total else 0,
+                    "previous_cursor": 0}
+        if endpoint == "users/lookup":
+            return [state.user(user_id) for user_id in params["user_id"].split(",") if user_id]
+        if endpoint == "users/show":
+            screen_name = params.get("screen_name")
+            return state.user(params.get("user_id") or zlib.crc32(screen_name.encode("utf-8")) % 10 ** 6, screen_name)
+        if endpoint == "account/verify_credentials":
+            return state.user(1, "impetus_bot")
+        return None
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+# Start the fake API in a background thread
+def start_fake_server(config=None, host=DEFAULT_HOST, port=0):
+    """
+    Start the fake Twitter API on host:port (port 0 picks a free port) and return the
+    server; its base URL is server.base_url. Call server.shutdown() to stop it.
+    """
+    config = {**DEFAULT_FAKE_CONFIG, **(config or {})}
+    server = ThreadingHTTPServer((host, port), FakeTwitterHandler)
+    server.daemon_threads = True
+    server.state = FakeTwitterState(config)
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="fake-twitter-api", daemon=True).start()
+    logging.info(f"Fake Twitter API listening on {server.base_url}.")
+    return server
+
+
+class FakeTwitterAPI:
+    """
+    Minimal stand-in for tweepy.API that talks to the fake server over plain HTTP.
+    It exposes the methods the Twitter modules call, returns tweepy model objects,
+    raises tweepy errors for error responses and sets last_response like tweepy.
+    Timeline and search use page-based pagination, which tweepy.Cursor supports.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.local = threading.local()
+        self.last_response = None
+
+    def _session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _request(self, method, endpoint, params=None):
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        response = self._session().request(method, f"{self.base_url}/1.1/{endpoint}.json",
+                                           params=params if method == "GET" else None,
+                                           data=params if method == "POST" else None, timeout=self.timeout)
+        self.last_response = response
+        if response.status_code != 200:
+            raise error_for_response(response)
+        return response.json()
+
+    def search_tweets(self, q, count=100, page=1, since_id=None, **kwargs):
+        payload = self._request("GET", "search/tweets", {"q": q, "count": count, "page": page, "since_id": since_id})
+        return [tweepy.models.Status.parse(self, status) for status in payload["statuses"]]
+
+    def user_timeline(self, screen_name, count=20, page=1, since_id=None, **kwargs):
+        payload = self._request("GET", "statuses/user_timeline",
+                                {"screen_name": screen_name, "count": count, "page": page, "since_id": since_id})
+        return [tweepy.models.Status.parse(self, status) for status in payload]
+
+    search_tweets.pagination_mode = "page"
+    user_timeline.pagination_mode = "page"
+
+    def create_favorite(self, id):
+        return tweepy.models.Status.parse(self, self._request("POST", "favorites/create", {"id": id}))
+
+    def retweet(self, id):
+        return tweepy.models.Status.parse(self, self._request("POST", f"statuses/retweet/{id}"))
+
+    def update_status(self, status, in_reply_to_status_id=None, media_ids=None, **kwargs):
+        media_ids = ",".join(map(str, media_ids)) if media_ids else None
+        payload = self._request("POST", "statuses/update", {"status": status, "media_ids": media_ids,
+                                                            "in_reply_to_status_id": in_reply_to_status_id})
+        return tweepy.models.Status.parse(self, payload)
+
+    def trends_place(self, id, **kwargs):
+        return self._request("GET", "trends/place", {"id": id})
+
+    def followers_ids(self, screen_name, cursor=-1, **kwargs):
+        payload = self._request("GET", "followers/ids", {"screen_name": screen_name, "cursor": cursor})
+        return payload["ids"], (payload["previous_cursor"], payload["next_cursor"])
+
+    def friends_ids(self, screen_name, cursor=-1, **kwargs):
+        payload = self._request("GET", "friends/ids", {"screen_name": screen_name, "cursor": cursor})
+        return payload["ids"], (payload["previous_cursor"], payload["next_cursor"])
+
+    def lookup_users(self, user_ids, **kwargs):
+        payload = self._request("GET", "users/lookup", {"user_id": ",".join(map(str, user_ids))})
+        return [tweepy.models.User.parse(self, user) for user in payload]
+
+    def get_user(self, screen_name=None, user_id=None, **kwargs):
+        payload = self._request("GET", "users/show", {"screen_name": screen_name, "user_id": user_id})
+        return tweepy.models.User.parse(self, payload)
+
+    def verify_credentials(self, **kwargs):
+        return tweepy.models.User.parse(self, self._request("GET", "account/verify_credentials"))
+
+    def server_stats(self):
+        """
+        Return the fake server's per-endpoint request, rate-limit and error counts.
+        """
+        return self._session().get(f"{self.base_url}/_stats", timeout=self.timeout).json()
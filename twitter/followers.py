@@ -0,0 +1,237 @@
+import pandas as pd
+import numpy as np
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from twitter.rate_limits import default_scheduler
+from twitter.tweepy_compat import TweepError, api_method, lookup_users_kwargs
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROFILE_CACHE_PATH = "data/twitter_state/profiles.pkl"
+PROFILE_TTL = 6 * 3600  # seconds a cached profile stays fresh
+LOOKUP_BATCH_SIZE = 100  # users per users/lookup request (API maximum)
+PREFETCH_PAGES = 2  # id pages fetched ahead of hydration
+LOOKUP_WORKERS = 4
+INFLUENCE_THRESHOLD = 5000  # followers needed to count as high-influence
+
+PROFILE_COLUMNS = {
+    "id": np.int64,
+    "screen_name": object,
+    "followers_count": np.int64,
+    "friends_count": np.int64,
+    "statuses_count": np.int64,
+    "status_id": np.float64,  # latest tweet id (NaN when unknown)
+    "fetched_at": np.float64,
+}
+
+
+# Convert tweepy User objects to a profile table
+def users_to_frame(users, fetched_at=None):
+    """
+    Return a profile DataFrame (PROFILE_COLUMNS) built column-wise from tweepy Users.
+    """
+    users = list(users)
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    statuses = [getattr(user, "status", None) for user in users]
+    frame = pd.DataFrame({
+        "id": np.fromiter((user.id for user in users), dtype=np.int64, count=len(users)),
+        "screen_name": pd.Series([user.screen_name for user in users], dtype=object),
+        "followers_count": np.fromiter((user.followers_count for user in users), dtype=np.int64, count=len(users)),
+        "friends_count": np.fromiter((user.friends_count for user in users), dtype=np.int64, count=len(users)),
+        "statuses_count": np.fromiter((user.statuses_count for user in users), dtype=np.int64, count=len(users)),
+        "status_id": np.array([status.id if status is not None else np.nan for status in statuses], dtype=np.float64),
+        "fetched_at": np.full(len(users), fetched_at, dtype=np.float64),
+    })
+    return frame
+
+
+class ProfileCache:
+    """
+    Local table of user profiles with a TTL, indexed by user id. New profiles are
+    buffered and merged into the table lazily, so adding many small batches stays
+    linear. The table is saved to a pickle file and loaded from it on first use.
+    """
+
+    def __init__(self, path=PROFILE_CACHE_PATH, ttl=PROFILE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.pending = []
+        self.table = None
+
+    def _load(self):
+        self.table = pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in PROFILE_COLUMNS.items()}).set_index("id")
+        if self.path and os.path.exists(self.path):
+            self.table = pd.read_pickle(self.path)
+            logging.info(f"Loaded {len(self.table)} cached profiles from {self.path}.")
+
+    def _consolidate(self):
+        if self.table is None:
+            self._load()
+        if self.pending:
+            merged = pd.concat([self.table.reset_index()] + self.pending, ignore_index=True)
+            self.table = merged.drop_duplicates("id", keep="last").set_index("id")
+            self.pending = []
+        return self.table
+
+    def put(self, frame):
+        """
+        Add or refresh profiles from a profile DataFrame (see users_to_frame).
+        """
+        if len(frame):
+            with self.lock:
+                self.pending.append(frame)
+
+    def fresh(self, now=None):
+        """
+        Return the profiles fetched less than ttl seconds ago.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            table = self._consolidate()
+        return table[table["fetched_at"] > now - self.ttl]
+
+    def missing(self, user_ids):
+        """
+        Return the user ids that have no fresh profile in the cache.
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        return user_ids[~np.isin(user_ids, self.fresh().index.to_numpy())]
+
+    def get(self, user_ids):
+        """
+        Return the fresh cached profiles of the given user ids.
+        """
+        fresh = self.fresh()
+        return fresh[fresh.index.isin(np.asarray(user_ids, dtype=np.int64))]
+
+    def by_screen_name(self, screen_name):
+        """
+        Return a fresh profile row for a screen name, or None.
+        """
+        fresh = self.fresh()
+        matches = fresh[fresh["screen_name"].str.lower() == screen_name.lower()]
+        return matches.iloc[-1] if len(matches) else None
+
+    def save(self):
+        """
+        Write the table to the cache file (atomically).
+        """
+        if not self.path:
+            return
+        with self.lock:
+            table = self._consolidate()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        table.to_pickle(tmp_path)
+        os.replace(tmp_path, self.path)
+
+
+# Call an API method under the shared rate-limit scheduler
+def _scheduled_call(api, endpoint, method, **kwargs):
+    default_scheduler.acquire(endpoint)
+    try:
+        return method(**kwargs)
+    finally:
+        default_scheduler.observe(getattr(api, "last_response", None))
+
+
+# Walk the follower or friend id cursor
+def iter_id_pages(api, user_handle, kind="followers"):
+    """
+    Yield pages of up to 5000 user ids from followers/ids or friends/ids, following
+    next_cursor until the list is complete.
+    """
+    method = api_method(api, "followers_ids" if kind == "followers" else "friends_ids")
+    endpoint = f"{kind}/ids"
+    cursor = -1
+    while cursor:
+        ids, (_, cursor) = _scheduled_call(api, endpoint, method, screen_name=user_handle, cursor=cursor)
+        yield np.asarray(ids, dtype=np.int64)
+
+
+# Prefetch pages from a generator in a background thread
+def _prefetch(pages, depth):
+    """
+    Yield the items of a generator while a background thread fetches up to depth
+    items ahead of the consumer.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+    errors = []
+
+    def produce():
+        try:
+            for page in pages:
+                buffer.put(page)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            buffer.put(done)
+
+    threading.Thread(target=produce, name="id-page-prefetch", daemon=True).start()
+    while True:
+        page = buffer.get()
+        if page is done:
+            break
+        yield page
+    if errors:
+        raise errors[0]
+
+
+# Hydrate user ids into profiles
+def _lookup_profiles(api, user_ids):
+    users = _scheduled_call(api, "users/lookup", api.lookup_users, **lookup_users_kwargs(api, user_ids.tolist()))
+    return users_to_frame(users)
+
+
+# Enumerate a user's followers or friends with their profiles
+def fetch_profiles(api, user_handle, kind="followers", cache=None, prefetch=PREFETCH_PAGES,
+                   lookup_workers=LOOKUP_WORKERS):
+    """
+    Return the complete follower (or friend) list of a user as a profile DataFrame.
+    Id pages are prefetched in the background while earlier pages are hydrated with
+    concurrent users/lookup calls; profiles that are fresh in the cache are not
+    looked up again.
+    """
+    cache = cache if cache is not None else default_profile_cache
+    logging.info(f"Enumerating {kind} of @{user_handle}...")
+    all_ids = []
+    with ThreadPoolExecutor(max_workers=lookup_workers, thread_name_prefix="users-lookup") as executor:
+        lookups = []
+        for ids in _prefetch(iter_id_pages(api, user_handle, kind), prefetch):
+            all_ids.append(ids)
+            missing = cache.missing(ids)
+            for start in range(0, missing.size, LOOKUP_BATCH_SIZE):
+                lookups.append(executor.submit(_lookup_profiles, api, missing[start:start + LOOKUP_BATCH_SIZE]))
+        for lookup in lookups:
+            try:
+                cache.put(lookup.result())
+            except TweepError as e:
+                logging.error(f"Error looking up profiles: {e}")
+
+    all_ids = np.concatenate(all_ids) if all_ids else np.empty(0, dtype=np.int64)
+    cache.save()
+    profiles = cache.get(all_ids)
+    logging.info(f"@{user_handle} has {all_ids.size} {kind}; {len(profiles)} profiles available "
+                 f"({len(lookups)} lookups made).")
+    return profiles
+
+
+# Vectorized high-influence filter over a profile table
+def high_influence(profiles, min_followers=INFLUENCE_THRESHOLD):
+    """
+    Return the profiles with more than min_followers followers, most followed first.
+    """
+    return profiles[profiles["followers_count"].to_numpy() > min_followers].sort_values(
+        "followers_count", ascending=False)
+
+
+# Shared profile cache used by the Twitter modules
+default_profile_cache = ProfileCache()
@@ -0,0 +1,252 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from twitter.tweepy_compat import TweepError
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: without it images are uploaded as they are
+    Image = None
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MEDIA_CACHE_PATH = "data/twitter_state/media_ids.json"
+MAX_IMAGE_SIDE = 2048  # pixels; larger images are downscaled before upload
+JPEG_QUALITY = 85
+CHUNKED_THRESHOLD = 5 * 1024 * 1024  # bytes; larger files use the chunked upload flow
+MEDIA_ID_TTL = 23 * 3600  # seconds; uploaded media ids expire after 24 hours, keep a margin
+PREPROCESS_WORKERS = 4
+UPLOAD_WORKERS = 3  # uploads in flight at once
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".mov"}
+
+
+# Downscale and re-encode an image
+def prepare_media(name, data, max_side=MAX_IMAGE_SIDE):
+    """
+    Return (file name, bytes, media category) ready for upload. Still images larger
+    than max_side are downscaled (JPEGs re-encoded at JPEG_QUALITY, PNG charts kept
+    lossless); GIFs, videos and, without Pillow, all files are passed through as-is.
+    """
+    extension = os.path.splitext(name)[1].lower()
+    if extension in VIDEO_EXTENSIONS:
+        return name, data, "tweet_video"
+    if extension == ".gif":
+        return name, data, "tweet_gif"
+    if Image is None or extension not in IMAGE_EXTENSIONS:
+        return name, data, "tweet_image"
+
+    with Image.open(io.BytesIO(data)) as image:
+        if max(image.size) <= max_side:
+            return name, data, "tweet_image"
+        image.thumbnail((max_side, max_side))
+        output = io.BytesIO()
+        if extension == ".png":
+            image.save(output, format="PNG", optimize=True)
+        else:
+            image.convert("RGB").save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            name = os.path.splitext(name)[0] + ".jpg"
+    return name, output.getvalue(), "tweet_image"
+
+
+# Chain a function onto a future without blocking a worker
+def _then(future, executor, function):
+    """
+    Return a Future for function(future.result()) run on executor once future is done.
+    """
+    chained = Future()
+
+    def forward(done):
+        if done.exception() is not None:
+            chained.set_exception(done.exception())
+        else:
+            chained.set_result(done.result())
+
+    def submit(done):
+        if done.exception() is not None:
+            chained.set_exception(done.exception())
+        else:
+            executor.submit(function, done.result()).add_done_callback(forward)
+
+    future.add_done_callback(submit)
+    return chained
+
+
+class MediaIdCache:
+    """
+    Media ids of uploaded files keyed by a SHA-256 of their content, kept until they
+    expire and persisted to a JSON file.
+    """
+
+    def __init__(self, path=MEDIA_CACHE_PATH, ttl=MEDIA_ID_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def get(self, digest):
+        with self.lock:
+            entry = self.entries.get(digest)
+        if entry is not None and entry["expires_at"] > time.time():
+            return entry["media_id"]
+        return None
+
+    def put(self, digest, media_id, expires_after=None):
+        ttl = min(self.ttl, expires_after) if expires_after else self.ttl
+        now = time.time()
+        with self.lock:
+            self.entries = {key: entry for key, entry in self.entries.items() if entry["expires_at"] > now}
+            self.entries[digest] = {"media_id": media_id, "expires_at": now + ttl}
+            entries = dict(self.entries)
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+
+
+class MediaPipeline:
+    """
+    Pipelined media posting. Files are hashed and preprocessed in one thread pool
+    and uploaded in another (UPLOAD_WORKERS uploads in flight, chunked above
+    CHUNKED_THRESHOLD), so uploads for one post overlap preparing the next. Media ids
+    are cached by content hash and identical files being uploaded concurrently share
+    one upload.
+
+        with MediaPipeline(api) as pipeline:
+            futures = [pipeline.post(message, paths) for message, paths in scheduled_posts]
+    """
+
+    def __init__(self, api, cache=None, preprocess_workers=PREPROCESS_WORKERS, upload_workers=UPLOAD_WORKERS):
+        self.api = api
+        self.cache = cache if cache is not None else MediaIdCache()
+        self.preprocess_pool = ThreadPoolExecutor(max_workers=preprocess_workers, thread_name_prefix="media-prep")
+        self.upload_pool = ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix="media-upload")
+        self.post_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="media-post")
+        self.lock = threading.Lock()
+        self.in_flight = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Wait for submitted posts to finish and stop the worker threads.
+        """
+        self.preprocess_pool.shutdown(wait=True)
+        self.upload_pool.shutdown(wait=True)
+        self.post_pool.shutdown(wait=True)
+
+    def _prepare(self, media_path):
+        with open(media_path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        media_id = self.cache.get(digest)
+        if media_id is not None:
+            return digest, media_id, None
+        return digest, None, prepare_media(os.path.basename(media_path), data)
+
+    def _upload(self, prepared):
+        digest, media_id, media = prepared
+        if media_id is not None:
+            logging.info(f"Reusing media id {media_id} for identical content.")
+            return media_id
+        with self.lock:
+            shared = self.in_flight.get(digest)
+            if shared is None:
+                shared = self.in_flight[digest] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return shared.result()
+
+        try:
+            name, data, category = media
+            chunked = len(data) > CHUNKED_THRESHOLD or category != "tweet_image"
+            started = time.monotonic()
+            uploaded = self.api.media_upload(name, file=io.BytesIO(data), chunked=chunked, media_category=category)
+            media_id = uploaded.media_id
+            self.cache.put(digest, media_id, getattr(uploaded, "expires_after_secs", None))
+            logging.info(f"Uploaded {name} ({len(data)} bytes{', chunked' if chunked else ''}) "
+                         f"in {time.monotonic() - started:.2f}s.")
+            shared.set_result(media_id)
+            return media_id
+        except Exception as e:
+            shared.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(digest, None)
+
+    def upload(self, media_path):
+        """
+        Return a Future for the media id of a file (preprocessed, then uploaded).
+        """
+        return _then(self.preprocess_pool.submit(self._prepare, media_path), self.upload_pool, self._upload)
+
+    def post(self, message, media_paths):
+        """
+        Queue a tweet with media and return a Future for the posted status. Posts go
+        out in submission order once all their media are uploaded.
+        """
+        uploads = [self.upload(path) for path in media_paths]
+
+        def publish():
+            media_ids = [upload.result() for upload in uploads]
+            status = self.api.update_status(status=message, media_ids=media_ids)
+            logging.info("Tweet with media posted successfully.")
+            return status
+
+        return self.post_pool.submit(publish)
+
+
+# Pipelines shared by post_media_tweets, one per API client, started on first use
+_default_pipelines = {}
+_default_pipelines_lock = threading.Lock()
+
+
+def default_pipeline(api):
+    """
+    Return the shared MediaPipeline for an API client, so posting reuses its
+    worker threads instead of starting and stopping three pools per call.
+    """
+    with _default_pipelines_lock:
+        pipeline = _default_pipelines.get(id(api))
+        if pipeline is None or pipeline.api is not api:
+            pipeline = _default_pipelines[id(api)] = MediaPipeline(api)
+        return pipeline
+
+
+# Post several tweets with media through one pipeline
+def post_media_tweets(api, posts, pipeline=None):
+    """
+    Post (message, media paths) pairs with preprocessing, uploads and posting
+    overlapped, through the shared pipeline of api unless one is given. Returns
+    the posted statuses (None for posts that failed, e.g. an unreadable image).
+    """
+    pipeline = pipeline or default_pipeline(api)
+    statuses = []
+    futures = [pipeline.post(message, media_paths) for message, media_paths in posts]
+    for future in futures:
+        try:
+            statuses.append(future.result())
+        except (TweepError, OSError) as e:
+            logging.error(f"Error posting tweet with media: {e}")
+            statuses.append(None)
+    return statuses
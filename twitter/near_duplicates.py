@@ -0,0 +1,156 @@
+import numpy as np
+import logging
+import threading
+import time
+import zlib
+from collections import deque
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+NUM_PERM = 64  # MinHash permutations per signature
+BANDS = 16  # LSH bands of NUM_PERM // BANDS rows each
+SHINGLE_SIZE = 5  # characters per shingle
+SIMILARITY_THRESHOLD = 0.7  # estimated Jaccard similarity that counts as a near duplicate
+DUPLICATE_WINDOW = 6 * 3600  # seconds a tweet suppresses its near duplicates
+MAX_ENTRIES = 50_000  # signatures kept in memory (about 13 MB at NUM_PERM=64)
+
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MASK = np.uint64(0xFFFFFFFF)
+
+
+# Hash the character shingles of a text
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """
+    Return the CRC32 hashes of the distinct character shingles of a lowercased,
+    whitespace-normalized text (the whole text if it is shorter than a shingle).
+    """
+    text = " ".join(text.lower().split())
+    shingles = {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+                       dtype=np.uint64, count=len(shingles))
+
+
+class NearDuplicateDetector:
+    """
+    Streaming near-duplicate detection over tweet text with MinHash and LSH.
+
+    Each text gets a MinHash signature of num_perm values, split into bands; texts
+    sharing any band land in the same bucket, and candidates are confirmed by the
+    fraction of equal signature values. Signatures live in a fixed-size ring buffer
+    and bucket entries are dropped when their signature expires (older than window)
+    or is overwritten, so memory is bounded by max_entries and a check costs
+    O(num_perm) whatever the number of texts seen.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, threshold=SIMILARITY_THRESHOLD,
+                 window=DUPLICATE_WINDOW, max_entries=MAX_ENTRIES, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.window = window
+        self.max_entries = max_entries
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+        self.signatures = np.zeros((max_entries, num_perm), dtype=np.uint32)
+        self.timestamps = np.full(max_entries, -np.inf)
+        self.buckets = [{} for _ in range(bands)]
+        self.entries = deque()  # (sequence number, timestamp, band keys) in insertion order
+        self.next_seq = 0
+        self.lock = threading.Lock()
+
+    def signature(self, text):
+        """
+        Return the MinHash signature of a text as a uint32 array.
+        """
+        hashes = shingle_hashes(text)
+        # (a * x + b) mod p fits in uint64 since x < 2**32 and a, b < 2**31
+        permuted = (np.outer(hashes, self.a) + self.b) % _PRIME
+        return (permuted.min(axis=0) & _MASK).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _expire(self, now):
+        while self.entries and (self.entries[0][1] < now - self.window
+                                or self.entries[0][0] < self.next_seq - self.max_entries):
+            seq, _, keys = self.entries.popleft()
+            for bucket, key in zip(self.buckets, keys):
+                if bucket.get(key) == seq:
+                    del bucket[key]
+
+    def _match(self, signature, keys, now):
+        for bucket, key in zip(self.buckets, keys):
+            seq = bucket.get(key)
+            if seq is None:
+                continue
+            slot = seq % self.max_entries
+            if self.timestamps[slot] >= now - self.window and \
+                    np.mean(self.signatures[slot] == signature) >= self.threshold:
+                return True
+        return False
+
+    def _insert(self, signature, keys, now):
+        seq = self.next_seq
+        self.next_seq += 1
+        self._expire(now)  # also frees the ring slot seq reuses
+        slot = seq % self.max_entries
+        self.signatures[slot] = signature
+        self.timestamps[slot] = now
+        for bucket, key in zip(self.buckets, keys):
+            bucket[key] = seq
+        self.entries.append((seq, now, keys))
+
+    def is_duplicate(self, text, timestamp=None):
+        """
+        Return True if a near duplicate of text was recorded within the window.
+        """
+        now = time.time() if timestamp is None else timestamp
+        signature = self.signature(text)
+        with self.lock:
+            return self._match(signature, self._band_keys(signature), now)
+
+    def add(self, text, timestamp=None):
+        """
+        Record a text so later near duplicates are detected.
+        """
+        now = time.time() if timestamp is None else timestamp
+        signature = self.signature(text)
+        with self.lock:
+            self._insert(signature, self._band_keys(signature), now)
+
+    def seen(self, text, timestamp=None):
+        """
+        Return True if text is a near duplicate of one recorded within the window,
+        and record it either way, so a wave of copies stays suppressed while it lasts.
+        """
+        now = time.time() if timestamp is None else timestamp
+        signature = self.signature(text)
+        keys = self._band_keys(signature)
+        with self.lock:
+            duplicate = self._match(signature, keys, now)
+            self._insert(signature, keys, now)
+        return duplicate
+
+
+# Detector shared by the interaction logic of the Twitter modules
+default_detector = NearDuplicateDetector()
+
+
+# Drop replies to near-duplicate tweets
+def skip_duplicate_replies(actions, texts, detector=None):
+    """
+    Return actions without the replies whose tweet text (texts maps tweet id to
+    cleaned text) is a near duplicate of a tweet replied to within the window.
+    """
+    detector = detector or default_detector
+    kept = []
+    for action, kwargs in actions:
+        if action == "reply" and detector.seen(texts[kwargs["tweet_id"]]):
+            logging.info(f"Skipping reply to near-duplicate tweet {kwargs['tweet_id']}.")
+            continue
+        kept.append((action, kwargs))
+    return kept
@@ -0,0 +1,162 @@
+import numpy as np
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+TWITTER_STATE_DIR = "data/twitter_state"
+CHECKPOINTS_NAME = "checkpoints.json"
+PROCESSED_IDS_NAME = "processed_ids.npy"
+LOCK_NAME = "poll_state.lock"
+MAX_PROCESSED_IDS = 1000000  # newest ids kept (8 MB)
+
+
+# Write a file through a temporary file and an atomic rename
+def _atomic_write(path, write):
+    """
+    Call write(f) on a temporary file next to path, fsync it and rename it over
+    path, so readers and crashes only ever see the old or the new file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PollState:
+    """
+    Crash-safe polling state for tweet searches:
+
+        <state_dir>/checkpoints.json    highest processed tweet id per query (since_id)
+        <state_dir>/processed_ids.npy   sorted int64 array of processed tweet ids
+
+    The since_id checkpoint keeps searches from refetching old results. The processed
+    id set catches what since_id cannot: tweets fetched again because a run crashed
+    after acting but before saving its checkpoint. Tweet ids grow with time, so only
+    the newest max_ids are kept.
+
+    Processes can share a state directory: updates hold an flock on poll_state.lock
+    and merge into what is on disk, and reads pick up files other processes replaced.
+    """
+
+    def __init__(self, state_dir=TWITTER_STATE_DIR, max_ids=MAX_PROCESSED_IDS):
+        self.state_dir = state_dir
+        self.max_ids = max_ids
+        self.lock = threading.Lock()
+        os.makedirs(state_dir, exist_ok=True)
+        self.checkpoints_path = os.path.join(state_dir, CHECKPOINTS_NAME)
+        self.ids_path = os.path.join(state_dir, PROCESSED_IDS_NAME)
+        self.lock_file = open(os.path.join(state_dir, LOCK_NAME), "ab")
+        self.checkpoints = {}
+        self.processed_ids = np.empty(0, dtype=np.int64)
+        self.versions = {}  # path -> (inode, mtime) of the file last loaded
+        with self.lock:
+            self._refresh()
+
+    @contextmanager
+    def _file_lock(self):
+        fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _changed(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        version = (stat.st_ino, stat.st_mtime_ns)
+        if self.versions.get(path) == version:
+            return False
+        self.versions[path] = version
+        return True
+
+    def _refresh(self):
+        """
+        Reload the files another process replaced since they were last read; the
+        caller holds self.lock.
+        """
+        if self._changed(self.checkpoints_path):
+            with open(self.checkpoints_path) as f:
+                self.checkpoints = json.load(f)
+        if self._changed(self.ids_path):
+            self.processed_ids = np.load(self.ids_path)
+
+    def since_id(self, query):
+        """
+        Return the highest processed tweet id for a query, or None on its first poll.
+        """
+        with self.lock:
+            self._refresh()
+            return self.checkpoints.get(query)
+
+    def is_processed(self, tweet_ids):
+        """
+        Return a boolean array telling which of the tweet ids were already processed.
+        """
+        tweet_ids = np.asarray(tweet_ids, dtype=np.int64)
+        with self.lock:
+            self._refresh()
+            processed = self.processed_ids
+        if processed.size == 0:
+            return np.zeros(tweet_ids.shape, dtype=bool)
+        positions = np.minimum(np.searchsorted(processed, tweet_ids), processed.size - 1)
+        return processed[positions] == tweet_ids
+
+    def filter_new(self, tweets):
+        """
+        Return the tweets (objects with an id attribute) not processed before.
+        """
+        tweets = list(tweets)
+        if not tweets:
+            return tweets
+        seen = self.is_processed([tweet.id for tweet in tweets])
+        return [tweet for tweet, already in zip(tweets, seen) if not already]
+
+    def mark_processed(self, query, tweet_ids, advance=True):
+        """
+        Record tweet ids as processed and advance the query's since_id. The id set is
+        saved before the checkpoint, so a crash in between only means the next poll
+        refetches tweets that the id set then filters out. With advance=False only the
+        id set is updated; callers that process a newest-first search in several
+        batches advance since_id once all of it is processed (see advance).
+
+        Callers mark every fetched tweet, including ones whose actions failed: retrying
+        actions is the action journal's job (see execute_journaled_actions), which
+        replays transient failures on later calls up to its attempt limit and would
+        coalesce a refetched tweet's actions away anyway.
+        """
+        tweet_ids = np.asarray(tweet_ids, dtype=np.int64)
+        if tweet_ids.size == 0:
+            return
+        with self.lock, self._file_lock():
+            self._refresh()
+            merged = np.union1d(self.processed_ids, tweet_ids)
+            if merged.size > self.max_ids:
+                merged = merged[-self.max_ids:]
+            _atomic_write(self.ids_path, lambda f: np.save(f, merged))
+            self.processed_ids = merged
+            self._changed(self.ids_path)
+        if advance:
+            self.advance(query, int(tweet_ids.max()))
+        logging.info(f"Marked {tweet_ids.size} tweets processed for query {query!r}.")
+
+    def advance(self, query, newest):
+        """
+        Move the query's since_id forward to newest (never backwards).
+        """
+        with self.lock, self._file_lock():
+            self._refresh()
+            if newest > self.checkpoints.get(query, 0):
+                checkpoints = {**self.checkpoints, query: newest}
+                _atomic_write(self.checkpoints_path, lambda f: f.write(json.dumps(checkpoints, indent=2).encode()))
+                self.checkpoints = checkpoints
+                self._changed(self.checkpoints_path)
@@ -0,0 +1,208 @@
+import pandas as pd
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+LIMIT_HEADER = "x-rate-limit-limit"
+REMAINING_HEADER = "x-rate-limit-remaining"
+RESET_HEADER = "x-rate-limit-reset"
+RESET_MARGIN = 1.0  # seconds added to reset times to absorb clock skew
+DEFAULT_WINDOW = 15 * 60  # v1.1 rate-limit window length
+
+
+# Map a request URL to its rate-limit endpoint
+def endpoint_from_url(url):
+    """
+    Return the endpoint a URL is rate-limited under, e.g.
+    "https://api.twitter.com/1.1/statuses/retweet/123.json" -> "statuses/retweet".
+    """
+    parts = [part for part in urlparse(url).path.split("/") if part]
+    if parts and parts[0] == "1.1":
+        parts = parts[1:]
+    if parts:
+        parts[-1] = parts[-1].rsplit(".", 1)[0]
+    # Drop resource ids (statuses/retweet/:id, statuses/show/:id, ...)
+    return "/".join(part for part in parts if not part.isdigit())
+
+
+class RateLimitScheduler:
+    """
+    Track the rate-limit window of every endpoint from the x-rate-limit-* headers
+    of API responses, and delay each request only until its own endpoint's window
+    resets. Requests reserve quota optimistically, so concurrent callers do not
+    overrun a window between responses. Usage is recorded per closed window to
+    show how much capacity went unused.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.usage = {}
+
+    def _usage(self, endpoint):
+        if endpoint not in self.usage:
+            self.usage[endpoint] = {"requests": 0, "windows": 0, "capacity": 0, "unused": 0,
+                                    "rate_limited": 0, "waited_seconds": 0.0}
+        return self.usage[endpoint]
+
+    def observe(self, response, endpoint=None):
+        """
+        Update an endpoint's window from a response's rate-limit headers. The endpoint
+        is taken from the response URL unless given. Responses without the headers
+        (or None) are ignored.
+        """
+        if response is None:
+            return
+        headers = getattr(response, "headers", None) or {}
+        if REMAINING_HEADER not in headers or RESET_HEADER not in headers:
+            return
+        if endpoint is None:
+            endpoint = endpoint_from_url(getattr(response, "url", "") or "")
+        limit = int(headers.get(LIMIT_HEADER, 0))
+        remaining = int(headers[REMAINING_HEADER])
+        reset = float(headers[RESET_HEADER])
+
+        with self.lock:
+            usage = self._usage(endpoint)
+            if getattr(response, "status_code", None) == 429:
+                usage["rate_limited"] += 1
+            window = self.windows.get(endpoint)
+            if window is None or window["estimated"] or reset > window["reset"]:
+                if window is not None and not window["estimated"]:
+                    self._close_window(usage, window)
+                self.windows[endpoint] = {"limit": limit, "remaining": remaining, "reset": reset, "estimated": False}
+            else:
+                # Responses can arrive out of order; the lowest count is the freshest
+                window["remaining"] = min(window["remaining"], remaining)
+                window["limit"] = limit or window["limit"]
+
+    def _close_window(self, usage, window):
+        usage["windows"] += 1
+        usage["capacity"] += window["limit"]
+        usage["unused"] += max(window["remaining"], 0)
+
+    def delay(self, endpoint):
+        """
+        Return how many seconds a request to the endpoint has to wait (0 if it can go now).
+        """
+        with self.lock:
+            window = self.windows.get(endpoint)
+            if window is None or window["remaining"] > 0:
+                return 0.0
+            return max(0.0, window["reset"] + RESET_MARGIN - self.clock())
+
+    def reserve(self, endpoint):
+        """
+        Take one request from the endpoint's quota if it has any and return 0, or
+        return the seconds left until its window resets.
+        """
+        with self.lock:
+            window = self.windows.get(endpoint)
+            usage = self._usage(endpoint)
+            if window is not None and window["remaining"] <= 0:
+                wait = window["reset"] + RESET_MARGIN - self.clock()
+                if wait > 0:
+                    return wait
+                # The window has reset; assume a full quota until headers say otherwise
+                self._close_window(usage, window)
+                window = {"limit": window["limit"], "remaining": window["limit"] or 1,
+                          "reset": self.clock() + DEFAULT_WINDOW, "estimated": True}
+                self.windows[endpoint] = window
+            if window is not None:
+                window["remaining"] -= 1
+            usage["requests"] += 1
+            return 0.0
+
+    def acquire(self, endpoint):
+        """
+        Block until a request to the endpoint is allowed and reserve it. Returns the
+        seconds waited.
+        """
+        waited = 0.0
+        while True:
+            wait = self.reserve(endpoint)
+            if wait <= 0:
+                break
+            logging.warning(f"Rate limit reached for {endpoint}. Waiting {wait:.0f}s for the window to reset.")
+            time.sleep(wait)
+            waited += wait
+        self._record_wait(endpoint, waited)
+        return waited
+
+    async def acquire_async(self, endpoint):
+        """
+        Asynchronous acquire: suspends only the caller's task while its window resets.
+        """
+        waited = 0.0
+        while True:
+            wait = self.reserve(endpoint)
+            if wait <= 0:
+                break
+            logging.warning(f"Rate limit reached for {endpoint}. Waiting {wait:.0f}s for the window to reset.")
+            await asyncio.sleep(wait)
+            waited += wait
+        self._record_wait(endpoint, waited)
+        return waited
+
+    def _record_wait(self, endpoint, waited):
+        if waited:
+            with self.lock:
+                self._usage(endpoint)["waited_seconds"] += waited
+
+    def run(self, calls, api=None):
+        """
+        Run (endpoint, function) calls in order, except that calls to an endpoint whose
+        quota is exhausted are moved behind calls to endpoints that still have quota.
+        The scheduler sleeps only when every pending endpoint is waiting. When api is
+        given, api.last_response is observed after every call. Returns the results in
+        the original order.
+        """
+        pending = deque(enumerate(calls))
+        results = [None] * len(pending)
+        while pending:
+            endpoint_delays = {endpoint: self.delay(endpoint) for _, (endpoint, _) in pending}
+            delays = [endpoint_delays[endpoint] for _, (endpoint, _) in pending]
+            ready = next((i for i, wait in enumerate(delays) if wait <= 0), None)
+            if ready is None:
+                ready = min(range(len(delays)), key=delays.__getitem__)
+            pending.rotate(-ready)
+            index, (endpoint, function) = pending.popleft()
+            pending.rotate(ready)
+            self.acquire(endpoint)
+            try:
+                results[index] = function()
+            finally:
+                if api is not None:
+                    self.observe(getattr(api, "last_response", None))
+        return results
+
+    def usage_report(self):
+        """
+        Return per-endpoint usage as a DataFrame: requests made, closed windows, their
+        total capacity and unused quota, 429 responses, seconds spent waiting, and the
+        state of the current window.
+        """
+        now = self.clock()
+        with self.lock:
+            rows = []
+            for endpoint, usage in self.usage.items():
+                window = self.windows.get(endpoint, {})
+                rows.append({
+                    "endpoint": endpoint,
+                    **usage,
+                    "unused_fraction": usage["unused"] / usage["capacity"] if usage["capacity"] else None,
+                    "remaining": window.get("remaining"),
+                    "reset_in_seconds": max(0.0, window["reset"] - now) if window else None,
+                })
+        return pd.DataFrame(rows)
+
+
+# Scheduler shared by the Twitter modules
+default_scheduler = RateLimitScheduler()
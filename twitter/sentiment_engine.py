@@ -0,0 +1,174 @@
+import pandas as pd
+import numpy as np
+import logging
+import threading
+from collections import OrderedDict
+from textblob.en import sentiment as pattern_sentiment
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_CACHE_SIZE = 100000
+
+# Texts made only of these characters tokenize exactly like str.split() in TextBlob
+SIMPLE_TEXT_PATTERN = r"[A-Za-z0-9\s]*"
+
+
+class CompiledLexicon:
+    """
+    TextBlob's pattern sentiment lexicon compiled into arrays for vectorized lookups.
+
+    A text can be scored by lookup alone when every known word is assessed on its
+    own: no negations and no modifier words (adverbs such as "very"), which change
+    the score of the following word. Other texts go through TextBlob's own scorer.
+    """
+
+    def __init__(self):
+        words = [w for w in dict.keys(pattern_sentiment) if isinstance(w, str)]
+        if not words:
+            # The lexicon is loaded lazily on first access
+            pattern_sentiment.load()
+            words = [w for w in dict.keys(pattern_sentiment) if isinstance(w, str)]
+        self.words = pd.Index(words)
+        self.polarity = np.array([pattern_sentiment[w][None][0] for w in words], dtype=np.float64)
+        modifiers = pattern_sentiment.modifiers
+        modifier_words = {w for w in words if any(tag in pattern_sentiment[w] for tag in modifiers)}
+        self.blocking = pd.Index(sorted(modifier_words | set(pattern_sentiment.negations)))
+        logging.info(f"Compiled sentiment lexicon with {len(words)} words.")
+
+    def score(self, texts):
+        """
+        Return (polarity, exact) arrays for a Series of texts. Where exact is False the
+        text needs TextBlob's sequential scorer and polarity is undefined.
+        """
+        n_texts = len(texts)
+        texts = texts.reset_index(drop=True)
+        simple = texts.str.fullmatch(SIMPLE_TEXT_PATTERN).fillna(False).to_numpy(dtype=bool)
+
+        tokens = texts[simple].str.lower().str.split().explode().dropna()
+        positions = tokens.index.to_numpy()
+        tokens = tokens.to_numpy(dtype=object)
+        word_ids = self.words.get_indexer(tokens)
+        known = word_ids >= 0
+
+        # bincount accumulates in token order, the same order TextBlob averages in
+        sums = np.bincount(positions[known], weights=self.polarity[word_ids[known]], minlength=n_texts)
+        counts = np.bincount(positions[known], minlength=n_texts)
+        blocked = np.bincount(positions[self.blocking.get_indexer(tokens) >= 0], minlength=n_texts) > 0
+
+        polarity = np.divide(sums, counts, out=np.zeros(n_texts), where=counts > 0)
+        # Scores this close to zero decide the label on rounding, so confirm them exactly
+        borderline = (counts > 0) & (np.abs(polarity) < 1e-9)
+        exact = simple & ~blocked & ~borderline
+        return polarity, exact
+
+
+class SentimentCache:
+    """
+    Bounded, thread-safe LRU cache of polarity scores keyed by 64-bit text hashes.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        """
+        Return an array of cached polarities (NaN where missing) for the given keys.
+        """
+        values = np.full(len(keys), np.nan)
+        with self.lock:
+            for i, key in enumerate(keys.tolist()):
+                value = self.entries.get(key)
+                if value is not None:
+                    self.entries.move_to_end(key)
+                    values[i] = value
+            found = int(np.count_nonzero(~np.isnan(values)))
+            self.hits += found
+            self.misses += len(keys) - found
+        return values
+
+    def put_many(self, keys, values):
+        """
+        Store polarities, evicting the least recently used entries beyond maxsize.
+        """
+        with self.lock:
+            for key, value in zip(keys.tolist(), values.tolist()):
+                self.entries[key] = value
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+class SentimentEngine:
+    """
+    Batch sentiment scorer that matches analyze_sentiment's TextBlob labels. Texts
+    are deduplicated, looked up in an LRU cache and, when missing, scored with the
+    compiled lexicon, falling back to TextBlob only for texts that need it.
+    """
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        self.cache = SentimentCache(cache_size)
+        self.lexicon = None
+        self.lexicon_lock = threading.Lock()
+
+    def _get_lexicon(self):
+        with self.lexicon_lock:
+            if self.lexicon is None:
+                self.lexicon = CompiledLexicon()
+            return self.lexicon
+
+    def polarity(self, texts):
+        """
+        Return an array of TextBlob polarity scores for a list or Series of texts.
+        Missing texts are scored as empty strings.
+        """
+        texts = pd.Series(texts, dtype=object).fillna("").astype(str)
+        codes, uniques = pd.factorize(texts)
+        uniques = pd.Series(uniques, dtype=object)
+        keys = pd.util.hash_array(uniques.to_numpy(dtype=object))
+
+        scores = self.cache.get_many(keys)
+        missing = np.nonzero(np.isnan(scores))[0]
+        if missing.size:
+            missing_texts = uniques.iloc[missing]
+            polarity, exact = self._get_lexicon().score(missing_texts)
+            for i in np.nonzero(~exact)[0]:
+                polarity[i] = pattern_sentiment(missing_texts.iloc[i])[0]
+            scores[missing] = polarity
+            self.cache.put_many(keys[missing], polarity)
+        return scores[codes]
+
+    def analyze(self, texts):
+        """
+        Return sentiment labels ("positive", "negative" or "neutral") for a batch of
+        texts, as a Series aligned with the input if a Series was given, else a list.
+        """
+        labels = label_from_polarity(self.polarity(texts))
+        if isinstance(texts, pd.Series):
+            return pd.Series(labels, index=texts.index, dtype=object)
+        return labels.tolist()
+
+
+# Map polarity scores to sentiment labels
+def label_from_polarity(polarity):
+    """
+    Vectorized version of analyze_sentiment's thresholds: >0 positive, <0 negative.
+    """
+    polarity = np.asarray(polarity, dtype=np.float64)
+    return np.where(polarity > 0, "positive", np.where(polarity < 0, "negative", "neutral")).astype(object)
+
+
+# Shared engine used by the Twitter modules
+default_engine = SentimentEngine()
+
+
+# Analyze sentiment for a batch of texts with the shared engine
+def analyze_sentiment_batch(texts):
+    """
+    Analyze sentiment of many texts at once; labels match analyze_sentiment.
+    """
+    return default_engine.analyze(texts)
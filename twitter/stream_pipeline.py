@@ -0,0 +1,267 @@
+import pandas as pd
+import tweepy
+import logging
+import queue
+import threading
+import time
+
+from twitter.action_journal import execute_journaled_actions
+from twitter.near_duplicates import skip_duplicate_replies
+from twitter.poll_state import PollState
+from twitter.sentiment_engine import analyze_sentiment_batch
+from twitter.text_cleaning import clean_tweet_texts
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_QUEUE_SIZE = 256  # items buffered between two stages
+DEFAULT_MAX_WAIT = 0.05  # seconds a stage waits to fill a micro-batch
+
+# Marks the end of the stream in stage queues
+_END = object()
+
+
+class StageMetrics:
+    """
+    Thread-safe counters for one pipeline stage.
+    """
+
+    def __init__(self, name, input_queue):
+        self.name = name
+        self.input_queue = input_queue
+        self.lock = threading.Lock()
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def record(self, n_in, n_out, busy, failed=False):
+        with self.lock:
+            self.items_in += n_in
+            self.items_out += n_out
+            self.batches += 1
+            self.errors += int(failed)
+            self.busy_seconds += busy
+
+    def record_depth(self):
+        depth = self.input_queue.qsize() if self.input_queue is not None else 0
+        with self.lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def snapshot(self, elapsed):
+        with self.lock:
+            return {
+                "stage": self.name,
+                "items_in": self.items_in,
+                "items_out": self.items_out,
+                "batches": self.batches,
+                "mean_batch_size": self.items_in / self.batches if self.batches else 0.0,
+                "errors": self.errors,
+                "busy_seconds": self.busy_seconds,
+                "items_per_second": self.items_out / elapsed if elapsed else 0.0,
+                "queue_depth": self.input_queue.qsize() if self.input_queue is not None else 0,
+                "max_queue_depth": self.max_queue_depth,
+            }
+
+
+class StreamPipeline:
+    """
+    Streaming pipeline of stages running in their own threads and connected by
+    bounded queues. A source generator feeds the first stage; each stage receives
+    micro-batches of up to batch_size items (waiting at most max_wait to fill one)
+    and returns a list of items for the next stage. When a slow stage falls behind,
+    the queues in front of it fill up and block the stages upstream, down to the
+    source, so memory stays bounded by the queue sizes.
+
+        pipeline = StreamPipeline(source, [("clean", clean_batch, 100), ("act", act_batch, 10)])
+        pipeline.run()
+        pipeline.metrics()
+
+    on_complete, if given, is called after a run in which the source was exhausted
+    and no stage failed.
+    """
+
+    def __init__(self, source, stages, queue_size=DEFAULT_QUEUE_SIZE, max_wait=DEFAULT_MAX_WAIT, on_complete=None):
+        self.source = source
+        self.on_complete = on_complete
+        self.stages = stages
+        self.max_wait = max_wait
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.source_metrics = StageMetrics("source", None)
+        self.stage_metrics = [StageMetrics(name, self.queues[i]) for i, (name, _, _) in enumerate(stages)]
+        self.started = None
+        self.finished = None
+
+    def _run_source(self):
+        first_queue = self.queues[0]
+        try:
+            for item in self.source:
+                started = time.monotonic()
+                first_queue.put(item)
+                self.source_metrics.record(0, 1, time.monotonic() - started)
+        except Exception as e:
+            logging.error(f"Error reading pipeline source: {e}")
+            self.source_metrics.record(0, 0, 0.0, failed=True)
+        finally:
+            first_queue.put(_END)
+
+    def _next_batch(self, input_queue, batch_size):
+        """
+        Block for one item, then take more until the batch is full or max_wait passed.
+        Returns (batch, ended).
+        """
+        item = input_queue.get()
+        if item is _END:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = input_queue.get(timeout=remaining) if remaining > 0 else input_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _END:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run_stage(self, index):
+        name, function, batch_size = self.stages[index]
+        input_queue = self.queues[index]
+        output_queue = self.queues[index + 1] if index + 1 < len(self.queues) else None
+        metrics = self.stage_metrics[index]
+        ended = False
+        while not ended:
+            metrics.record_depth()
+            batch, ended = self._next_batch(input_queue, batch_size)
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                outputs = function(batch) or []
+                failed = False
+            except Exception as e:
+                logging.error(f"Error in pipeline stage {name}: {e}")
+                outputs, failed = [], True
+            metrics.record(len(batch), len(outputs), time.monotonic() - started, failed)
+            if output_queue is not None:
+                for output in outputs:
+                    output_queue.put(output)
+        if output_queue is not None:
+            output_queue.put(_END)
+
+    def run(self):
+        """
+        Run the pipeline until the source is exhausted and every stage has drained.
+        Returns the per-stage metrics.
+        """
+        self.started = time.monotonic()
+        threads = [threading.Thread(target=self._run_source, name="pipeline-source", daemon=True)]
+        threads += [threading.Thread(target=self._run_stage, args=(i,), name=f"pipeline-{name}", daemon=True)
+                    for i, (name, _, _) in enumerate(self.stages)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.finished = time.monotonic()
+        metrics = self.metrics()
+        logging.info(f"Pipeline finished in {self.finished - self.started:.2f}s:\n{metrics.to_string(index=False)}")
+        if self.on_complete is not None and not metrics["errors"].any():
+            self.on_complete()
+        return metrics
+
+    def metrics(self):
+        """
+        Return per-stage throughput, batch sizes, busy time and queue depth as a
+        DataFrame. Can be called while the pipeline is running. For the source,
+        busy_seconds is the time spent blocked on a full queue (backpressure).
+        """
+        if self.started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished or time.monotonic()) - self.started
+        rows = [self.source_metrics.snapshot(elapsed)] + [m.snapshot(elapsed) for m in self.stage_metrics]
+        return pd.DataFrame(rows)
+
+
+# Decide which actions to take for a tweet
+def decide_actions(tweet, sentiment, negative_reply="We can turn things around!"):
+    """
+    Positive tweets are retweeted and liked; negative ones get a supportive reply.
+    """
+    if sentiment == "positive":
+        return [("retweet", {"tweet_id": tweet.id}), ("like", {"tweet_id": tweet.id})]
+    if sentiment == "negative":
+        return [("reply", {"tweet_id": tweet.id, "message": negative_reply})]
+    return []
+
+
+# Build the fetch -> clean -> sentiment -> decide -> act pipeline for a hashtag
+def build_hashtag_pipeline(api, hashtag, count=None, state=None, clean_batch_size=200,
+                           sentiment_batch_size=200, action_batch_size=20, queue_size=DEFAULT_QUEUE_SIZE,
+                           detector=None):
+    """
+    Return a StreamPipeline that pages through a hashtag search lazily, cleans and
+    scores tweets in micro-batches and executes the resulting actions (skipping
+    replies to near duplicates, see skip_duplicate_replies). Processed
+    tweets are recorded in the PollState after their actions have run, but the
+    search comes newest first, so since_id only advances once the whole search
+    has been processed; a run that stops early is picked up by the next one.
+    """
+    query = f"#{hashtag}"
+    if state is None:
+        state = PollState()
+    # Cursor.items() fetches one page at a time as the pipeline consumes it
+    cursor = tweepy.Cursor(api.search_tweets, q=query, lang="en", result_type="recent", count=100,
+                           since_id=state.since_id(query), tweet_mode="extended")
+    source = cursor.items(count) if count else cursor.items()
+
+    def clean(tweets):
+        tweets = state.filter_new(tweets)
+        texts = clean_tweet_texts([tweet.full_text for tweet in tweets])
+        return [{"tweet": tweet, "text": text} for tweet, text in zip(tweets, texts)]
+
+    def score(items):
+        for item, sentiment in zip(items, analyze_sentiment_batch([item["text"] for item in items])):
+            item["sentiment"] = sentiment
+        return items
+
+    def decide(items):
+        texts = {item["tweet"].id: item["text"] for item in items}
+        for item in items:
+            item["actions"] = skip_duplicate_replies(decide_actions(item["tweet"], item["sentiment"]), texts, detector)
+        return items
+
+    newest = []
+
+    def act(items):
+        outcomes = execute_journaled_actions(api, [action for item in items for action in item["actions"]])
+        tweet_ids = [item["tweet"].id for item in items]
+        state.mark_processed(query, tweet_ids, advance=False)
+        newest.append(max(tweet_ids))
+        return outcomes
+
+    def complete():
+        if newest:
+            state.advance(query, max(newest))
+
+    stages = [
+        ("clean", clean, clean_batch_size),
+        ("sentiment", score, sentiment_batch_size),
+        ("decide", decide, sentiment_batch_size),
+        ("act", act, action_batch_size),
+    ]
+    return StreamPipeline(source, stages, queue_size=queue_size, on_complete=complete)
+
+
+# Stream a hashtag through the pipeline
+def stream_hashtag(api, hashtag, count=None, state=None):
+    """
+    Monitor a hashtag as a stream: fetching, scoring and acting overlap, and memory
+    stays bounded however many tweets the search returns. Returns per-stage metrics.
+    """
+    logging.info(f"Streaming hashtag #{hashtag}...")
+    return build_hashtag_pipeline(api, hashtag, count=count, state=state).run()
@@ -0,0 +1,61 @@
+import pandas as pd
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# URLs, mentions and special characters removed in a single pass. The original
+# three re.sub calls remove URLs, then mentions, then special characters, so a
+# mention never extends into a URL and a special-character run never swallows
+# the "@" of a mention; the lookahead and the separate "@" branch keep that order.
+TWEET_NOISE_PATTERN = re.compile(
+    r"http\S+|www\S+"                   # URLs ("https..." is covered by "http\S+")
+    r"|@(?:(?!http\S|www\S)\w)+"        # mentions, stopping where a URL starts
+    r"|[^A-Za-z0-9\s@]+|@"              # special characters
+)
+
+# Batches smaller than this are cleaned in-process
+PARALLEL_MIN_TEXTS = 200000
+PARALLEL_CHUNK_SIZE = 50000
+
+
+# Clean a single tweet text
+def clean_tweet_text(tweet_text):
+    """
+    Clean the tweet text to remove URLs, mentions, and other special characters.
+    """
+    return TWEET_NOISE_PATTERN.sub("", tweet_text).strip()
+
+
+# Clean one chunk of texts (runs inside worker processes)
+def _clean_chunk(texts):
+    sub = TWEET_NOISE_PATTERN.sub
+    return [sub("", text).strip() for text in texts]
+
+
+# Clean many tweet texts at once
+def clean_tweet_texts(texts, n_jobs=1, chunk_size=PARALLEL_CHUNK_SIZE):
+    """
+    Clean a list or Series of tweet texts; output matches clean_tweet_text exactly.
+    With n_jobs > 1 (or None for all CPUs), large batches are split into chunks and
+    cleaned in a process pool. Returns a Series aligned with a Series input, else a list.
+    """
+    values = texts.tolist() if isinstance(texts, pd.Series) else list(texts)
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    if n_jobs > 1 and len(values) >= PARALLEL_MIN_TEXTS:
+        chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+        logging.info(f"Cleaning {len(values)} tweets in {len(chunks)} chunks on {n_jobs} processes...")
+        cleaned = []
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            for chunk in executor.map(_clean_chunk, chunks):
+                cleaned.extend(chunk)
+    else:
+        cleaned = _clean_chunk(values)
+
+    if isinstance(texts, pd.Series):
+        return pd.Series(cleaned, index=texts.index, dtype=object)
+    return cleaned
@@ -0,0 +1,77 @@
+import inspect
+
+import tweepy
+
+# tweepy 4 renamed the v3 error classes: TweepError became TweepyException (HTTP
+# errors are HTTPException subclasses carrying the response) and RateLimitError
+# became TooManyRequests. The Twitter modules catch and raise these aliases so they
+# work with either version.
+TweepError = getattr(tweepy, "TweepError", None) or tweepy.TweepyException
+RateLimitError = getattr(tweepy, "RateLimitError", None) or tweepy.TooManyRequests
+
+# API methods renamed in tweepy 4: v3 name -> v4 name
+API_METHODS = {
+    "followers_ids": "get_follower_ids",
+    "friends_ids": "get_friend_ids",
+    "trends_place": "get_place_trends",
+}
+
+# tweepy 4 error class per HTTP status (server errors use TwitterServerError)
+HTTP_ERRORS = {
+    400: "BadRequest",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "NotFound",
+    429: "TooManyRequests",
+}
+
+
+# Get the Twitter error code of an API error
+def api_code(error):
+    """
+    Return the first Twitter error code of an API error (v3 api_code, v4 api_codes),
+    or None.
+    """
+    code = getattr(error, "api_code", None)
+    if code is None:
+        codes = getattr(error, "api_codes", None)
+        code = codes[0] if codes else None
+    return code
+
+
+# Build the error tweepy raises for an error response
+def error_for_response(response):
+    """
+    Return the exception tweepy would raise for a requests response with an error
+    status, so stand-ins for tweepy.API fail the same way the real client does.
+    """
+    if hasattr(tweepy, "TweepError"):
+        try:
+            errors = response.json().get("errors") or [{}]
+        except ValueError:
+            errors = [{}]
+        error_class = tweepy.RateLimitError if response.status_code == 429 else tweepy.TweepError
+        return error_class(response.text, response, errors[0].get("code"))
+    if response.status_code >= 500:
+        return tweepy.TwitterServerError(response)
+    return getattr(tweepy, HTTP_ERRORS.get(response.status_code, "HTTPException"))(response)
+
+
+# Look up an API method by its tweepy 3 name
+def api_method(api, name):
+    """
+    Return the bound method of an API client (tweepy.API of either version, or a
+    stand-in with the v3 names) for a tweepy 3 method name.
+    """
+    method = getattr(api, API_METHODS.get(name, name), None)
+    return method if method is not None else getattr(api, name)
+
+
+# Keyword arguments for users/lookup
+def lookup_users_kwargs(api, user_ids):
+    """
+    Return the lookup_users keyword arguments for a list of user ids: user_ids in
+    tweepy 3, user_id in tweepy 4.
+    """
+    parameters = inspect.signature(api.lookup_users).parameters
+    return {"user_ids" if "user_ids" in parameters else "user_id": list(user_ids)}
@@ -0,0 +1,199 @@
+import pandas as pd
+import numpy as np
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+from twitter.sentiment_engine import analyze_sentiment_batch
+from twitter.tweet_archive import SENTIMENT_CATEGORIES
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Aggregated metrics, in column order: tweet count, one count per sentiment, engagement sums
+METRICS = ["tweets"] + SENTIMENT_CATEGORIES + ["likes", "retweets"]
+SENTIMENT_COLUMNS = {sentiment: 1 + code for code, sentiment in enumerate(SENTIMENT_CATEGORIES)}
+# Rolling windows: name -> (bucket length in seconds, number of buckets)
+DEFAULT_WINDOWS = {
+    "1h": (60, 60),
+    "24h": (3600, 24),
+    "30d": (86400, 30),
+}
+MAX_TRACKED = 100_000  # recent tweet ids whose engagement updates are applied as deltas
+
+
+# Convert a tweet timestamp to epoch seconds
+def _epoch_seconds(created_at):
+    if isinstance(created_at, datetime):
+        if created_at.tzinfo is None:  # tweepy returns naive UTC datetimes
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return created_at.timestamp()
+    if isinstance(created_at, pd.Timestamp):
+        return created_at.timestamp()
+    return float(created_at)
+
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer of per-bucket metric sums with a running total. Adding a
+    tweet costs O(1); moving the window forward clears at most n_buckets buckets.
+    Tweets older than the window are ignored.
+    """
+
+    def __init__(self, bucket_seconds, n_buckets):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.values = np.zeros((n_buckets, len(METRICS)), dtype=np.int64)
+        self.bucket_ids = np.full(n_buckets, -1, dtype=np.int64)
+        self.totals = np.zeros(len(METRICS), dtype=np.int64)
+        self.head = -1  # newest bucket id
+
+    def advance(self, timestamp):
+        """
+        Move the window forward so it ends at the bucket containing timestamp.
+        """
+        bucket_id = int(timestamp // self.bucket_seconds)
+        if bucket_id <= self.head:
+            return
+        for expired in range(max(self.head + 1, bucket_id - self.n_buckets + 1), bucket_id + 1):
+            slot = expired % self.n_buckets
+            self.totals -= self.values[slot]
+            self.values[slot] = 0
+            self.bucket_ids[slot] = expired
+        self.head = bucket_id
+
+    def add(self, timestamp, delta):
+        bucket_id = int(timestamp // self.bucket_seconds)
+        self.advance(timestamp)
+        slot = bucket_id % self.n_buckets
+        if self.bucket_ids[slot] != bucket_id:
+            return
+        self.values[slot] += delta
+        self.totals += delta
+
+    def histogram(self):
+        """
+        Return the buckets oldest first as (bucket start times, per-bucket sums).
+        """
+        bucket_ids = np.arange(self.head - self.n_buckets + 1, self.head + 1)
+        slots = bucket_ids % self.n_buckets
+        values = np.where((self.bucket_ids[slots] == bucket_ids)[:, None], self.values[slots], 0)
+        return bucket_ids * self.bucket_seconds, values
+
+
+class TweetAggregates:
+    """
+    Incrementally maintained sentiment counts and engagement sums, all-time and over
+    rolling windows (see DEFAULT_WINDOWS), so dashboard queries never rescan tweets.
+
+    Each tweet updates every window in O(1). Seeing a tracked tweet again (e.g. a
+    timeline refetch with new like counts) only applies the change in engagement.
+    """
+
+    def __init__(self, windows=None, max_tracked=MAX_TRACKED):
+        self.windows = {name: RollingWindow(*spec) for name, spec in (windows or DEFAULT_WINDOWS).items()}
+        self.totals = np.zeros(len(METRICS), dtype=np.int64)
+        self.max_tracked = max_tracked
+        self.tracked = OrderedDict()  # tweet id -> (timestamp, likes, retweets)
+        self.lock = threading.Lock()
+
+    def add(self, tweet_id, created_at, likes, retweets, sentiment):
+        """
+        Count one tweet (or, for a tracked tweet, its change in likes and retweets).
+        """
+        timestamp = _epoch_seconds(created_at)
+        delta = np.zeros(len(METRICS), dtype=np.int64)
+        with self.lock:
+            previous = self.tracked.pop(tweet_id, None)
+            if previous is None:
+                delta[0] = 1
+                if sentiment in SENTIMENT_COLUMNS:  # archived tweets may have no sentiment
+                    delta[SENTIMENT_COLUMNS[sentiment]] = 1
+                delta[-2:] = likes, retweets
+            else:
+                timestamp = previous[0]
+                delta[-2:] = likes - previous[1], retweets - previous[2]
+            self.tracked[tweet_id] = (timestamp, likes, retweets)
+            if len(self.tracked) > self.max_tracked:
+                self.tracked.popitem(last=False)
+            self.totals += delta
+            for window in self.windows.values():
+                window.add(timestamp, delta)
+
+    def add_tweets(self, tweets):
+        """
+        Score a batch of tweets (tweepy Status objects or extract_tweet_data dicts)
+        in one sentiment call, count them and return their sentiments.
+        """
+        tweets = [tweet if isinstance(tweet, dict) else
+                  {"id": tweet.id, "created_at": tweet.created_at,
+                   "text": getattr(tweet, "full_text", None) or tweet.text,
+                   "likes": tweet.favorite_count, "retweets": tweet.retweet_count}
+                  for tweet in tweets]
+        sentiments = analyze_sentiment_batch([tweet["text"] for tweet in tweets])
+        for tweet, sentiment in zip(tweets, sentiments):
+            self.add(tweet["id"], tweet["created_at"], tweet["likes"], tweet["retweets"], sentiment)
+        return sentiments
+
+    def add_frame(self, frame):
+        """
+        Count the tweets of a scored frame (see tweets_to_frame).
+        """
+        for row in frame[["id", "created_at", "likes", "retweets", "sentiment"]].itertuples(index=False):
+            self.add(int(row.id), row.created_at, int(row.likes), int(row.retweets), row.sentiment)
+
+    def _totals(self, window, now):
+        if window is None:
+            return self.totals.copy()
+        rolling = self.windows[window]
+        rolling.advance(time.time() if now is None else now)
+        return rolling.totals.copy()
+
+    def summary(self, window=None, now=None):
+        """
+        Return tweet count, sentiment counts, likes and retweets over a window
+        (all time when None), plus average engagement per tweet.
+        """
+        with self.lock:
+            totals = self._totals(window, now)
+        summary = {metric: int(value) for metric, value in zip(METRICS, totals)}
+        summary["engagement_per_tweet"] = (summary["likes"] + summary["retweets"]) / summary["tweets"] \
+            if summary["tweets"] else 0.0
+        return summary
+
+    def sentiment_counts(self, window=None, now=None):
+        """
+        Return the sentiment counts over a window (all time when None) as a Counter.
+        """
+        summary = self.summary(window, now)
+        return Counter({sentiment: summary[sentiment] for sentiment in SENTIMENT_CATEGORIES})
+
+    def histogram(self, window, now=None):
+        """
+        Return a DataFrame of metric sums per bucket of a window, indexed by the UTC
+        start time of each bucket, oldest first.
+        """
+        with self.lock:
+            rolling = self.windows[window]
+            rolling.advance(time.time() if now is None else now)
+            starts, values = rolling.histogram()
+        return pd.DataFrame(values, columns=METRICS, index=pd.to_datetime(starts, unit="s", utc=True))
+
+
+# Aggregates shared by the Twitter modules
+default_aggregates = TweetAggregates()
+
+
+# Rebuild aggregates from a tweet archive
+def aggregates_from_archive(archive, windows=None):
+    """
+    Return TweetAggregates seeded with every tweet of a TweetArchive, e.g. once at
+    startup; later tweets are added incrementally.
+    """
+    aggregates = TweetAggregates(windows)
+    frame = archive.read(["id", "created_at", "likes", "retweets", "sentiment"])
+    aggregates.add_frame(frame)
+    logging.info(f"Loaded aggregates for {len(frame)} archived tweets.")
+    return aggregates
@@ -0,0 +1,240 @@
+import pandas as pd
+import numpy as np
+import tweepy
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from twitter.sentiment_engine import analyze_sentiment_batch
+from twitter.tweepy_compat import TweepError
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+TWEET_ARCHIVE_DIR = "data/tweet_archive"
+PART_META_NAME = "_meta.json"
+DEFAULT_BATCH_SIZE = 5000  # buffered tweets per written part
+
+SENTIMENT_CATEGORIES = ["negative", "neutral", "positive"]
+# Fixed-width columns and their on-disk dtypes; "text" is stored as UTF-8 bytes plus offsets
+NUMERIC_COLUMNS = {"id": np.int64, "created_at": np.int64, "likes": np.int64, "retweets": np.int64,
+                   "sentiment": np.int8}
+ARCHIVE_COLUMNS = ["id", "created_at", "text", "likes", "retweets", "sentiment"]
+
+
+# Build a typed, column-oriented frame from tweepy Status objects
+def tweets_to_frame(tweets, sentiment=True):
+    """
+    Return a DataFrame with int64 ids and counts, UTC timestamps, text and (optionally)
+    categorical sentiment, built column by column instead of from a list of dicts.
+    """
+    tweets = list(tweets)
+    n_tweets = len(tweets)
+    frame = pd.DataFrame({
+        "id": np.fromiter((tweet.id for tweet in tweets), dtype=np.int64, count=n_tweets),
+        "created_at": pd.to_datetime([tweet.created_at for tweet in tweets], utc=True),
+        "text": pd.Series([getattr(tweet, "full_text", None) or tweet.text for tweet in tweets], dtype=object),
+        "likes": np.fromiter((tweet.favorite_count for tweet in tweets), dtype=np.int64, count=n_tweets),
+        "retweets": np.fromiter((tweet.retweet_count for tweet in tweets), dtype=np.int64, count=n_tweets),
+    })
+    if sentiment:
+        frame["sentiment"] = pd.Categorical(analyze_sentiment_batch(frame["text"]), categories=SENTIMENT_CATEGORIES)
+    return frame
+
+
+# Write one column of a part
+def _write_column(part_dir, name, values):
+    if name == "text":
+        encoded = [text.encode("utf-8") for text in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        np.save(os.path.join(part_dir, "text.offsets.npy"), offsets)
+        np.save(os.path.join(part_dir, "text.bytes.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    else:
+        np.save(os.path.join(part_dir, f"{name}.npy"), np.asarray(values, dtype=NUMERIC_COLUMNS[name]))
+
+
+# Read one column of a part
+def _read_column(part_dir, name):
+    if name == "text":
+        offsets = np.load(os.path.join(part_dir, "text.offsets.npy"))
+        data = np.load(os.path.join(part_dir, "text.bytes.npy"), mmap_mode="r")
+        return [bytes(data[start:stop]).decode("utf-8") for start, stop in zip(offsets[:-1], offsets[1:])]
+    return np.load(os.path.join(part_dir, f"{name}.npy"), mmap_mode="r")
+
+
+class TweetArchive:
+    """
+    Append-only columnar tweet archive partitioned by day:
+
+        <root>/date=YYYY-MM-DD/part-<ns>-<pid>/<column>.npy   one file per column
+        <root>/date=YYYY-MM-DD/part-<ns>-<pid>/_meta.json     row count and id range
+
+    Appended tweets are buffered and written in batches. Each batch becomes new,
+    immutable parts, written to a staging directory and renamed into place, so a
+    part is either complete or absent. Readers load only the partitions in their
+    date range and only the columns they ask for, memory-mapped.
+    """
+
+    def __init__(self, root=TWEET_ARCHIVE_DIR, batch_size=DEFAULT_BATCH_SIZE):
+        self.root = root
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.buffered_rows = 0
+        os.makedirs(root, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def partitions(self, start=None, end=None):
+        """
+        Return the archived days ("YYYY-MM-DD") between start and end, inclusive.
+        """
+        start = pd.Timestamp(start).strftime("%Y-%m-%d") if start is not None else None
+        end = pd.Timestamp(end).strftime("%Y-%m-%d") if end is not None else None
+        days = sorted(entry[len("date="):] for entry in os.listdir(self.root) if entry.startswith("date="))
+        return [day for day in days if (start is None or day >= start) and (end is None or day <= end)]
+
+    def _parts(self, day):
+        day_dir = os.path.join(self.root, f"date={day}")
+        return [os.path.join(day_dir, entry) for entry in sorted(os.listdir(day_dir)) if entry.startswith("part-")]
+
+    def last_id(self):
+        """
+        Return the highest archived tweet id (None when empty), from part metadata only.
+        """
+        last = None
+        for day in self.partitions():
+            for part_dir in self._parts(day):
+                with open(os.path.join(part_dir, PART_META_NAME)) as f:
+                    max_id = json.load(f)["max_id"]
+                last = max_id if last is None else max(last, max_id)
+        if self.buffer:
+            buffered = max(int(frame["id"].max()) for frame in self.buffer)
+            last = buffered if last is None else max(last, buffered)
+        return last
+
+    def append(self, frame):
+        """
+        Buffer a frame of tweets (see tweets_to_frame); parts are written once
+        batch_size rows have accumulated. Tweets without a sentiment column are
+        archived with a missing sentiment.
+        """
+        if len(frame) == 0:
+            return
+        with self.lock:
+            self.buffer.append(frame)
+            self.buffered_rows += len(frame)
+            should_flush = self.buffered_rows >= self.batch_size
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """
+        Write buffered tweets as one new part per day.
+        """
+        with self.lock:
+            if not self.buffer:
+                return 0
+            frame = pd.concat(self.buffer, ignore_index=True)
+            self.buffer = []
+            self.buffered_rows = 0
+
+        frame = frame.drop_duplicates("id").sort_values("id", kind="stable")
+        created_at = pd.to_datetime(frame["created_at"], utc=True)
+        columns = {
+            "id": frame["id"].to_numpy(dtype=np.int64),
+            "created_at": created_at.to_numpy(dtype="datetime64[ns]").view(np.int64),
+            "text": frame["text"].tolist(),
+            "likes": frame["likes"].to_numpy(dtype=np.int64),
+            "retweets": frame["retweets"].to_numpy(dtype=np.int64),
+        }
+        # Frames built with sentiment=False are stored with every sentiment missing (-1)
+        if "sentiment" in frame:
+            columns["sentiment"] = pd.Categorical(frame["sentiment"], categories=SENTIMENT_CATEGORIES).codes
+        else:
+            columns["sentiment"] = np.full(len(frame), -1, dtype=np.int8)
+        days = created_at.dt.strftime("%Y-%m-%d").to_numpy()
+        for day in np.unique(days):
+            rows = np.nonzero(days == day)[0]
+            self._write_part(day, {name: [values[i] for i in rows] if name == "text" else values[rows]
+                                   for name, values in columns.items()})
+        logging.info(f"Archived {len(frame)} tweets into {len(np.unique(days))} day partitions.")
+        return len(frame)
+
+    def _write_part(self, day, columns):
+        day_dir = os.path.join(self.root, f"date={day}")
+        os.makedirs(day_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=day_dir)
+        try:
+            for name, values in columns.items():
+                _write_column(staging_dir, name, values)
+            meta = {"rows": int(columns["id"].size), "min_id": int(columns["id"].min()),
+                    "max_id": int(columns["id"].max())}
+            with open(os.path.join(staging_dir, PART_META_NAME), "w") as f:
+                json.dump(meta, f)
+            os.rename(staging_dir, os.path.join(day_dir, f"part-{time.time_ns():020d}-{os.getpid()}"))
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+    def read(self, columns=None, start=None, end=None):
+        """
+        Return archived tweets as a DataFrame, reading only the days between start and
+        end and only the requested columns. created_at is returned as UTC timestamps
+        and sentiment as a categorical.
+        """
+        columns = list(columns or ARCHIVE_COLUMNS)
+        pieces = {name: [] for name in columns}
+        for day in self.partitions(start, end):
+            for part_dir in self._parts(day):
+                for name in columns:
+                    pieces[name].append(_read_column(part_dir, name))
+
+        data = {}
+        for name in columns:
+            if name == "text":
+                data[name] = pd.Series([text for part in pieces[name] for text in part], dtype=object)
+            else:
+                dtype = NUMERIC_COLUMNS[name]
+                values = np.concatenate(pieces[name]) if pieces[name] else np.empty(0, dtype=dtype)
+                if name == "created_at":
+                    data[name] = pd.to_datetime(values.astype("datetime64[ns]"), utc=True)
+                elif name == "sentiment":
+                    data[name] = pd.Categorical.from_codes(values, categories=SENTIMENT_CATEGORIES)
+                else:
+                    data[name] = values
+        return pd.DataFrame(data)
+
+
+# Incrementally archive a user's timeline
+def archive_user_timeline(api, user_handle, root=TWEET_ARCHIVE_DIR, page_size=200, aggregates=None):
+    """
+    Fetch only the tweets newer than the last archived one for a user, score their
+    sentiment in one batch and append them to the user's archive (and, if given, to
+    running TweetAggregates). Returns the number of new tweets.
+    """
+    archive = TweetArchive(os.path.join(root, user_handle))
+    since_id = archive.last_id()
+    logging.info(f"Archiving timeline of @{user_handle} since tweet {since_id}...")
+    try:
+        tweets = list(tweepy.Cursor(api.user_timeline, screen_name=user_handle, count=page_size,
+                                    since_id=since_id, tweet_mode="extended").items())
+    except TweepError as e:
+        logging.error(f"Error fetching user timeline: {e}")
+        return 0
+    frame = tweets_to_frame(tweets)
+    with archive:
+        archive.append(frame)
+    if aggregates is not None:
+        aggregates.add_frame(frame)
+    logging.info(f"Archived {len(tweets)} new tweets from @{user_handle}.")
+    return len(tweets)
@@ -1,10 +1,18 @@
 import tweepy
 import logging
-from textblob import TextBlob
-import re
 import time
 from collections import Counter
 
+from twitter.action_journal import execute_journaled_actions
+from twitter.api_cache import cached_trend_names, cached_verify_credentials
+from twitter.followers import INFLUENCE_THRESHOLD, fetch_profiles, high_influence
+from twitter.near_duplicates import skip_duplicate_replies
+from twitter.poll_state import PollState
+from twitter.sentiment_engine import analyze_sentiment_batch
+from twitter.text_cleaning import TWEET_NOISE_PATTERN, clean_tweet_texts
+from twitter.tweet_archive import tweets_to_frame
+from twitter.tweepy_compat import TweepError
+
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -19,7 +27,7 @@ def authenticate_twitter():
     
     api = tweepy.API(auth, wait_on_rate_limit=True)
     
-    if not api.verify_credentials():
+    if not cached_verify_credentials(api, ACCESS_TOKEN):
         logging.error("Authentication failed.")
         return None
     logging.info("Authentication successful.")
@@ -31,26 +39,15 @@ def clean_tweet_text(tweet_text):
     """
     Clean the tweet text to remove URLs, mentions, and other special characters.
     """
-    cleaned_text = re.sub(r'http\S+|www\S+|https\S+', '', tweet_text)  # Remove URLs
-    cleaned_text = re.sub(r'@\w+', '', cleaned_text)  # Remove mentions
-    cleaned_text = re.sub(r'[^A-Za-z0-9\s]+', '', cleaned_text)  # Remove special characters
-    cleaned_text = cleaned_text.strip()  # Remove extra whitespace
-    return cleaned_text
+    return TWEET_NOISE_PATTERN.sub("", tweet_text).strip()  # Remove URLs, mentions and special characters
 
 
 # Analyze sentiment of a tweet
 def analyze_sentiment(tweet_text):
     """
-    Analyze sentiment of the tweet using TextBlob.
+    Analyze sentiment of the tweet using TextBlob (through the cached batch engine).
     """
-    blob = TextBlob(tweet_text)
-    sentiment = blob.sentiment.polarity
-    if sentiment > 0:
-        return "positive"
-    elif sentiment < 0:
-        return "negative"
-    else:
-        return "neutral"
+    return analyze_sentiment_batch([tweet_text])[0]
 
 
 # Like a tweet based on its ID
@@ -62,7 +59,7 @@ def like_tweet(api, tweet_id):
     try:
         api.create_favorite(tweet_id)
         logging.info("Tweet liked successfully.")
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error liking tweet: {e}")
 
 
@@ -75,7 +72,7 @@ def retweet(api, tweet_id):
     try:
         api.retweet(tweet_id)
         logging.info("Retweet successful.")
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error retweeting: {e}")
 
 
@@ -88,7 +85,7 @@ def reply_to_tweet(api, tweet_id, message):
     try:
         api.update_status(status=message, in_reply_to_status_id=tweet_id)
         logging.info("Reply sent successfully.")
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error replying to tweet: {e}")
 
 
@@ -97,34 +94,49 @@ def filter_and_interact(api, tweets, sentiment_threshold=0.1):
     """
     Filter tweets based on sentiment analysis and interact (like/retweet).
     """
-    for tweet in tweets:
-        cleaned_text = clean_tweet_text(tweet.full_text)
-        sentiment = analyze_sentiment(cleaned_text)
+    tweets = list(tweets)
+    sentiments = analyze_sentiment_batch(clean_tweet_texts([tweet.full_text for tweet in tweets]))
+    actions = []
+    for tweet, sentiment in zip(tweets, sentiments):
         if sentiment == "positive":
             logging.info(f"Tweet is positive: {tweet.full_text}")
-            retweet(api, tweet.id)
-            like_tweet(api, tweet.id)
+            actions.append(("retweet", {"tweet_id": tweet.id}))
+            actions.append(("like", {"tweet_id": tweet.id}))
         elif sentiment == "negative" and sentiment_threshold:
             logging.info(f"Tweet is negative: {tweet.full_text}")
-            reply_to_tweet(api, tweet.id, "Stay strong! 💪")
+            actions.append(("reply", {"tweet_id": tweet.id, "message": "Stay strong! 💪"}))
+    return execute_journaled_actions(api, actions)
 
 
 # Monitor a hashtag for real-time engagement
-def monitor_hashtag(api, hashtag, count=100):
+def monitor_hashtag(api, hashtag, count=100, state=None, detector=None):
     """
     Monitor a hashtag and interact with tweets containing the hashtag.
+    Only tweets newer than the last poll's checkpoint are fetched (see PollState),
+    and near duplicates of tweets replied to recently get no reply (see NearDuplicateDetector).
     """
     logging.info(f"Monitoring hashtag #{hashtag}...")
-    for tweet in tweepy.Cursor(api.search_tweets, q=f"#{hashtag}", lang="en", result_type="recent").items(count):
+    query = f"#{hashtag}"
+    if state is None:
+        state = PollState()
+    tweets = list(tweepy.Cursor(api.search_tweets, q=query, lang="en", result_type="recent",
+                                since_id=state.since_id(query)).items(count))
+    tweets = state.filter_new(tweets)
+    texts = clean_tweet_texts([tweet.full_text for tweet in tweets])
+    sentiments = analyze_sentiment_batch(texts)
+    actions = []
+    for tweet, sentiment in zip(tweets, sentiments):
         logging.info(f"Found tweet: {tweet.full_text}")
-        cleaned_text = clean_tweet_text(tweet.full_text)
-        sentiment = analyze_sentiment(cleaned_text)
         logging.info(f"Sentiment: {sentiment}")
         if sentiment == "positive":
-            retweet(api, tweet.id)
-            like_tweet(api, tweet.id)
+            actions.append(("retweet", {"tweet_id": tweet.id}))
+            actions.append(("like", {"tweet_id": tweet.id}))
         elif sentiment == "negative":
-            reply_to_tweet(api, tweet.id, "We can turn things around!")
+            actions.append(("reply", {"tweet_id": tweet.id, "message": "We can turn things around!"}))
+    actions = skip_duplicate_replies(actions, {tweet.id: text for tweet, text in zip(tweets, texts)}, detector)
+    outcomes = execute_journaled_actions(api, actions)
+    state.mark_processed(query, [tweet.id for tweet in tweets])
+    return outcomes
 
 
 # Get trending topics for a location (WOEID)
@@ -134,11 +146,10 @@ def get_trending_topics(api, woeid=1):
     """
     logging.info(f"Fetching trending topics for WOEID {woeid}...")
     try:
-        trends = api.trends_place(woeid)
-        trending_topics = [trend['name'] for trend in trends[0]['trends']]
+        trending_topics = cached_trend_names(api, woeid)  # shared across bot processes
         logging.info(f"Trending topics: {trending_topics[:5]}")
         return trending_topics
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error fetching trends: {e}")
         return []
 
@@ -146,55 +157,59 @@ def get_trending_topics(api, woeid=1):
 # Save recent tweets to a DataFrame
 def save_tweets_to_dataframe(tweets):
     """
-    Save the recent tweets to a pandas DataFrame.
-    """
-    tweet_data = []
-    for tweet in tweets:
-        tweet_info = {
-            "tweet_id": tweet.id,
-            "created_at": tweet.created_at,
-            "text": tweet.full_text,
-            "likes": tweet.favorite_count,
-            "retweets": tweet.retweet_count,
-            "sentiment": analyze_sentiment(tweet.full_text)
-        }
-        tweet_data.append(tweet_info)
-    
-    df = pd.DataFrame(tweet_data)
+    Save the recent tweets to a pandas DataFrame (typed columns, categorical sentiment).
+    Use twitter.tweet_archive.TweetArchive to persist them.
+    """
+    df = tweets_to_frame(tweets).rename(columns={"id": "tweet_id"})
     logging.info("Tweets saved to DataFrame.")
     return df
 
 
 # Get a user's followers and analyze their engagement
-def analyze_user_followers(api, user_handle):
+def analyze_user_followers(api, user_handle, min_followers=INFLUENCE_THRESHOLD):
     """
     Get a user's followers and analyze their engagement behavior.
+    Every follower page is enumerated; profiles are served from the TTL cache when fresh.
     """
     logging.info(f"Analyzing followers of {user_handle}...")
-    followers = api.followers(screen_name=user_handle)
-    for follower in followers:
-        logging.info(f"Follower: {follower.screen_name}, Following: {follower.following_count}, Followers: {follower.followers_count}")
-        if follower.followers_count > 5000:
-            logging.info(f"Engaging with high-influence follower: {follower.screen_name}")
-            like_tweet(api, follower.id)
+    followers = fetch_profiles(api, user_handle, kind="followers")
+    influential = high_influence(followers, min_followers)
+    logging.info(f"Followers: {len(followers)}, median following: {followers['friends_count'].median()}, "
+                 f"median followers: {followers['followers_count'].median()}, high-influence: {len(influential)}")
+    # Engage with the latest tweet of each high-influence follower
+    for screen_name in influential["screen_name"]:
+        logging.info(f"Engaging with high-influence follower: {screen_name}")
+    latest_tweets = influential["status_id"].dropna().astype("int64")
+    return execute_journaled_actions(api, [("like", {"tweet_id": int(tweet_id)}) for tweet_id in latest_tweets])
 
 
 # Handle incoming replies to a tweet
-def handle_incoming_replies(api, tweet_id):
+def handle_incoming_replies(api, tweet_id, state=None):
     """
     Handle incoming replies to a specific tweet.
+    Replies handled by earlier runs are neither fetched nor answered again.
     """
     logging.info(f"Handling incoming replies for tweet ID: {tweet_id}")
-    replies = tweepy.Cursor(api.search_tweets, q=f"to:{tweet_id}", since_id=tweet_id, tweet_mode='extended').items()
-    for reply in replies:
+    query = f"to:{tweet_id}"
+    if state is None:
+        state = PollState()
+    since_id = max(tweet_id, state.since_id(query) or 0)
+    replies = list(tweepy.Cursor(api.search_tweets, q=query, since_id=since_id, tweet_mode='extended').items())
+    replies = state.filter_new(replies)
+    sentiments = analyze_sentiment_batch([reply.full_text for reply in replies])
+    actions = []
+    for reply, sentiment in zip(replies, sentiments):
         logging.info(f"Reply: {reply.full_text}")
-        sentiment = analyze_sentiment(reply.full_text)
         if sentiment == "positive":
             logging.info("Positive reply detected, retweeting.")
-            retweet(api, reply.id)
+            actions.append(("retweet", {"tweet_id": reply.id}))
         elif sentiment == "negative":
             logging.info("Negative reply detected, replying back.")
-            reply_to_tweet(api, reply.id, "Thank you for sharing your thoughts, we appreciate feedback.")
+            actions.append(("reply", {"tweet_id": reply.id,
+                                      "message": "Thank you for sharing your thoughts, we appreciate feedback."}))
+    outcomes = execute_journaled_actions(api, actions)
+    state.mark_processed(query, [reply.id for reply in replies])
+    return outcomes
 
 
 #
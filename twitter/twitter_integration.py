@@ -1,12 +1,22 @@
 import tweepy
 import logging
-import time
-import re
+import os
+import sys
 import pandas as pd
-from textblob import TextBlob
 from datetime import datetime
 from collections import Counter
 
+# Make the repository root importable when run as a script, not only with python -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from twitter.api_cache import cached_trend_names, cached_user, cached_verify_credentials
+from twitter.followers import default_profile_cache
+from twitter.media_pipeline import post_media_tweets
+from twitter.rate_limits import default_scheduler, endpoint_from_url
+from twitter.sentiment_engine import analyze_sentiment_batch
+from twitter.text_cleaning import TWEET_NOISE_PATTERN
+from twitter.tweet_analytics import default_aggregates
+from twitter.tweepy_compat import TweepError
+
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -22,7 +32,7 @@ def authenticate_twitter():
     
     api = tweepy.API(auth, wait_on_rate_limit=True)
     
-    if not api.verify_credentials():
+    if not cached_verify_credentials(api, ACCESS_TOKEN):
         logging.error("Authentication failed.")
         return None
     logging.info("Authentication successful.")
@@ -38,7 +48,7 @@ def post_tweet(api, message):
     try:
         api.update_status(message)
         logging.info("Tweet posted successfully.")
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error posting tweet: {e}")
 
 
@@ -52,7 +62,7 @@ def fetch_user_timeline(api, user_handle, count=100):
         tweets = api.user_timeline(screen_name=user_handle, count=count, tweet_mode="extended")
         logging.info(f"Fetched {len(tweets)} tweets from @{user_handle}.")
         return tweets
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error fetching user timeline: {e}")
         return []
 
@@ -78,33 +88,35 @@ def extract_tweet_data(tweets):
 # Analyze tweet sentiment
 def analyze_sentiment(tweet_text):
     """
-    Analyze sentiment of the tweet using TextBlob.
+    Analyze sentiment of the tweet using TextBlob (through the cached batch engine).
     """
-    blob = TextBlob(tweet_text)
-    sentiment = blob.sentiment.polarity
-    if sentiment > 0:
-        return "positive"
-    elif sentiment < 0:
-        return "negative"
-    else:
-        return "neutral"
+    return analyze_sentiment_batch([tweet_text])[0]
 
 
 # Perform sentiment analysis on a set of tweets
-def analyze_tweets_sentiment(tweets):
+def analyze_tweets_sentiment(tweets, aggregates=default_aggregates):
     """
-    Analyze sentiment for a batch of tweets and store the results.
+    Analyze sentiment for a batch of tweets and store the results in the running
+    aggregates (see TweetAggregates). Returns the batch's sentiment counts.
     """
     logging.info("Analyzing sentiment for tweets...")
-    sentiments = []
-    for tweet in tweets:
-        sentiment = analyze_sentiment(tweet["text"])
-        sentiments.append(sentiment)
-    sentiment_count = Counter(sentiments)
+    sentiment_count = Counter(aggregates.add_tweets(tweets))
     logging.info(f"Sentiment Analysis - Positive: {sentiment_count['positive']}, Negative: {sentiment_count['negative']}, Neutral: {sentiment_count['neutral']}")
     return sentiment_count
 
 
+# Get engagement and sentiment stats without rescanning tweets
+def get_engagement_stats(window="24h", aggregates=default_aggregates):
+    """
+    Return tweet, sentiment, like and retweet totals over a rolling window
+    ("1h", "24h", "30d" or None for all time) from the running aggregates.
+    """
+    stats = aggregates.summary(window)
+    logging.info(f"Engagement over {window or 'all time'}: {stats['tweets']} tweets, "
+                 f"{stats['likes']} likes, {stats['retweets']} retweets")
+    return stats
+
+
 # Fetch and analyze trends for a specific location (WOEID)
 def fetch_trends(api, woeid):
     """
@@ -112,11 +124,10 @@ def fetch_trends(api, woeid):
     """
     logging.info(f"Fetching trending topics for WOEID {woeid}...")
     try:
-        trends = api.trends_place(woeid)
-        trend_data = [trend['name'] for trend in trends[0]['trends']]
+        trend_data = cached_trend_names(api, woeid)  # shared across bot processes
         logging.info(f"Trending topics: {trend_data[:5]}")  # Display top 5 trends
         return trend_data
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error fetching trends: {e}")
         return []
 
@@ -130,7 +141,7 @@ def follow_user(api, user_handle):
     try:
         api.create_friendship(screen_name=user_handle)
         logging.info(f"Successfully followed @{user_handle}.")
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error following user: {e}")
 
 
@@ -143,22 +154,25 @@ def unfollow_user(api, user_handle):
     try:
         api.destroy_friendship(screen_name=user_handle)
         logging.info(f"Successfully unfollowed @{user_handle}.")
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error unfollowing user: {e}")
 
 
 # Get follower count for a user
 def get_follower_count(api, user_handle):
     """
-    Get the follower count for a user.
+    Get the follower count for a user (from the profile or shared API cache while fresh).
     """
     logging.info(f"Fetching follower count for @{user_handle}...")
+    cached = default_profile_cache.by_screen_name(user_handle)
+    if cached is not None:
+        logging.info(f"@{user_handle} has {cached['followers_count']} followers (cached).")
+        return int(cached["followers_count"])
     try:
-        user = api.get_user(screen_name=user_handle)
-        follower_count = user.followers_count
+        follower_count = cached_user(api, user_handle)["followers_count"]
         logging.info(f"@{user_handle} has {follower_count} followers.")
         return follower_count
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error fetching follower count: {e}")
         return 0
 
@@ -168,12 +182,7 @@ def clean_tweet_text(tweet_text):
     """
     Clean the tweet text to remove URLs, mentions, and other special characters.
     """
-    logging.info("Cleaning tweet text...")
-    cleaned_text = re.sub(r'http\S+|www\S+|https\S+', '', tweet_text)  # Remove URLs
-    cleaned_text = re.sub(r'@\w+', '', cleaned_text)  # Remove mentions
-    cleaned_text = re.sub(r'[^A-Za-z0-9\s]+', '', cleaned_text)  # Remove special characters
-    cleaned_text = cleaned_text.strip()  # Remove extra whitespace
-    return cleaned_text
+    return TWEET_NOISE_PATTERN.sub("", tweet_text).strip()  # Remove URLs, mentions and special characters
 
 
 # Function to retweet a tweet based on its ID
@@ -185,7 +194,7 @@ def retweet(api, tweet_id):
     try:
         api.retweet(tweet_id)
         logging.info("Retweet successful.")
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error retweeting: {e}")
 
 
@@ -198,7 +207,7 @@ def like_tweet(api, tweet_id):
     try:
         api.create_favorite(tweet_id)
         logging.info("Tweet liked successfully.")
-    except tweepy.TweepError as e:
+    except TweepError as e:
         logging.error(f"Error liking tweet: {e}")
 
 
@@ -208,24 +217,23 @@ def post_media_tweet(api, message, media_path):
     Post a tweet with media (image/video).
     """
     logging.info(f"Posting tweet with media: {message}")
-    try:
-        media = api.media_upload(media_path)
-        api.update_status(status=message, media_ids=[media.media_id])
-        logging.info("Tweet with media posted successfully.")
-    except tweepy.TweepError as e:
-        logging.error(f"Error posting tweet with media: {e}")
+    post_media_tweets(api, [(message, [media_path])])
 
 
 # Rate limit handler (sleeping between requests if necessary)
-def handle_rate_limit(api):
+def handle_rate_limit(api, endpoint=None, scheduler=default_scheduler):
     """
-    Handle rate-limiting by sleeping between requests.
+    Handle rate-limiting before a request to endpoint (e.g. "search/tweets"). The
+    remaining quota and reset time come from the headers of earlier responses, so
+    this only sleeps when the endpoint's window is exhausted, and only until it resets.
+    Without an endpoint, the window of the API's last response is used (or a shared
+    "unknown" bucket before any response).
     """
-    while True:
-        if api.rate_limit_status()['remaining_hits'] > 0:
-            break
-        logging.warning("Rate limit exceeded. Sleeping for 15 minutes.")
-        time.sleep(15 * 60)
+    last_response = getattr(api, "last_response", None)
+    scheduler.observe(last_response)
+    if endpoint is None:
+        endpoint = endpoint_from_url(getattr(last_response, "url", "") or "") or "unknown"
+    return scheduler.acquire(endpoint)
 
 
 # Main integration function